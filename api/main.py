@@ -0,0 +1,298 @@
+"""
+Long-running local query service.
+
+Builds the configured pipelines once, ingests the docs and warms the
+retriever indexes at startup, then serves queries over HTTP so that the
+embedding model, generator and chunk/embedding caches stay resident.
+
+Endpoints:
+    GET  /health   -> service status, loaded pipelines and chunk counts
+    GET  /metrics  -> per-stage timings and counts in Prometheus text format
+    POST /query    -> {"query": "...", "pipeline": "rag"} runs a query; with
+                      "stream": true the answer is sent as NDJSON events
+                      (retrieval, token..., done) over a chunked response
+    POST /reload   -> re-ingests changed docs and re-warms the indexes
+
+Run:
+    python -m api.main [--host HOST] [--port PORT]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import yaml
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from modules.pipelines.factory import PipelineFactory
+from utils.metrics import metrics
+
+logger = logging.getLogger("api")
+
+# Load config
+with open(Path(__file__).parent.parent / "config.yaml", "r") as f:
+    config = yaml.safe_load(f)
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+_MAX_BODY = 1 << 20
+
+
+class StreamingResponse:
+    """A blocking generator of JSON events, sent one line at a time by serve_connection."""
+
+    def __init__(self, events, on_close=None):
+        self.events = events
+        self.on_close = on_close
+
+
+class QueryService:
+    """
+    Holds warm pipelines and runs their work on a bounded thread pool.
+
+    Model work (ingestion, embedding, generation) is blocking, so it is
+    offloaded to `workers` threads while the asyncio loop only parses
+    requests. At most `max_pending` requests may be queued or running;
+    beyond that the service answers 503 instead of building an unbounded backlog.
+    """
+
+    def __init__(self, config: dict, pipeline_names: list = None,
+                 workers: int = 2, max_pending: int = 16):
+        self.config = config
+        self.docs_path = config["data"]["docs_path"]
+        self.pipeline_names = pipeline_names or list(config.get("pipelines", {}))
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="query")
+        self.max_pending = max_pending
+        self.pending = 0
+        self.started_at = time.time()
+
+        # Modules are shared across pipelines so each model and cache is loaded once
+        self._shared_modules = {}
+        self.pipelines = {
+            name: PipelineFactory.create(config, name, shared_modules=self._shared_modules)
+            for name in self.pipeline_names
+        }
+        self.chunks = {}
+        self._reload_lock = asyncio.Lock()
+
+    def close(self) -> None:
+        """Stop the worker pool and any thread pools held by the shared modules."""
+        self.executor.shutdown(wait=False)
+        for module in self._shared_modules.values():
+            if hasattr(module, "close"):
+                module.close()
+
+    def load(self) -> dict:
+        """(Re)ingest docs for every pipeline and warm the retriever indexes."""
+        stats = {}
+        for name, pipeline in self.pipelines.items():
+            t0 = time.perf_counter()
+            chunks = pipeline.ingest(self.docs_path)
+            pipeline.prepare(chunks)
+            # swap in the new chunk list only once it is fully indexed
+            self.chunks[name] = chunks
+            stats[name] = {"chunks": len(chunks), "seconds": round(time.perf_counter() - t0, 3)}
+        return stats
+
+    def query(self, query: str, pipeline_name: str) -> dict:
+        pipeline = self.pipelines[pipeline_name]
+        t0 = time.perf_counter()
+        with metrics.timer(f"api:{pipeline_name}") as items:
+            state = pipeline.execute(query, chunks=self.chunks[pipeline_name])
+            items["results"] = len(state["retrieval"] or [])
+        response = {
+            "query": query,
+            "pipeline": pipeline_name,
+            "results": [{"text": text, "score": float(score)} for text, score in state["retrieval"] or []],
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000, 2),
+        }
+        if state["answer"] is not None:
+            response["answer"] = state["answer"]
+        return response
+
+    def stream_query(self, query: str, pipeline_name: str):
+        """Yield JSON-ready events for a query as the answer is generated."""
+        pipeline = self.pipelines[pipeline_name]
+        for event in pipeline.stream(query, chunks=self.chunks[pipeline_name]):
+            if event["event"] == "retrieval":
+                event = {"event": "retrieval", "pipeline": pipeline_name,
+                         "results": [{"text": text, "score": float(score)} for text, score in event["results"]]}
+            yield event
+
+    async def _offload(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    async def handle(self, method: str, path: str, body: bytes):
+        """Route a request; returns (status, payload). A str payload is sent as plain text."""
+        if path == "/health":
+            if method != "GET":
+                return 405, {"error": "use GET"}
+            return 200, {
+                "status": "ok",
+                "uptime_s": round(time.time() - self.started_at, 1),
+                "pipelines": {name: {"chunks": len(self.chunks.get(name, []))} for name in self.pipelines},
+                "pending": self.pending,
+            }
+
+        if path == "/metrics":
+            if method != "GET":
+                return 405, {"error": "use GET"}
+            return 200, metrics.to_prometheus()
+
+        if path not in ("/query", "/reload"):
+            return 404, {"error": f"unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+
+        if path == "/reload":
+            async with self._reload_lock:
+                return 200, {"reloaded": await self._offload(self.load)}
+
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return 400, {"error": "body must be JSON"}
+        if not isinstance(payload, dict):
+            return 400, {"error": "body must be a JSON object"}
+        query = payload.get("query")
+        pipeline_name = payload.get("pipeline", self.pipeline_names[0])
+        if not isinstance(query, str) or not query.strip():
+            return 400, {"error": "'query' must be a non-empty string"}
+        if pipeline_name not in self.pipelines:
+            return 400, {"error": f"unknown pipeline '{pipeline_name}'"}
+
+        if self.pending >= self.max_pending:
+            return 503, {"error": "too many pending requests"}
+        self.pending += 1
+        if payload.get("stream"):
+            # the pending slot is released by serve_connection once the stream ends
+            return 200, StreamingResponse(self.stream_query(query, pipeline_name), on_close=self._release)
+        try:
+            return 200, await self._offload(self.query, query, pipeline_name)
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        self.pending -= 1
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Minimal HTTP/1.1 handling: one request per connection, JSON in and out."""
+        try:
+            status, payload = await self._read_and_handle(reader)
+        except Exception as exc:  # never let a request kill the server
+            logger.exception("request failed")
+            status, payload = 500, {"error": str(exc)}
+
+        if isinstance(payload, StreamingResponse):
+            await self._send_stream(writer, payload)
+            return
+        if isinstance(payload, str):
+            data, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            data, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + data)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _send_stream(self, writer: asyncio.StreamWriter, response: StreamingResponse):
+        """Send events as NDJSON with chunked transfer encoding, pulling each from the worker pool."""
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: application/x-ndjson\r\n"
+            b"Transfer-Encoding: chunked\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        events = response.events
+        try:
+            while True:
+                try:
+                    event = await self._offload(next, events, None)
+                except Exception as exc:
+                    logger.exception("stream failed")
+                    event = {"event": "error", "error": str(exc)}
+                if event is None:
+                    break
+                line = json.dumps(event).encode("utf-8") + b"\n"
+                writer.write(f"{len(line):x}\r\n".encode("latin-1") + line + b"\r\n")
+                await writer.drain()
+                if event["event"] == "error":
+                    break
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        except ConnectionError:
+            logger.info("client disconnected during stream")
+        finally:
+            events.close()
+            if response.on_close is not None:
+                response.on_close()
+            writer.close()
+
+    async def _read_and_handle(self, reader: asyncio.StreamReader):
+        request_line = await reader.readline()
+        parts = request_line.decode("latin-1").split()
+        if len(parts) < 2:
+            return 400, {"error": "malformed request line"}
+        method, target = parts[0].upper(), parts[1]
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        length = headers.get("content-length", "") or "0"
+        if not (length.isascii() and length.isdigit()):
+            return 400, {"error": "invalid Content-Length"}
+        length = int(length)
+        if length > _MAX_BODY:
+            return 413, {"error": "request body too large"}
+        try:
+            body = await reader.readexactly(length) if length else b""
+        except asyncio.IncompleteReadError:
+            return 400, {"error": "request body shorter than Content-Length"}
+        return await self.handle(method, target.split("?", 1)[0], body)
+
+
+async def serve(host: str, port: int, service: QueryService):
+    await service._offload(service.load)
+    server = await asyncio.start_server(service.serve_connection, host, port)
+    logger.info("Serving %s on http://%s:%s", ", ".join(service.pipelines), host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    api_cfg = config.get("api", {})
+    parser = argparse.ArgumentParser(description="Serve AIPlayground pipelines over HTTP")
+    parser.add_argument("--host", type=str, default=api_cfg.get("host", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=api_cfg.get("port", 8000))
+    parser.add_argument("--pipelines", nargs="*", default=api_cfg.get("pipelines"),
+                        help="Pipelines to load (default: all configured)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=config.get("logging", {}).get("level", "INFO"))
+    service = QueryService(config, args.pipelines,
+                           workers=api_cfg.get("workers", 2),
+                           max_pending=api_cfg.get("max_pending", 16))
+    try:
+        asyncio.run(serve(args.host, args.port, service))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,67 @@
 from abc import ABC, abstractmethod
+from collections.abc import Sized
+from utils.metrics import metrics, rss_growth_mb, rss_mb
+import functools
+import threading
+import time
 import yaml
 from pathlib import Path
 
+# Modules currently inside an instrumented run() on this thread, so that a
+# subclass calling super().run() is only recorded once
+_active_runs = threading.local()
+
+
+def _instrument(run):
+    """Wrap a module's run() to record its timing and item counts in utils.metrics."""
+    @functools.wraps(run)
+    def wrapper(self, *args, **kwargs):
+        active = _active_runs.__dict__.setdefault("ids", set())
+        if id(self) in active:
+            return run(self, *args, **kwargs)
+        active.add(id(self))
+        before = self.metric_counters()
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        try:
+            result = run(self, *args, **kwargs)
+        finally:
+            active.discard(id(self))
+        seconds = time.perf_counter() - start
+        rss_delta = rss_growth_mb(rss_before)
+        after = self.metric_counters()
+        items = {key: value - before.get(key, 0) for key, value in after.items()}
+        if isinstance(result, Sized) and not isinstance(result, str):
+            items["items_out"] = len(result)
+        metrics.record(self.metrics_stage, seconds, items, rss_delta)
+        return result
+    wrapper._instrumented = True
+    return wrapper
+
 class BaseModule(ABC):
     """
     BaseModule is the universal contract for all modules in AIPlayground.
     Every module (retriever, generator, ingestor, cache, metric, pipeline, etc.)
     must inherit from BaseModule and implement the `run` method.
+
+    Every `run` implementation is instrumented: its wall time, output size,
+    RSS change and the change in `metric_counters()` are recorded under
+    `metrics_stage` in the `utils.metrics.metrics` registry (see there for
+    hooks and export).
+
+    Counters are cumulative per module instance, so when one module is shared
+    by pipelines serving requests concurrently (the API's shared_modules), the
+    delta recorded for a run also counts work done by overlapping runs. Totals
+    per stage stay exact; per-run values are exact only for serial runs.
     """
     _config = None  # shared across all subclasses
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        run = cls.__dict__.get("run")
+        if run is not None and not getattr(run, "__isabstractmethod__", False) \
+                and not getattr(run, "_instrumented", False):
+            cls.run = _instrument(run)
     
     def __init__(self, name: str = None):
         """
@@ -25,6 +78,18 @@ class BaseModule(ABC):
         self.config = BaseModule._config
         self.name = name or self.__class__.__name__
 
+    @property
+    def metrics_stage(self) -> str:
+        """Stage name under which run() is recorded."""
+        return self.name
+
+    def metric_counters(self) -> dict:
+        """
+        Cumulative counters of work done by this module (e.g. embeddings
+        computed). The change across a run() is recorded with its timing.
+        """
+        return {}
+
     @abstractmethod
     def run(self, *args, **kwargs):
         """
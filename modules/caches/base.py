@@ -0,0 +1,38 @@
+from abc import ABC, abstractmethod
+from modules.baseModule import BaseModule
+
+
+class BaseCache(BaseModule, ABC):
+    """
+    Abstract base class for cache modules.
+    Caches map a key to a stored value and keep hit/miss counters.
+    """
+
+    def __init__(self, name: str = None):
+        super().__init__(name)
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def get(self, key, default=None):
+        """Return the stored value for `key`, or `default` on a miss."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key, value) -> None:
+        """Store `value` under `key`, evicting old entries if needed."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every entry."""
+        raise NotImplementedError
+
+    def run(self, key, *args, **kwargs):
+        """Implements BaseModule contract by calling get()."""
+        return self.get(key)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
@@ -0,0 +1,149 @@
+from collections import OrderedDict
+from modules.caches.base import BaseCache
+from pathlib import Path
+from utils.fileio import atomic_write
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+
+_MISSING = object()
+
+
+class ResultCache(BaseCache):
+    """
+    LRU + TTL cache for pipeline results.
+
+    Backends:
+        - "memory": an OrderedDict in this process (default).
+        - "disk":   one pickle file per entry under `path`; recency is tracked
+                    through file mtimes so entries survive restarts. The
+                    directory is scanned once, on first use, into an
+                    in-memory LRU order, so a write does not rescan it.
+
+    Keys are built with `make_key` from the normalized query, pipeline name,
+    module configs and corpus version, so a docs change produces new keys and
+    stale entries simply age out.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600,
+                 backend: str = "memory", path: str = "cache/results"):
+        """
+        Args:
+            max_entries (int): Entries kept before least-recently-used eviction.
+            ttl_seconds (float): Entry lifetime; 0 or None disables expiry.
+            backend (str): "memory" or "disk".
+            path (str): Directory for the disk backend.
+        """
+        super().__init__(name="ResultCache")
+        if backend not in ("memory", "disk"):
+            raise ValueError(f"Unknown result cache backend: {backend}")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self.path = Path(path)
+        self._entries: OrderedDict = OrderedDict()
+        self._disk_order = None  # disk backend: key -> None, least recently used first
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    @classmethod
+    def make_key(cls, query: str, pipeline_name: str, module_configs, corpus_version: str) -> str:
+        payload = json.dumps({
+            "query": cls.normalize_query(query),
+            "pipeline": pipeline_name,
+            "modules": module_configs,
+            "corpus": corpus_version,
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _expired(self, expires_at) -> bool:
+        return expires_at is not None and time.time() > expires_at
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._get_disk(key) if self.backend == "disk" else self._get_memory(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key, value) -> None:
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            if self.backend == "disk":
+                self._set_disk(key, expires_at, value)
+            else:
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._disk_order = None
+            if self.backend == "disk" and self.path.exists():
+                for file in self.path.glob("*.pkl"):
+                    file.unlink(missing_ok=True)
+
+    def __len__(self) -> int:
+        if self.backend == "disk":
+            with self._lock:
+                return len(self._disk_entries())
+        return len(self._entries)
+
+    def _get_memory(self, key):
+        item = self._entries.get(key)
+        if item is None:
+            return _MISSING
+        expires_at, value = item
+        if self._expired(expires_at):
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def _file(self, key) -> Path:
+        return self.path / f"{key}.pkl"
+
+    def _disk_entries(self) -> OrderedDict:
+        """LRU order of the entry files, read from their mtimes on first use."""
+        if self._disk_order is None:
+            files = list(self.path.glob("*.pkl")) if self.path.exists() else []
+            files.sort(key=lambda f: f.stat().st_mtime_ns)
+            self._disk_order = OrderedDict((f.stem, None) for f in files)
+        return self._disk_order
+
+    def _get_disk(self, key):
+        order = self._disk_entries()
+        file = self._file(key)
+        try:
+            with open(file, "rb") as f:
+                expires_at, value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            order.pop(key, None)
+            return _MISSING
+        if self._expired(expires_at):
+            file.unlink(missing_ok=True)
+            order.pop(key, None)
+            return _MISSING
+        os.utime(file)  # mark as recently used, for the order after a restart
+        order[key] = None
+        order.move_to_end(key)
+        return value
+
+    def _set_disk(self, key, expires_at, value) -> None:
+        order = self._disk_entries()
+        atomic_write(self._file(key), pickle.dumps((expires_at, value)))
+        order[key] = None
+        order.move_to_end(key)
+        while len(order) > self.max_entries:
+            oldest, _ = order.popitem(last=False)
+            self._file(oldest).unlink(missing_ok=True)
@@ -0,0 +1,117 @@
+from collections import OrderedDict
+from modules.caches.base import BaseCache
+from modules.caches.resultCache import ResultCache
+from utils.vectorizer import vectorize_string
+from utils.vectors import normalize
+import itertools
+import numpy as np
+import threading
+
+
+class SemanticCache(BaseCache):
+    """
+    Answer cache matched by query meaning rather than exact text.
+
+    Each entry stores the embedding of an answered query. A new query is
+    embedded with `utils.vectorizer` and compared (cosine) against the
+    entries of the same namespace (e.g. pipeline); the most similar one is a
+    hit if its similarity is at least `threshold`.
+
+    The cache is bounded to `max_entries` with least-recently-used eviction,
+    and a namespace's entries are dropped when a lookup or store for it comes
+    with a new corpus version.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 512, model_name: str = None):
+        """
+        Args:
+            threshold (float): Minimum cosine similarity for a hit.
+            max_entries (int): Entries kept before least-recently-used eviction.
+            model_name (str, optional): Embedding model; defaults to embedding.model_name.
+        """
+        super().__init__(name="SemanticCache")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.model_name = model_name
+        self.invalidations = 0
+        self.last_similarity = None
+        self._entries: OrderedDict = OrderedDict()   # id -> (namespace, vector, value)
+        self._ids = itertools.count()
+        self._corpus_versions: dict = {}             # namespace -> corpus version
+        self._matrix = None                           # (ids, namespaces, vectors), rebuilt lazily
+        self._lock = threading.Lock()
+
+    def embed(self, query: str) -> np.ndarray:
+        text = ResultCache.normalize_query(query)
+        return normalize(np.asarray(vectorize_string(text, self.model_name), dtype=np.float32))
+
+    def _check_corpus(self, namespace: str, corpus_version) -> None:
+        if namespace in self._corpus_versions and self._corpus_versions[namespace] == corpus_version:
+            return
+        stale = [entry_id for entry_id, (ns, _, _) in self._entries.items() if ns == namespace]
+        if stale:
+            self.invalidations += 1
+            for entry_id in stale:
+                del self._entries[entry_id]
+            self._matrix = None
+        self._corpus_versions[namespace] = corpus_version
+
+    def lookup(self, query: str, namespace: str = "", corpus_version: str = None):
+        """
+        Find the stored value of the most similar previous query.
+
+        Returns:
+            tuple: (value or None, query vector). Pass the vector on to `store`
+            after a miss so the query is not embedded twice.
+        """
+        vector = self.embed(query)
+        with self._lock:
+            self._check_corpus(namespace, corpus_version)
+            self.last_similarity = None
+            if self._entries:
+                if self._matrix is None:
+                    entries = list(self._entries.items())
+                    self._matrix = (
+                        [entry_id for entry_id, _ in entries],
+                        np.array([ns for _, (ns, _, _) in entries], dtype=object),
+                        np.stack([vec for _, (_, vec, _) in entries]),
+                    )
+                ids, namespaces, vectors = self._matrix
+                scores = np.where(namespaces == namespace, vectors @ vector, -np.inf)
+                best = int(np.argmax(scores))
+                if np.isfinite(scores[best]):
+                    self.last_similarity = float(scores[best])
+                if scores[best] >= self.threshold:
+                    self._entries.move_to_end(ids[best])
+                    self.hits += 1
+                    return self._entries[ids[best]][2], vector
+            self.misses += 1
+            return None, vector
+
+    def store(self, vector: np.ndarray, value, namespace: str = "", corpus_version: str = None) -> None:
+        with self._lock:
+            self._check_corpus(namespace, corpus_version)
+            self._entries[next(self._ids)] = (namespace, vector, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def get(self, key, default=None, namespace: str = "", corpus_version: str = None):
+        value, _ = self.lookup(key, namespace, corpus_version)
+        return default if value is None else value
+
+    def set(self, key, value, namespace: str = "", corpus_version: str = None) -> None:
+        self.store(self.embed(key), value, namespace, corpus_version)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._corpus_versions.clear()
+            self._matrix = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "entries": len(self._entries),
+                "invalidations": self.invalidations, "threshold": self.threshold}
@@ -1,6 +1,23 @@
 from abc import ABC, abstractmethod
 from modules.baseModule import BaseModule
-from typing import List
+from typing import Iterator, List, Tuple
+
+
+def repeated_ngram(tokens: list, ngram: int = 4, limit: int = 3) -> bool:
+    """
+    True when the last `ngram` tokens already occur `limit` times in
+    `tokens` (counting the trailing occurrence), i.e. generation is looping.
+    """
+    if ngram <= 0 or len(tokens) < ngram:
+        return False
+    tail = tokens[-ngram:]
+    count = 0
+    for start in range(len(tokens) - ngram, -1, -1):
+        if tokens[start:start + ngram] == tail:
+            count += 1
+            if count >= limit:
+                return True
+    return False
 
 class BaseGenerator(BaseModule, ABC):
     def __init__(self, name: str = None, max_new_tokens: int = 64, temperature: float = 0.0):
@@ -9,11 +26,33 @@ class BaseGenerator(BaseModule, ABC):
         self.temperature = temperature
         self.last_answer: str | None = None
 
+    def load(self) -> None:
+        """Load model weights ahead of the first request (generators may load lazily)."""
+        return None
+
     @abstractmethod
     def generate(self, query: str, contexts: List[str]) -> str:
         raise NotImplementedError
 
+    def generate_batch(self, requests: List[Tuple[str, List[str]]]) -> List[str]:
+        """
+        Answer several (query, contexts) requests.
+        Generators that can batch forward passes should override this;
+        the default answers them one by one.
+        """
+        return [self.generate(query, contexts) for query, contexts in requests]
+
+    def generate_stream(self, query: str, contexts: List[str]) -> Iterator[str]:
+        """
+        Yield the answer in pieces as they are decoded.
+        Generators that can stream tokens should override this; the default
+        yields the whole answer once it is ready.
+        """
+        answer = self.generate(query, contexts)
+        self.last_answer = answer
+        yield answer
+
     def run(self, query: str, contexts: List[str]) -> str:
         ans = self.generate(query, contexts)
         self.last_answer = ans
-        return ans
\ No newline at end of file
+        return ans
@@ -1,10 +1,11 @@
-from modules.generators.flanT5 import FlanT5Generator
+from utils.imports import import_from_path
 
 class GeneratorFactory:
+    # type -> (import path, default kwargs); classes are imported on first use
     _registry = {
-        "flan_t5_small": lambda **kwargs: FlanT5Generator(model_name="google/flan-t5-small", **kwargs),
-        "flan_t5_base": lambda **kwargs: FlanT5Generator(model_name="google/flan-t5-base", **kwargs),
-        "flan_alpaca_base": lambda **kwargs: FlanT5Generator(model_name="declare-lab/flan-alpaca-base", **kwargs),
+        "flan_t5_small": ("modules.generators.flanT5:FlanT5Generator", {"model_name": "google/flan-t5-small"}),
+        "flan_t5_base": ("modules.generators.flanT5:FlanT5Generator", {"model_name": "google/flan-t5-base"}),
+        "flan_alpaca_base": ("modules.generators.flanT5:FlanT5Generator", {"model_name": "declare-lab/flan-alpaca-base"}),
     }
 
     @staticmethod
@@ -12,5 +13,6 @@ class GeneratorFactory:
         gen_type = config.get("type")
         if gen_type not in GeneratorFactory._registry:
             raise ValueError(f"Unknown generator type: {gen_type}")
-        factory = GeneratorFactory._registry[gen_type]
-        return factory(**{k: v for k, v in config.items() if k != "type"})
\ No newline at end of file
+        path, defaults = GeneratorFactory._registry[gen_type]
+        cls = import_from_path(path)
+        return cls(**{**defaults, **{k: v for k, v in config.items() if k != "type"}})
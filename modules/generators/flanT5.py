@@ -1,19 +1,143 @@
-from transformers import pipeline
-from modules.generators.base import BaseGenerator
+from collections import OrderedDict
+from modules.generators.base import BaseGenerator, repeated_ngram
+from modules.generators.scheduler import BatchScheduler
+import hashlib
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+_CONTEXT_SEPARATOR = "\n\n---\n\n"
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
 
 class FlanT5Generator(BaseGenerator):
     def __init__(self, model_name: str = "google/flan-t5-base",
-                 max_new_tokens: int = 64, temperature: float = 0.0, device: str | None = None):
+                 max_new_tokens: int = 64, temperature: float = 0.0, device: str | None = None,
+                 batching: dict | None = None, streaming: dict | None = None,
+                 max_input_tokens: int = 512, token_cache_size: int = 10000,
+                 backend: str = "torch", onnx_path: str | None = None):
         super().__init__(name="FlanT5Generator", max_new_tokens=max_new_tokens, temperature=temperature)
         # use device from config if not passed (e.g., "mps" or "cpu")
-        device = device or self.config["embedding"].get("device", "cpu")
-        # HF pipeline handles device mapping automatically; keep it simple
-        self.pipe = pipeline("text2text-generation", model=model_name, device_map="auto")
+        self.device = device or self.config["embedding"].get("device", "cpu")
+        self.model_name = model_name
+        # "torch", "int8" (dynamic quantization) or "onnx" (see utils.inference)
+        self.backend = backend
+        self.onnx_path = onnx_path
+        # the HF pipeline (and transformers itself) is loaded on first use
+        self._pipe = None
+        self._pipe_lock = threading.Lock()
+        self.tokens_generated = 0
+
+        # Prompt packing: contexts are added best-first until max_input_tokens
+        self.max_input_tokens = max_input_tokens
+        self.token_cache_size = token_cache_size
+        self._token_counts: OrderedDict = OrderedDict()   # chunk digest -> token count
+        self._token_lock = threading.Lock()
+        self.prompt_tokens = 0
+        self.last_prompt_tokens = None
+
+        # Opt-in micro-batching of concurrent generate() calls
+        batching = batching or {}
+        self.scheduler = None
+        if batching.get("enabled", False):
+            self.scheduler = BatchScheduler(
+                self._generate_prompts,
+                max_batch_size=batching.get("max_batch_size", 8),
+                max_wait_ms=batching.get("max_wait_ms", 10),
+                name="FlanT5Scheduler",
+            )
+
+        # generate_stream: end early on a wall-clock budget or a looping n-gram
+        streaming = streaming or {}
+        self.max_seconds = streaming.get("max_seconds")
+        self.repetition_ngram = streaming.get("repetition_ngram", 4)
+        self.repetition_limit = streaming.get("repetition_limit", 3)
+
+    @property
+    def pipe(self):
+        if self._pipe is None:
+            with self._pipe_lock:
+                if self._pipe is None:
+                    from utils.inference import load_text2text_pipeline
+                    self._pipe = load_text2text_pipeline(self.model_name, self.backend, self.onnx_path)
+        return self._pipe
+
+    def load(self) -> None:
+        self.pipe
+
+    def metric_counters(self) -> dict:
+        return {"tokens_generated": self.tokens_generated, "prompt_tokens": self.prompt_tokens}
+
+    def _count_tokens(self, text: str) -> int:
+        """Tokens of `text` for this model (whitespace words if the pipeline has no tokenizer)."""
+        tokenizer = getattr(self.pipe, "tokenizer", None)
+        if tokenizer is None:
+            return len(text.split())
+        return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def _chunk_tokens(self, chunk: str) -> int:
+        """Token count of a retrieved chunk, cached since the same chunks come back often."""
+        key = hashlib.sha1(chunk.encode("utf-8")).digest()
+        with self._token_lock:
+            if key in self._token_counts:
+                self._token_counts.move_to_end(key)
+                return self._token_counts[key]
+        count = self._count_tokens(chunk)
+        with self._token_lock:
+            self._token_counts[key] = count
+            while len(self._token_counts) > self.token_cache_size:
+                self._token_counts.popitem(last=False)
+        return count
+
+    def _pack_contexts(self, contexts: list[str], budget: int) -> tuple[list[str], int]:
+        """
+        Take contexts in ranked order while they fit in `budget` tokens.
+        The first one that does not fit is cut back to the sentences that do,
+        and packing stops there.
+
+        Returns:
+            tuple: (packed contexts, their token count including separators).
+        """
+        packed, used = [], 0
+        separator = self._chunk_tokens(_CONTEXT_SEPARATOR)
+        for chunk in contexts:
+            cost = self._chunk_tokens(chunk) + (separator if packed else 0)
+            if used + cost <= budget:
+                packed.append(chunk)
+                used += cost
+                continue
+            kept = []
+            remaining = budget - used - (separator if packed else 0)
+            for sentence in _SENTENCE_END.split(chunk):
+                tokens = self._count_tokens(sentence)
+                if tokens > remaining:
+                    break
+                kept.append(sentence)
+                remaining -= tokens
+            if kept:
+                packed.append(" ".join(kept))
+                used = budget - remaining
+            break
+        return packed, used
 
     def _build_prompt(self, query: str, contexts: list[str]) -> str:
-        # Use just top 3 contexts to keep prompt tight
-        ctx = "\n\n---\n\n".join(contexts[:2])
+        """
+        Fill the prompt with the best-ranked contexts that fit in
+        `max_input_tokens` together with the instructions and question.
+        Counts are per piece, so they approximate the joint tokenization;
+        the pipeline still truncates anything that overflows.
+        """
+        overhead = self._count_tokens(self._format_prompt(query, "")) + 1  # + end-of-sequence
+        packed, used = self._pack_contexts(contexts, max(0, self.max_input_tokens - overhead))
+        prompt_tokens = overhead + used
+        self.prompt_tokens += prompt_tokens
+        self.last_prompt_tokens = prompt_tokens
+        logger.info("prompt: %d tokens, %d/%d contexts (budget %d)",
+                    prompt_tokens, len(packed), len(contexts), self.max_input_tokens)
+        return self._format_prompt(query, _CONTEXT_SEPARATOR.join(packed))
 
+    def _format_prompt(self, query: str, ctx: str) -> str:
         return (
             "You are a helpful assistant. "
             "Using the context below, select the ones that seem relevant and based on that, answer the question in clear, natural and fluent English, using a short paragraph."
@@ -23,15 +147,101 @@ class FlanT5Generator(BaseGenerator):
             f"Question: {query}\n"
             "Answer in as few sentences as possible. Do not repeat yourself.:"
         )
-        
 
-    def generate(self, query: str, contexts: list[str]) -> str:
-        prompt = self._build_prompt(query, contexts)
-        out = self.pipe(
-            prompt,
+    def _generate_prompts(self, prompts: list[str]) -> list[str]:
+        """Run one padded, batched generation over all prompts."""
+        outs = self.pipe(
+            prompts,
+            batch_size=len(prompts),
             max_new_tokens=self.max_new_tokens,
             do_sample=True,          # sampling instead of greedy
             top_p=0.9,               # nucleus sampling
             repetition_penalty=1.2   # reduce looping
         )
-        return out[0]["generated_text"].strip()
\ No newline at end of file
+        # a list of prompts with one sequence each comes back flattened to a list of dicts
+        answers = [(out[0] if isinstance(out, list) else out)["generated_text"].strip() for out in outs]
+        tokenizer = getattr(self.pipe, "tokenizer", None)
+        if tokenizer is not None:
+            self.tokens_generated += sum(len(ids) for ids in tokenizer(answers)["input_ids"])
+        return answers
+
+    def generate_batch(self, requests: list[tuple[str, list[str]]]) -> list[str]:
+        return self._generate_prompts([self._build_prompt(q, ctx) for q, ctx in requests])
+
+    def _repetition_stopper(self):
+        from transformers import StoppingCriteria
+        ngram, limit = self.repetition_ngram, self.repetition_limit
+
+        class RepetitionStopper(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs):
+                return repeated_ngram(input_ids[0].tolist(), ngram, limit)
+
+        return RepetitionStopper()
+
+    @staticmethod
+    def _event_stopper(stop: threading.Event):
+        from transformers import StoppingCriteria
+
+        class EventStopper(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs):
+                return stop.is_set()
+
+        return EventStopper()
+
+    def generate_stream(self, query: str, contexts: list[str]):
+        """
+        Yield decoded text as the model produces it (TextIteratorStreamer).
+        Generation runs on a background thread and stops at max_new_tokens,
+        after `max_seconds`, or once an n-gram repeats `repetition_limit` times.
+        Closing the generator early (e.g. the client disconnected) stops the
+        thread at its next token instead of letting it run to the end.
+        """
+        from transformers import StoppingCriteriaList, TextIteratorStreamer
+        pipe = self.pipe
+        tokenizer, model = pipe.tokenizer, pipe.model
+        inputs = tokenizer(self._build_prompt(query, contexts), return_tensors="pt", truncation=True)
+        inputs = inputs.to(model.device)
+        streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        stop = threading.Event()
+        kwargs = dict(
+            **inputs,
+            streamer=streamer,
+            max_new_tokens=self.max_new_tokens,
+            do_sample=True,
+            top_p=0.9,
+            repetition_penalty=1.2,
+            stopping_criteria=StoppingCriteriaList([self._repetition_stopper(), self._event_stopper(stop)]),
+        )
+        if self.max_seconds:
+            kwargs["max_time"] = self.max_seconds
+        errors = []
+
+        def run():
+            try:
+                model.generate(**kwargs)
+            except Exception as exc:  # surface in the consuming thread
+                errors.append(exc)
+                streamer.end()
+
+        worker = threading.Thread(target=run, daemon=True)
+        worker.start()
+        pieces = []
+        try:
+            for piece in streamer:
+                if piece:
+                    pieces.append(piece)
+                    yield piece
+        finally:
+            stop.set()
+        worker.join()
+        if errors:
+            raise errors[0]
+        answer = "".join(pieces).strip()
+        self.tokens_generated += len(tokenizer(answer)["input_ids"])
+        self.last_answer = answer
+
+    def generate(self, query: str, contexts: list[str]) -> str:
+        prompt = self._build_prompt(query, contexts)
+        if self.scheduler is not None:
+            return self.scheduler.submit(prompt)
+        return self._generate_prompts([prompt])[0]
\ No newline at end of file
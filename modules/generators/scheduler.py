@@ -0,0 +1,115 @@
+from concurrent.futures import Future
+from typing import Callable, List
+from utils.stats import Histogram
+import queue
+import threading
+import time
+
+
+class BatchScheduler:
+    """
+    Dynamic micro-batching in front of a batch function.
+
+    Concurrent `submit` calls are queued; a background worker collects them
+    until either `max_batch_size` requests are waiting or `max_wait_ms` has
+    passed since the oldest one arrived, runs them through `batch_fn` in one
+    call and hands each caller its own result.
+
+    Batch sizes and queue waits are recorded as histograms so the wait window
+    can be tuned against latency.
+    """
+
+    BATCH_SIZE_BOUNDS = [1, 2, 4, 8, 16, 32, 64]
+    QUEUE_WAIT_MS_BOUNDS = [1, 2, 5, 10, 20, 50, 100, 250, 500, 1000]
+
+    def __init__(self, batch_fn: Callable[[List], List], max_batch_size: int = 8,
+                 max_wait_ms: float = 10.0, name: str = "BatchScheduler"):
+        """
+        Args:
+            batch_fn (callable): Takes a list of requests, returns a list of
+                results in the same order.
+            max_batch_size (int): Upper bound on requests per batch.
+            max_wait_ms (float): How long the oldest request may wait for others.
+            name (str): Name of the worker thread.
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self.batch_sizes = Histogram(self.BATCH_SIZE_BOUNDS)
+        self.queue_wait_ms = Histogram(self.QUEUE_WAIT_MS_BOUNDS)
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, request, timeout: float = None):
+        """
+        Queue a request and block until its result is ready.
+
+        Args:
+            request: One item for `batch_fn`.
+            timeout (float, optional): Seconds to wait before raising
+                concurrent.futures.TimeoutError; None waits indefinitely.
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((request, future, time.perf_counter()))
+        return future.result(timeout=timeout)
+
+    def stats(self) -> dict:
+        return {
+            "batch_size": self.batch_sizes.to_dict(),
+            "queue_wait_ms": self.queue_wait_ms.to_dict(),
+        }
+
+    def close(self) -> None:
+        """Stop the worker after the queued requests are served."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _ensure_worker(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = item[2] + self.max_wait_s
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    nxt = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                batch.append(nxt)
+            self._run_batch(batch)
+            if stop:
+                return
+
+    def _run_batch(self, batch: list) -> None:
+        started = time.perf_counter()
+        self.batch_sizes.observe(len(batch))
+        for _, _, enqueued in batch:
+            self.queue_wait_ms.observe((started - enqueued) * 1000.0)
+        try:
+            results = list(self.batch_fn([request for request, _, _ in batch]))
+            if len(results) != len(batch):
+                raise RuntimeError(f"{self.name}: batch_fn returned {len(results)} results "
+                                   f"for {len(batch)} requests")
+        except Exception as exc:
+            for _, future, _ in batch:
+                future.set_exception(exc)
+            return
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
@@ -1,25 +1,23 @@
 from modules.ingestors.base import BaseIngestor
-from pathlib import Path
 from typing import List
-import re, nltk
+import re
 
 class AdvancedIngestor(BaseIngestor):
     """
     Ingestor that splits text by markdown headings and sentences, then groups into chunks.
     """
 
-    def __init__(self, name: str = None, chunk_size: int = 150, min_size: int = 50):
-        super().__init__(name, chunk_size)
+    def __init__(self, name: str = None, chunk_size: int = 150, min_size: int = 50,
+                 use_cache: bool = True, workers: int = 1, recursive: bool = False,
+                 chunk_store: bool = False, dedup: dict = None):
+        super().__init__(name, chunk_size, use_cache, workers, recursive, chunk_store, dedup)
         self.min_size = min_size
 
-    def _load_docs(self, folder: str) -> List[str]:
-        texts = []
-        files = Path(folder).glob("*.md")
-        for file in files:
-            texts.append(file.read_text(encoding="utf-8"))
-        return texts
+    def chunking_params(self) -> dict:
+        return {**super().chunking_params(), "min_size": self.min_size}
 
     def _chunk_text_advanced(self, text: str) -> List[str]:
+        import nltk  # imported lazily: warm runs reuse cached chunks and never tokenize
         chunks = []
         # Split by markdown headings (keep heading with section)
         sections = re.split(r'(?m)(^#+\s.*)', text)
@@ -56,9 +54,5 @@ class AdvancedIngestor(BaseIngestor):
                     chunks.append(" ".join(current_chunk))
         return chunks
 
-    def ingest(self, folder: str) -> List[str]:
-        docs = self._load_docs(folder)
-        all_chunks = []
-        for doc in docs:
-            all_chunks.extend(self._chunk_text_advanced(doc))
-        return all_chunks
+    def chunk_document(self, text: str) -> List[str]:
+        return self._chunk_text_advanced(text)
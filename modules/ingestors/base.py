@@ -1,27 +1,328 @@
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from modules.baseModule import BaseModule
-from typing import List
+from pathlib import Path
+from typing import Iterator, List
+from utils.chunkstore import ChunkStore, StoredChunks
+from utils.dedup import NearDuplicateFilter
+from utils.fileio import atomic_write
+import hashlib
+import json
+
+
+# Set once per pool worker so the ingestor is pickled per process, not per file
+_worker_ingestor = None
+
+def _init_worker(ingestor) -> None:
+    global _worker_ingestor
+    _worker_ingestor = ingestor
+
+def _read_and_chunk(path: str, known_sha256: str = None, ingestor=None):
+    """
+    Read a file, hash it and chunk it unless the hash matches `known_sha256`.
+    Runs in pool workers (using the worker's ingestor) or inline.
+
+    Returns:
+        tuple: (sha256 hex digest, list of chunks or None if unchanged).
+    """
+    ingestor = ingestor or _worker_ingestor
+    data = Path(path).read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    if digest == known_sha256:
+        return digest, None
+    return digest, ingestor.chunk_document(data.decode("utf-8"))
 
 
 class BaseIngestor(BaseModule, ABC):
     """
     Abstract base class for all Ingestor modules.
     Responsible for reading, cleaning, and chunking documents.
+
+    Ingestion is incremental: a manifest of (path, size, mtime, content hash)
+    for every file is persisted to `data.chunks_cache_path`, and each file's
+    chunks to a blob next to it (`<cache>.d/`, keyed by content hash and
+    chunking parameters). Unchanged files reuse their stored chunks without
+    being read, changed or new files are re-chunked, and deleted files drop out.
+    The manifest only holds file metadata, so streaming a corpus keeps one
+    file's chunks in memory at a time.
+
+    With `workers > 1`, changed files are read and chunked in a process pool;
+    `iter_chunks` yields chunks file by file in sorted path order, so the
+    output is identical to the serial path.
+
+    With `chunk_store: true`, chunk texts live in a memory-mapped ChunkStore
+    (`data.chunk_store_path`), the manifest records chunk ids instead of text,
+    and `ingest` returns a StoredChunks view that decodes text on demand.
+
+    With `dedup: {enabled: true, ...}`, near-duplicate chunks across the
+    whole corpus are dropped after chunking (see utils.dedup): the first copy
+    is kept, `last_chunk_sources` lists the (path, position) locations of every
+    copy of each returned chunk, and `last_ingest_stats["duplicates"]` counts
+    the removed ones. The per-file chunk cache still holds every chunk.
     """
 
-    def __init__(self, name: str = None, chunk_size: int = None):
+    CACHE_VERSION = 2
+
+    def __init__(self, name: str = None, chunk_size: int = None, use_cache: bool = True,
+                 workers: int = 1, recursive: bool = False, chunk_store: bool = False,
+                 dedup: dict = None):
         super().__init__(name)
         self.chunk_size = chunk_size or self.config["retriever"]["chunk_size"]
+        self.use_cache = use_cache
+        self.workers = max(1, int(workers))
+        self.recursive = recursive
+        self.cache_file = Path(self.config["data"]["chunks_cache_path"])
+        self.store = ChunkStore.open(self.config["data"]["chunk_store_path"]) if chunk_store else None
         self.last_chunks: List[str] = []  # store last ingested chunks
+        self.last_ingest_stats: dict = {}
+        # near-duplicate removal: threshold, num_perm, shingle_size (see NearDuplicateFilter)
+        dedup = dedup or {}
+        self.dedup = {k: v for k, v in dedup.items() if k != "enabled"} if dedup.get("enabled", False) else None
+        self.last_chunk_sources = None
+        self.duplicates_removed = 0
+        # cumulative counters reported with run() metrics
+        self.docs_read = 0
+        self.chunks_produced = 0
 
     @abstractmethod
-    def ingest(self, folder: str) -> List[str]:
+    def chunk_document(self, text: str) -> List[str]:
         """
         Abstract method that derived ingestors must implement.
-        Should also update self.last_chunks with the produced chunks.
+        Split the text of a single document into chunks.
         """
         raise NotImplementedError
 
+    def metric_counters(self) -> dict:
+        counters = {"docs_read": self.docs_read, "chunks_produced": self.chunks_produced}
+        if self.dedup is not None:
+            counters["duplicates_removed"] = self.duplicates_removed
+        return counters
+
+    def chunking_params(self) -> dict:
+        """
+        Parameters that affect chunk output. Cached chunks are only reused
+        by an ingestor with the same class and parameters.
+        """
+        return {"chunk_size": self.chunk_size}
+
+    def _cache_key(self, folder: str) -> str:
+        params = ",".join(f"{k}={v}" for k, v in sorted(self.chunking_params().items()))
+        scope = "/**" if self.recursive else ""
+        kind = "+store" if self.store is not None else ""
+        return f"{self.__class__.__name__}({params}){kind}@{Path(folder).as_posix()}{scope}"
+
+    def _list_files(self, folder: str) -> List[Path]:
+        """Markdown files in the folder (recursively if configured), in a deterministic order."""
+        pattern = "**/*.md" if self.recursive else "*.md"
+        return sorted(p for p in Path(folder).glob(pattern) if p.is_file())
+
+    def corpus_version(self, folder: str) -> str:
+        """
+        Cheap fingerprint of what this ingestor would produce for `folder`:
+        the chunking parameters plus (path, size, mtime) of every document.
+        Only stats files, so it can be checked on every query; any edit,
+        addition or deletion of a document changes it.
+        """
+        h = hashlib.sha256(self._cache_key(folder).encode("utf-8"))
+        for path in self._list_files(folder):
+            st = path.stat()
+            h.update(f"\n{path.as_posix()}:{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+        if self.dedup is not None:
+            h.update(f"\ndedup:{sorted(self.dedup.items())}".encode("utf-8"))
+        return h.hexdigest()
+
+    def _load_cache(self) -> dict:
+        """Load the whole chunk cache file; legacy or unreadable files count as empty."""
+        if not self.use_cache or not self.cache_file.exists():
+            return {}
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != self.CACHE_VERSION:
+            return {}
+        return data
+
+    def _save_cache(self, folder: str, manifest: dict) -> None:
+        """
+        Store this ingestor's manifest and write the cache file atomically,
+        then delete chunk blobs no manifest refers to any more.
+        """
+        data = self._load_cache() or {"version": self.CACHE_VERSION, "manifests": {}}
+        data["manifests"][self._cache_key(folder)] = manifest
+        atomic_write(self.cache_file, json.dumps(data, ensure_ascii=False))
+        referenced = {entry["blob"] for m in data["manifests"].values() for entry in m.values() if "blob" in entry}
+        for path in self._blob_dir().glob("*.json"):
+            if path.name not in referenced:
+                path.unlink(missing_ok=True)
+
+    def _blob_dir(self) -> Path:
+        return self.cache_file.with_suffix(".d")
+
+    def _blob_name(self, digest: str) -> str:
+        """Blob file for a document's chunks: content hash + chunking parameters."""
+        params = f"{self.__class__.__name__}({sorted(self.chunking_params().items())})"
+        return f"{digest}-{hashlib.sha1(params.encode('utf-8')).hexdigest()[:12]}.json"
+
+    def __getstate__(self):
+        # pool workers only chunk text; the store stays in the parent process
+        state = self.__dict__.copy()
+        state["store"] = None
+        return state
+
+    def _entry_payload(self, path: Path, digest: str, chunks: List[str]) -> dict:
+        """
+        Manifest payload for freshly chunked text: the chunk count plus their
+        store ids, or the name of the blob the chunks were written to.
+        """
+        if self.store is not None:
+            source = path.as_posix()
+            return {"ids": [self.store.add(text, source, i) for i, text in enumerate(chunks)],
+                    "count": len(chunks)}
+        if not self.use_cache:
+            return {"count": len(chunks)}
+        name = self._blob_name(digest)
+        blob = self._blob_dir() / name
+        if not blob.exists():
+            atomic_write(blob, json.dumps(chunks, ensure_ascii=False))
+        return {"blob": name, "count": len(chunks)}
+
+    def _has_payload(self, entry: dict) -> bool:
+        """Whether a cached entry's chunks can still be read back."""
+        return "ids" in entry or ("blob" in entry and (self._blob_dir() / entry["blob"]).exists())
+
+    def _entry_texts(self, entry: dict, chunks: List[str] = None):
+        if chunks is not None:
+            return chunks
+        if "ids" in entry:
+            return (self.store.get(i) for i in entry["ids"])
+        with open(self._blob_dir() / entry["blob"], "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def iter_chunks(self, folder: str) -> Iterator[str]:
+        """
+        Yield the chunks of all documents in `folder`, file by file in sorted order.
+
+        Files whose size and mtime (or, failing that, content hash) are unchanged
+        reuse their cached chunks without being read. Changed files are chunked
+        in a process pool when `workers > 1`. The manifest is saved once the
+        generator is exhausted. Near-duplicates are skipped when dedup is enabled.
+        """
+        dedup = self._dedup_filter()
+        for path, entry, chunks in self._iter_entries(folder):
+            for position, text in enumerate(self._entry_texts(entry, chunks)):
+                if dedup is None or dedup.add(text, (path.as_posix(), position)):
+                    yield text
+        self._finish_dedup(dedup)
+
+    def _dedup_filter(self):
+        self.last_chunk_sources = None
+        return NearDuplicateFilter(**self.dedup) if self.dedup is not None else None
+
+    def _finish_dedup(self, dedup) -> None:
+        if dedup is None:
+            return
+        self.last_chunk_sources = dedup.sources
+        self.last_ingest_stats["duplicates"] = dedup.removed
+        self.duplicates_removed += dedup.removed
+
+    def _iter_entries(self, folder: str) -> Iterator[tuple]:
+        """
+        Yield (path, manifest entry, chunks) for every file in order (see
+        `iter_chunks`). `chunks` is the freshly chunked text, or None when the
+        entry's stored chunks are reused.
+        """
+        old_manifest = self._load_cache().get("manifests", {}).get(self._cache_key(folder), {})
+        manifest = {}
+        stats = {"files": 0, "reused": 0, "rechunked": 0, "removed": 0}
+
+        # Classify by stat first; only changed files need reading
+        plan = []
+        for path in self._list_files(folder):
+            st = path.stat()
+            entry = old_manifest.get(path.as_posix())
+            if entry and not self._has_payload(entry):
+                entry = None  # blob deleted behind our back
+            unchanged = entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+            plan.append((path, st, entry, unchanged))
+        n_changed = sum(1 for *_, unchanged in plan if not unchanged)
+
+        pool = None
+        if self.workers > 1 and n_changed > 1:
+            pool = ProcessPoolExecutor(max_workers=min(self.workers, n_changed),
+                                       initializer=_init_worker, initargs=(self,))
+        try:
+            # Keep a bounded window of in-flight files so results stream in order
+            window = deque()
+            pending = iter(plan)
+            max_in_flight = self.workers * 4 if pool else 1
+
+            def submit(path: Path, known_sha256: str) -> Future:
+                if pool is not None:
+                    return pool.submit(_read_and_chunk, str(path), known_sha256)
+                future = Future()
+                future.set_result(_read_and_chunk(str(path), known_sha256, ingestor=self))
+                return future
+
+            def fill():
+                while len(window) < max_in_flight:
+                    item = next(pending, None)
+                    if item is None:
+                        return
+                    path, st, entry, unchanged = item
+                    job = None if unchanged else submit(path, entry["sha256"] if entry else None)
+                    window.append((path, st, entry, job))
+
+            fill()
+            while window:
+                path, st, entry, job = window.popleft()
+                chunks = None
+                if job is None:
+                    stats["reused"] += 1
+                else:
+                    digest, chunks = job.result()
+                    self.docs_read += 1
+                    if chunks is None:
+                        # touched but not modified
+                        stats["reused"] += 1
+                        payload = {k: entry[k] for k in ("blob", "ids", "count") if k in entry}
+                    else:
+                        stats["rechunked"] += 1
+                        payload = self._entry_payload(path, digest, chunks)
+                    entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                             "sha256": digest, **payload}
+                fill()
+                manifest[path.as_posix()] = entry
+                stats["files"] += 1
+                self.chunks_produced += entry["count"]
+                yield path, entry, chunks
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        stats["removed"] = len(set(old_manifest) - set(manifest))
+        if self.store is not None:
+            # ids referenced by the manifest must be on disk before it is saved
+            self.store.flush()
+        if self.use_cache and manifest != old_manifest:
+            self._save_cache(folder, manifest)
+        self.last_ingest_stats = stats
+
+    def ingest(self, folder: str) -> List[str]:
+        """
+        Read and chunk all documents in `folder` (see `iter_chunks`).
+        Returns a StoredChunks view instead of a list when the chunk store is enabled.
+        """
+        if self.store is None:
+            return list(self.iter_chunks(folder))
+        dedup = self._dedup_filter()
+        ids = [i for path, entry, _ in self._iter_entries(folder) for position, i in enumerate(entry["ids"])
+               if dedup is None or dedup.add(self.store.get(i), (path.as_posix(), position))]
+        self._finish_dedup(dedup)
+        return StoredChunks(self.store, ids)
+
     def run(self, folder: str, *args, **kwargs) -> List[str]:
         """Implements BaseModule contract by calling ingest()."""
         chunks = self.ingest(folder)
@@ -29,10 +330,11 @@ class BaseIngestor(BaseModule, ABC):
         return chunks
 
     @staticmethod
-    def print_ingest_summary(chunks: List[str]) -> None:
+    def print_ingest_summary(chunks: List[str], stats: dict = None) -> None:
         """
         Print a summary of the ingested chunks for debugging.
-        Shows total chunks, average length, min/max length.
+        Shows total chunks, average length, min/max length, and the
+        near-duplicates removed if `stats` (last_ingest_stats) has them.
         """
         lengths = [len(c.split()) for c in chunks]
         if not lengths:
@@ -41,4 +343,6 @@ class BaseIngestor(BaseModule, ABC):
         print(f"Total chunks: {len(chunks)}")
         print(f"Avg length: {sum(lengths)//len(lengths)} words")
         print(f"Min length: {min(lengths)} words")
-        print(f"Max length: {max(lengths)} words")
\ No newline at end of file
+        print(f"Max length: {max(lengths)} words")
+        if stats and "duplicates" in stats:
+            print(f"Near-duplicates removed: {stats['duplicates']}")
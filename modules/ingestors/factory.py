@@ -1,15 +1,15 @@
-from modules.ingestors.simpleIngestor import SimpleIngestor
-from modules.ingestors.advancedIngestor import AdvancedIngestor
+from utils.imports import import_from_path
 
 
 class IngestorFactory:
     """
     Factory for creating ingestor instances from config dicts.
+    Ingestor classes are registered by import path and imported on first use.
     """
 
     _registry = {
-        "simple": SimpleIngestor,
-        "advanced": AdvancedIngestor,
+        "simple": "modules.ingestors.simpleIngestor:SimpleIngestor",
+        "advanced": "modules.ingestors.advancedIngestor:AdvancedIngestor",
     }
 
     @staticmethod
@@ -26,5 +26,5 @@ class IngestorFactory:
         ingestor_type = config.get("type")
         if ingestor_type not in IngestorFactory._registry:
             raise ValueError(f"Unknown ingestor type: {ingestor_type}")
-        cls = IngestorFactory._registry[ingestor_type]
-        return cls(**{k: v for k, v in config.items() if k != "type"})
\ No newline at end of file
+        cls = import_from_path(IngestorFactory._registry[ingestor_type])
+        return cls(**{k: v for k, v in config.items() if k != "type"})
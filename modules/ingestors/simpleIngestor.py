@@ -1,5 +1,4 @@
 from modules.ingestors.base import BaseIngestor
-from pathlib import Path
 from typing import List
 
 class SimpleIngestor(BaseIngestor):
@@ -7,13 +6,6 @@ class SimpleIngestor(BaseIngestor):
     Ingestor that splits documents into simple fixed-size word chunks.
     """
 
-    def _load_docs(self, folder: str) -> List[str]:
-        texts = []
-        files = Path(folder).glob("*.md")
-        for file in files:
-            texts.append(file.read_text(encoding="utf-8"))
-        return texts
-
     def _chunk_text(self, text: str) -> List[str]:
         chunks = []
         blocks = text.split()
@@ -22,9 +14,5 @@ class SimpleIngestor(BaseIngestor):
             chunks.append(" ".join(words))
         return chunks
 
-    def ingest(self, folder: str) -> List[str]:
-        docs = self._load_docs(folder)
-        all_chunks = []
-        for doc in docs:
-            all_chunks.extend(self._chunk_text(doc))
-        return all_chunks
+    def chunk_document(self, text: str) -> List[str]:
+        return self._chunk_text(text)
@@ -3,10 +3,11 @@ from modules.pipelines.generic import GenericPipeline
 class PipelineFactory:
 
     @staticmethod
-    def create(config: dict, pipeline_name: str):
+    def create(config: dict, pipeline_name: str, shared_modules: dict = None):
         pipelines_cfg = config.get("pipelines", {})
         if pipeline_name not in pipelines_cfg:
             raise ValueError(f"Pipeline '{pipeline_name}' not found in config")
         
         pipeline_cfg = pipelines_cfg[pipeline_name]
-        return GenericPipeline(config, pipeline_cfg)
\ No newline at end of file
+        return GenericPipeline(config, pipeline_cfg, shared_modules=shared_modules,
+                               pipeline_name=pipeline_name)
@@ -5,44 +5,394 @@ from modules.generators.base import BaseGenerator
 from modules.ingestors.factory import IngestorFactory
 from modules.retrievers.factory import RetrieverFactory
 from modules.generators.factory import GeneratorFactory
+from modules.caches.resultCache import ResultCache
+from modules.caches.semanticCache import SemanticCache
+from utils.metrics import metrics
+import hashlib
+import json
+import time
 
 
 # ... imports remain
 
 class GenericPipeline(BasePipeline):
-    def __init__(self, global_config: dict, pipeline_config: dict):
+    def __init__(self, global_config: dict, pipeline_config: dict, shared_modules: dict = None,
+                 pipeline_name: str = None):
+        """
+        Build the modules listed in the pipeline sequence.
+
+        Args:
+            global_config (dict): Full config (as loaded from config.yaml).
+            pipeline_config (dict): The pipeline entry, with its "sequence".
+            shared_modules (dict, optional): Step -> module instances reused across
+                pipelines (e.g. by a long-running service), so that models and
+                caches are loaded once. New modules are added to it.
+            pipeline_name (str, optional): Name of the pipeline entry; part of result cache keys.
+
+        With `streaming: true` in the pipeline config, the ingestor yields chunks
+        and the retriever consumes them in batches of `batch_size`, so only the
+        top-k results are kept instead of the whole corpus.
+
+        With `cache.result.enabled`, `execute` returns stored results for a
+        repeated query (see `_result_cache_key`). With `cache.semantic.enabled`,
+        pipelines that generate answers also reuse the answer and contexts of a
+        previous query with a similar embedding. Set `result_cache: false` or
+        `semantic_cache: false` on a pipeline to opt out.
+        """
         super().__init__(name="GenericPipeline")
         self.global_config = global_config
         self.sequence = pipeline_config.get("sequence", [])
+        self.streaming = pipeline_config.get("streaming", False)
+        self.batch_size = pipeline_config.get("batch_size", 256)
         self.modules = []
         self.last_chunks = None
         self.last_retrieval = None
+        self.last_cached = False
+        self.pipeline_name = pipeline_name or "+".join(self.sequence)
+        self._corpus_memo = (None, None)
 
+        corpus = self._corpus_key(self.sequence, global_config)
         for step in self.sequence:
-            module_type, variant = step.split(":")
-            module_cfg = global_config["modules"][module_type][variant]
-            if module_type == "ingestor":
-                self.modules.append(IngestorFactory.create({"type": variant, **module_cfg}))
-            elif module_type == "retriever":
-                self.modules.append(RetrieverFactory.create({"type": variant, **module_cfg}))
-            elif module_type == "generator":
-                self.modules.append(GeneratorFactory.create({"type": variant, **module_cfg}))
-            else:
-                raise ValueError(f"Unsupported module type: {module_type}")
+            self.modules.append(self._create_module(step, global_config, shared_modules, corpus))
 
-    def run(self, query: str, folder: str):
+        caches_cfg = global_config.get("cache", {})
+        self.result_cache = None
+        if pipeline_config.get("result_cache", True):
+            self.result_cache = self._build_cache("result", ResultCache, caches_cfg, shared_modules)
+        # the semantic cache only pays off when it can skip generation
+        self.semantic_cache = None
+        if pipeline_config.get("semantic_cache", True) and any(isinstance(m, BaseGenerator) for m in self.modules):
+            self.semantic_cache = self._build_cache("semantic", SemanticCache, caches_cfg, shared_modules)
+
+    @staticmethod
+    def _corpus_key(sequence: list, global_config: dict):
+        """
+        Identity of the chunks this pipeline's retrievers index: its ingestor
+        steps with their settings, plus the docs folder. None without ingestors.
+        """
+        ingestors = [step for step in sequence if step.split(":")[0] == "ingestor"]
+        if not ingestors:
+            return None
+        settings = {step: global_config["modules"]["ingestor"][step.split(":")[1]] for step in ingestors}
+        return json.dumps([settings, global_config["data"]["docs_path"]], sort_keys=True)
+
+    @classmethod
+    def _per_corpus(cls, variant: str) -> bool:
+        """Whether a retriever type, or one of its branches, keeps a per-corpus index."""
+        return RetrieverFactory.takes_corpus(variant) or any(
+            cls._per_corpus(name) for name in RetrieverFactory.branch_names(variant))
+
+    @classmethod
+    def _create_module(cls, step: str, global_config: dict, shared_modules: dict = None,
+                       corpus: str = None):
+        """
+        Create the module for a "type:variant" step, or reuse it from shared_modules.
+        Composite retrievers (hybrid, cascade) get their branches as the
+        `retriever:<branch>` steps, shared the same way.
+
+        Retrievers with a per-corpus index (or such branches) get the `corpus`
+        key and are shared as "<step>@<corpus>", so pipelines over different
+        corpora do not share one index.
+        """
+        module_type, variant = step.split(":")
+        key = step
+        if module_type == "retriever" and corpus is not None and cls._per_corpus(variant):
+            key = f"{step}@{corpus}"
+        if shared_modules is not None and key in shared_modules:
+            return shared_modules[key]
+        module_cfg = global_config["modules"][module_type][variant]
+        if module_type == "ingestor":
+            module = IngestorFactory.create({"type": variant, **module_cfg})
+        elif module_type == "retriever":
+            retriever_cfg = {"type": variant, **module_cfg}
+            branches = {name: cls._create_module(f"retriever:{name}", global_config, shared_modules, corpus)
+                        for name in RetrieverFactory.branch_names(variant)}
+            if branches:
+                retriever_cfg["branches"] = branches
+            if corpus is not None and RetrieverFactory.takes_corpus(variant):
+                retriever_cfg["corpus"] = corpus
+            module = RetrieverFactory.create(retriever_cfg)
+        elif module_type == "generator":
+            module = GeneratorFactory.create({"type": variant, **module_cfg})
+        else:
+            raise ValueError(f"Unsupported module type: {module_type}")
+        if shared_modules is not None:
+            shared_modules[key] = module
+        return module
+
+    @staticmethod
+    def _build_cache(kind: str, cls, caches_cfg: dict, shared_modules: dict = None):
+        """Create (or reuse from shared_modules) the cache configured under cache.<kind>, if enabled."""
+        cfg = caches_cfg.get(kind, {})
+        if not cfg.get("enabled", False):
+            return None
+        step = f"cache:{kind}"
+        if shared_modules is not None and step in shared_modules:
+            return shared_modules[step]
+        cache = cls(**{k: v for k, v in cfg.items() if k != "enabled"})
+        if shared_modules is not None:
+            shared_modules[step] = cache
+        return cache
+
+    @property
+    def metrics_stage(self) -> str:
+        return f"pipeline:{self.pipeline_name}"
+
+    def metric_counters(self) -> dict:
+        counters = {}
+        if self.result_cache is not None:
+            counters["result_cache_hits"] = self.result_cache.hits
+        if self.semantic_cache is not None:
+            counters["semantic_cache_hits"] = self.semantic_cache.hits
+        return counters
+
+    def ingest(self, folder: str):
+        """Run only the ingestor steps and return the resulting chunks."""
         data = folder
         for module in self.modules:
             if isinstance(module, BaseIngestor):
                 data = module.run(data)
-                self.last_chunks = data
+        return data
+
+    def prepare(self, chunks: list) -> None:
+        """Warm retriever indexes and load generator models ahead of the first query."""
+        for module in self.modules:
+            if isinstance(module, BaseRetriever):
+                module.prepare(chunks)
+            elif isinstance(module, BaseGenerator):
+                module.load()
+
+    def corpus_version(self, folder: str = None, chunks: list = None) -> str:
+        """
+        Version of the corpus a query runs against: the ingestor's fingerprint
+        of `folder`, or a hash of pre-ingested `chunks` (remembered for the
+        last chunk list seen, so repeated queries do not re-hash it).
+        """
+        if chunks is None:
+            for module in self.modules:
+                if isinstance(module, BaseIngestor):
+                    return module.corpus_version(folder)
+            return "none"
+        memo_chunks, version = self._corpus_memo
+        if memo_chunks is chunks:
+            return version
+        keys = chunks.keys() if hasattr(chunks, "keys") else chunks
+        h = hashlib.sha256()
+        for key in keys:
+            h.update(key.encode("utf-8"))
+            h.update(b"\0")
+        version = h.hexdigest()
+        self._corpus_memo = (chunks, version)
+        return version
+
+    def _result_cache_key(self, query: str, corpus_version: str) -> str:
+        """Key on the normalized query, pipeline name, module configs and corpus version."""
+        module_configs = {}
+        for step in self.sequence:
+            module_type, variant = step.split(":")
+            module_configs[step] = self.global_config["modules"][module_type][variant]
+        return ResultCache.make_key(query, self.pipeline_name, module_configs, corpus_version)
+
+    def execute(self, query: str, folder: str = None, chunks: list = None) -> dict:
+        """
+        Run the pipeline and return every intermediate result.
+        Unlike `run`, this does not depend on instance state, so it is safe
+        to call from several threads at once.
+
+        Args:
+            query (str): The query string.
+            folder (str, optional): Docs folder for the ingestor steps.
+            chunks (list, optional): Pre-ingested chunks; ingestor steps are skipped.
+
+        Returns:
+            dict: {"chunks", "retrieval", "answer", "result", "cached"} where
+            "result" is the output of the last step and "cached" is False,
+            "result" or "semantic" depending on which cache answered. In
+            streaming mode, and on a cache hit without pre-ingested chunks,
+            "chunks" is None.
+        """
+        cached, cache_ctx = self._lookup_caches(query, folder, chunks)
+        if cached is not None:
+            return cached
+        state = self._run_steps(query, folder, chunks)
+        self._remember(cache_ctx, state)
+        return state
+
+    def _lookup_caches(self, query: str, folder: str = None, chunks: list = None):
+        """
+        Check the result and semantic caches.
+
+        Returns:
+            tuple: (cached state or None, context to pass to `_remember` after a miss).
+        """
+        ctx = {"key": None, "vector": None, "corpus_version": None}
+        if self.result_cache is None and self.semantic_cache is None:
+            return None, ctx
+        ctx["corpus_version"] = self.corpus_version(folder, chunks)
+        if self.result_cache is not None:
+            ctx["key"] = self._result_cache_key(query, ctx["corpus_version"])
+            cached = self.result_cache.get(ctx["key"])
+            if cached is not None:
+                return {"chunks": chunks, **cached, "cached": "result"}, ctx
+        if self.semantic_cache is not None:
+            cached, ctx["vector"] = self.semantic_cache.lookup(query, self.pipeline_name, ctx["corpus_version"])
+            if cached is not None:
+                return {"chunks": chunks, **cached, "cached": "semantic"}, ctx
+        return None, ctx
+
+    def _remember(self, ctx: dict, state: dict) -> None:
+        stored = {k: state[k] for k in ("retrieval", "answer", "result")}
+        if ctx["key"] is not None:
+            self.result_cache.set(ctx["key"], stored)
+        if ctx["vector"] is not None:
+            self.semantic_cache.store(ctx["vector"], stored, self.pipeline_name, ctx["corpus_version"])
+
+    def _run_steps(self, query: str, folder: str = None, chunks: list = None,
+                   skip_generator: bool = False) -> dict:
+        """Run the module sequence for one query (see `execute`)."""
+        state = {"chunks": chunks, "retrieval": None, "answer": None, "cached": False}
+        data = folder if chunks is None else chunks
+        streamed = ingested = False
+        for module in self.modules:
+            if isinstance(module, BaseIngestor):
+                if chunks is not None:
+                    continue
+                if self.streaming:
+                    data = module.iter_chunks(data)
+                    streamed = True
+                else:
+                    data = module.run(data)
+                    state["chunks"] = data
+                    ingested = True
             elif isinstance(module, BaseRetriever):
-                data = module.run(query, data)
-                self.last_retrieval = data
+                if streamed:
+                    # ingestion runs lazily inside the stream, so both are timed together
+                    with metrics.timer(f"{module.metrics_stage}+stream") as items:
+                        data = module.retrieve_stream(query, data, batch_size=self.batch_size)
+                        items["items_out"] = len(data)
+                    module.last_results = data
+                    streamed = False
+                else:
+                    if ingested:
+                        # the pipeline's own ingest is its corpus: let retrievers update their saved indexes
+                        module.prepare(data)
+                    data = module.run(query, data)
+                state["retrieval"] = data
             elif isinstance(module, BaseGenerator):
+                if skip_generator:
+                    continue
                 # pass only the texts from retrieval
-                contexts = [chunk for chunk, _ in (self.last_retrieval or [])]
+                contexts = [chunk for chunk, _ in (state["retrieval"] or [])]
                 data = module.run(query, contexts)
+                state["answer"] = data
             else:
                 raise ValueError(f"Unsupported module in sequence: {module}")
-        return data
\ No newline at end of file
+        state["result"] = data
+        return state
+
+    def stream(self, query: str, folder: str = None, chunks: list = None):
+        """
+        Like `execute`, but yield events as the answer is produced:
+
+            {"event": "retrieval", "results": [(text, score), ...]}
+            {"event": "token", "text": "..."}            (repeated)
+            {"event": "done", "answer", "cached", "first_token_ms", "total_ms"}
+
+        The generator step must be last; earlier steps run as in `execute`.
+        Cache hits yield the stored answer as a single token.
+        """
+        t0 = time.perf_counter()
+        cached, cache_ctx = self._lookup_caches(query, folder, chunks)
+        state = cached or self._run_steps(query, folder, chunks, skip_generator=True)
+        yield {"event": "retrieval", "results": state["retrieval"] or []}
+
+        generator = next((m for m in self.modules if isinstance(m, BaseGenerator)), None)
+        first_token_ms = None
+        if cached is not None:
+            if state["answer"] is not None:
+                first_token_ms = (time.perf_counter() - t0) * 1000
+                yield {"event": "token", "text": state["answer"]}
+        else:
+            if generator is not None:
+                contexts = [chunk for chunk, _ in (state["retrieval"] or [])]
+                pieces = []
+                with metrics.timer(f"{generator.metrics_stage}+stream") as items:
+                    for piece in generator.generate_stream(query, contexts):
+                        if first_token_ms is None:
+                            first_token_ms = (time.perf_counter() - t0) * 1000
+                        pieces.append(piece)
+                        yield {"event": "token", "text": piece}
+                    items["pieces"] = len(pieces)
+                state["answer"] = state["result"] = "".join(pieces).strip()
+            self._remember(cache_ctx, state)
+        yield {"event": "done", "answer": state["answer"], "cached": state["cached"],
+               "first_token_ms": first_token_ms, "total_ms": (time.perf_counter() - t0) * 1000}
+
+    def prepare_queries(self, queries: list) -> None:
+        """Let retrievers encode a batch of upcoming queries together."""
+        for module in self.modules:
+            if isinstance(module, BaseRetriever):
+                module.prepare_queries(queries)
+
+    def execute_batch(self, queries: list, chunks: list) -> list:
+        """
+        Run many queries against pre-ingested chunks.
+
+        Query embeddings are computed in one batch (`prepare_queries`) and,
+        when the generator is the last step, all answers are produced with a
+        single `generate_batch` call. Cached queries skip both.
+
+        Returns:
+            list[dict]: One `execute` state per query, in order, each with a
+            "timings" dict: retrieval_ms, generation_ms (the query's share of
+            the batched generation) and total_ms.
+        """
+        generators = [i for i, m in enumerate(self.modules) if isinstance(m, BaseGenerator)]
+        if generators and generators != [len(self.modules) - 1]:
+            # generation is not a final single step; nothing to batch
+            states = []
+            for query in queries:
+                t0 = time.perf_counter()
+                state = self.execute(query, chunks=chunks)
+                state["timings"] = {"total_ms": (time.perf_counter() - t0) * 1000}
+                states.append(state)
+            return states
+
+        states, misses = [None] * len(queries), []
+        t0 = time.perf_counter()
+        lookups = [self._lookup_caches(query, None, chunks) for query in queries]
+        lookup_ms = (time.perf_counter() - t0) * 1000 / max(1, len(queries))
+        self.prepare_queries([q for q, (cached, _) in zip(queries, lookups) if cached is None])
+        for i, (query, (cached, ctx)) in enumerate(zip(queries, lookups)):
+            if cached is not None:
+                states[i] = {**cached, "timings": {"total_ms": lookup_ms}}
+                continue
+            t0 = time.perf_counter()
+            state = self._run_steps(query, chunks=chunks, skip_generator=True)
+            state["timings"] = {"retrieval_ms": (time.perf_counter() - t0) * 1000}
+            states[i] = state
+            misses.append((i, ctx))
+
+        if generators and misses:
+            generator = self.modules[generators[0]]
+            requests = [(queries[i], [chunk for chunk, _ in (states[i]["retrieval"] or [])]) for i, _ in misses]
+            t0 = time.perf_counter()
+            with metrics.timer(f"{generator.metrics_stage}+batch", {"items_out": len(requests)}):
+                answers = generator.generate_batch(requests)
+            share_ms = (time.perf_counter() - t0) * 1000 / len(requests)
+            for (i, _), answer in zip(misses, answers):
+                states[i]["answer"] = states[i]["result"] = answer
+                states[i]["timings"]["generation_ms"] = share_ms
+
+        for i, ctx in misses:
+            timings = states[i]["timings"]
+            timings["total_ms"] = lookup_ms + timings["retrieval_ms"] + timings.get("generation_ms", 0.0)
+            self._remember(ctx, states[i])
+        return states
+
+    def run(self, query: str, folder: str):
+        state = self.execute(query, folder)
+        self.last_chunks = state["chunks"]
+        self.last_retrieval = state["retrieval"]
+        self.last_cached = state["cached"]
+        return state["result"]
@@ -0,0 +1,190 @@
+from pathlib import Path
+from utils.fileio import atomic_write
+from utils.vectors import normalize, top_k_indices
+import io
+import numpy as np
+
+
+class IVFIndex:
+    """
+    Inverted-file (IVF) approximate nearest-neighbour index for cosine similarity.
+
+    Vectors are L2-normalized and partitioned into `nlist` cells by spherical
+    k-means (NumPy only). A query scores the centroids, then only the vectors
+    in the `nprobe` closest cells. Higher `nprobe` means better recall and
+    slower queries; `nprobe == nlist` is exact search.
+
+    Vectors can be added after training (assigned to their nearest centroid)
+    and removed by id (tombstoned until the next rebuild).
+
+    The cells hold ids only. The vectors stay with the caller (e.g. the
+    retriever's scoring matrix) and are looked up by id at search time, so
+    the index does not keep a second float32 copy of the corpus.
+    """
+
+    VERSION = 2
+
+    def __init__(self, nlist: int = 64, nprobe: int = 8, kmeans_iters: int = 20, seed: int = 0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.kmeans_iters = kmeans_iters
+        self.seed = seed
+        self.centroids = None                  # (nlist, dim) float32, normalized
+        self._list_ids: list = []              # per cell: int64 ids
+        self.deleted: set = set()
+        self.trained_size = 0
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def dim(self) -> int:
+        return self.centroids.shape[1] if self.is_trained else 0
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self._list_ids) - len(self.deleted)
+
+    def _assign(self, vectors: np.ndarray, batch: int = 4096) -> np.ndarray:
+        """Nearest centroid (max dot product) for each row, computed in blocks."""
+        out = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), batch):
+            out[start:start + batch] = np.argmax(vectors[start:start + batch] @ self.centroids.T, axis=1)
+        return out
+
+    def train(self, vectors: np.ndarray) -> None:
+        """Learn `nlist` centroids with spherical k-means and empty all cells."""
+        vectors = normalize(vectors)
+        rng = np.random.default_rng(self.seed)
+        nlist = max(1, min(self.nlist, len(vectors)))
+        self.centroids = vectors[rng.choice(len(vectors), size=nlist, replace=False)].copy()
+        for _ in range(self.kmeans_iters):
+            assign = self._assign(vectors)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assign, vectors)
+            counts = np.bincount(assign, minlength=nlist)
+            empty = counts == 0
+            if empty.any():
+                # re-seed empty cells with random points
+                sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()))]
+            self.centroids = normalize(sums)
+        self._list_ids = [np.empty(0, dtype=np.int64) for _ in range(nlist)]
+        self.deleted = set()
+        self.trained_size = len(vectors)
+
+    def add(self, vectors: np.ndarray, ids) -> None:
+        """Assign integer ids to the cells nearest their vectors (the vectors are not kept)."""
+        if not self.is_trained:
+            raise RuntimeError("IVFIndex.add() called before train()")
+        if len(ids) == 0:
+            return
+        vectors = normalize(vectors)
+        ids = np.asarray(ids, dtype=np.int64)
+        self.deleted.difference_update(ids.tolist())
+        assign = self._assign(vectors)
+        for cell in np.unique(assign):
+            mask = assign == cell
+            self._list_ids[cell] = np.concatenate([self._list_ids[cell], ids[mask]])
+
+    def remove(self, ids) -> None:
+        """Tombstone ids; they are skipped at search time."""
+        self.deleted.update(int(i) for i in ids)
+
+    def search(self, query_vec: np.ndarray, k: int, vectors, nprobe: int = None):
+        """
+        Approximate top-k by cosine similarity.
+
+        Args:
+            query_vec (np.ndarray): The query embedding.
+            k (int): Number of results.
+            vectors (callable): Maps an int64 id array to the normalized
+                (n, dim) vectors of those ids.
+            nprobe (int, optional): Override the index's nprobe.
+
+        Returns:
+            list[tuple[int, float]]: (id, score) pairs, best first.
+        """
+        if not self.is_trained or k <= 0:
+            return []
+        query_vec = normalize(query_vec)
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        cells = top_k_indices(self.centroids @ query_vec, nprobe)
+        ids = np.concatenate([self._list_ids[c] for c in cells])
+        if self.deleted:
+            ids = ids[~np.isin(ids, np.fromiter(self.deleted, dtype=np.int64))]
+        if len(ids) == 0:
+            return []
+        scores = vectors(ids) @ query_vec
+        return [(int(ids[i]), float(scores[i])) for i in top_k_indices(scores, k)]
+
+    def save(self, path, extra: dict = None) -> None:
+        """Save to an .npz file; `extra` arrays (e.g. id -> key maps) are stored alongside."""
+        arrays = {
+            "version": np.array(self.VERSION),
+            "params": np.array([self.nlist, self.nprobe, self.kmeans_iters, self.seed, self.trained_size]),
+            "centroids": self.centroids,
+            "list_sizes": np.array([len(ids) for ids in self._list_ids], dtype=np.int64),
+            "ids": np.concatenate(self._list_ids),
+            "deleted": np.fromiter(self.deleted, dtype=np.int64),
+        }
+        for key, value in (extra or {}).items():
+            arrays[f"extra_{key}"] = value
+        buf = io.BytesIO()
+        np.savez(buf, **arrays)
+        atomic_write(path, buf.getvalue())
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an index saved with `save`.
+
+        Returns:
+            tuple: (IVFIndex, extra dict), or (None, {}) if missing or incompatible.
+        """
+        path = Path(path)
+        if not path.exists():
+            return None, {}
+        try:
+            data = np.load(path, allow_pickle=False)
+        except (OSError, ValueError):
+            return None, {}
+        if int(data["version"]) != cls.VERSION:
+            return None, {}
+        nlist, nprobe, iters, seed, trained_size = (int(x) for x in data["params"])
+        index = cls(nlist=nlist, nprobe=nprobe, kmeans_iters=iters, seed=seed)
+        index.centroids = data["centroids"]
+        index.trained_size = trained_size
+        bounds = np.concatenate([[0], np.cumsum(data["list_sizes"])])
+        ids = data["ids"]
+        index._list_ids = [ids[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+        index.deleted = set(data["deleted"].tolist())
+        extra = {key[len("extra_"):]: data[key] for key in data.files if key.startswith("extra_")}
+        return index, extra
+
+
+def recall_against_exact(index: IVFIndex, vectors: np.ndarray, ids, queries: np.ndarray,
+                         k: int = 10, nprobe: int = None) -> float:
+    """
+    Mean recall@k of the ANN index versus exact cosine search over `vectors`.
+
+    Args:
+        index (IVFIndex): Index holding `vectors` under `ids`.
+        vectors (np.ndarray): The indexed vectors (same order as `ids`).
+        ids (sequence[int]): Id of each row of `vectors`.
+        queries (np.ndarray): Query vectors, one per row.
+        k (int): Cut-off for recall.
+        nprobe (int, optional): Override the index's nprobe.
+
+    Returns:
+        float: Fraction of exact top-k neighbours found by the index.
+    """
+    vectors = normalize(vectors)
+    ids = np.asarray(ids)
+    row_of = np.zeros(int(ids.max()) + 1 if len(ids) else 0, dtype=np.int64)
+    row_of[ids] = np.arange(len(ids))
+    hits = 0
+    for query in normalize(queries):
+        exact = set(ids[top_k_indices(vectors @ query, k)].tolist())
+        approx = {i for i, _ in index.search(query, k, lambda found: vectors[row_of[found]], nprobe=nprobe)}
+        hits += len(exact & approx)
+    return hits / (len(queries) * min(k, len(ids)))
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from itertools import islice
 from modules.baseModule import BaseModule
 
 class BaseRetriever(BaseModule, ABC):
@@ -35,6 +36,51 @@ class BaseRetriever(BaseModule, ABC):
         """
         raise NotImplementedError("Derived classes must implement `retrieve` method.")
 
+    @staticmethod
+    def iter_batches(items, batch_size: int):
+        """Yield lists of up to `batch_size` items from any iterable."""
+        iterator = iter(items)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def retrieve_stream(self, query: str, chunk_iter, batch_size: int = 256, top_k: int = None):
+        """
+        Retrieve from a stream of chunks instead of a materialized list.
+
+        Retrievers whose scores are independent of the rest of the corpus
+        (e.g. cosine similarity) override this to score batch by batch with a
+        running top-k. The default gathers the stream first, because scores
+        such as BM25 depend on corpus-wide statistics.
+
+        Args:
+            query (str): The query string.
+            chunk_iter (iterable): Chunks of text, e.g. from BaseIngestor.iter_chunks.
+            batch_size (int): Chunks processed per batch.
+            top_k (int, optional): Override the default number of results.
+
+        Returns:
+            list: Top-k results ranked according to the retrieval logic.
+        """
+        return self.retrieve(query, list(chunk_iter), top_k=top_k or self.top_k)
+
+    def prepare(self, chunks: list) -> None:
+        """
+        Optional hook to build any per-corpus index ahead of the first query.
+        The default retriever has nothing to prepare.
+        """
+        return None
+
+    def prepare_queries(self, queries: list) -> None:
+        """
+        Optional hook called with a batch of upcoming queries, so retrievers
+        can encode them together instead of one model call per query.
+        The default retriever has nothing to precompute.
+        """
+        return None
+
     def run(self, query: str, chunks: list, *args, **kwargs):
         """
         Implements the BaseModule contract. 
@@ -0,0 +1,101 @@
+from modules.retrievers.base import BaseRetriever
+from modules.retrievers.hybridRetriever import build_branches
+from utils.metrics import metrics
+import time
+
+
+class CascadeRetriever(BaseRetriever):
+    """
+    Two-stage retriever: BM25 narrows the corpus to `candidate_k` chunks, then
+    only those candidates are embedded and ranked by cosine similarity.
+
+    Embeddings are computed (and cached) for candidates as they come up, so a
+    corpus never has to be embedded in full. When the lexical stage matches
+    fewer than `min_candidates` chunks (e.g. a query worded differently from
+    the docs), the query falls back to full semantic search.
+
+    Each stage is recorded in utils.metrics as `CascadeRetriever+lexical`,
+    `+semantic` or `+fallback` with its candidate counts; `last_stats` holds
+    the counts and timings of the latest query.
+
+    Like HybridRetriever, it uses the branch retrievers it is given (a
+    pipeline's shared `retriever:keyword` / `retriever:semantic`), else builds
+    them from config.
+    """
+
+    BRANCHES = ("keyword", "semantic")
+
+    def __init__(self, top_k: int = 3, candidate_k: int = 100, min_candidates: int = None,
+                 branches: dict = None):
+        """
+        Initialize CascadeRetriever.
+
+        Args:
+            top_k (int): Number of top results to return by default.
+            candidate_k (int): Chunks kept by the lexical stage for semantic scoring.
+            min_candidates (int, optional): Fewer lexical matches than this
+                trigger full semantic search (default: top_k).
+            branches (dict, optional): Branch name -> retriever instance to use.
+        """
+        super().__init__(name="CascadeRetriever", top_k=top_k)
+        self.candidate_k = candidate_k
+        self.min_candidates = min_candidates
+
+        self.branches = build_branches(self.config, branches)
+        self.last_stats = {}
+        # cumulative counters reported with run() metrics
+        self.candidates_scored = 0
+        self.fallbacks = 0
+
+    def metric_counters(self) -> dict:
+        return {"candidates_scored": self.candidates_scored, "fallbacks": self.fallbacks}
+
+    def prepare(self, chunks: list) -> None:
+        """Build the keyword index; embeddings are left to the candidates (or a fallback)."""
+        self.branches["keyword"].prepare(chunks)
+
+    def prepare_queries(self, queries: list) -> None:
+        self.branches["semantic"].prepare_queries(queries)
+
+    def retrieve(self, query: str, chunks: list, *args, **kwargs):
+        """
+        Retrieve top-k chunks by semantic similarity among the BM25 candidates.
+
+        Args:
+            query (str): The query string.
+            chunks (list): Candidate chunks of text.
+            top_k (int, optional): Override the default number of results.
+
+        Returns:
+            list[tuple[str, float]]: Top-k (chunk, cosine score) pairs.
+        """
+        top_k = kwargs.get("top_k", self.top_k)
+        candidate_k = max(self.candidate_k, top_k)
+        min_candidates = self.min_candidates if self.min_candidates is not None else top_k
+        stage = self.metrics_stage
+
+        t0 = time.perf_counter()
+        with metrics.timer(f"{stage}+lexical") as items:
+            lexical = self.branches["keyword"].retrieve(query, chunks, top_k=candidate_k)
+            items["candidates"] = len(lexical)
+        t1 = time.perf_counter()
+
+        semantic = self.branches["semantic"]
+        if len(lexical) < min_candidates:
+            self.fallbacks += 1
+            with metrics.timer(f"{stage}+fallback", {"chunks": len(chunks)}):
+                results = semantic.retrieve(query, chunks, top_k=top_k)
+        else:
+            self.candidates_scored += len(lexical)
+            with metrics.timer(f"{stage}+semantic", {"candidates": len(lexical)}):
+                results = semantic.rerank(query, [chunk for chunk, _ in lexical], top_k=top_k)
+        t2 = time.perf_counter()
+
+        self.last_stats = {
+            "chunks": len(chunks),
+            "lexical_candidates": len(lexical),
+            "fallback": len(lexical) < min_candidates,
+            "lexical_ms": (t1 - t0) * 1000,
+            "semantic_ms": (t2 - t1) * 1000,
+        }
+        return results
@@ -1,16 +1,32 @@
-from modules.retrievers.semanticRetriever import SemanticRetriever
-from modules.retrievers.keywordRetriever import KeywordRetriever
+from utils.imports import import_from_path
 
 class RetrieverFactory:
+    # Classes are registered by import path and imported on first use
     _registry = {
-        "semantic": SemanticRetriever,
-        "keyword": KeywordRetriever,
+        "semantic": "modules.retrievers.semanticRetriever:SemanticRetriever",
+        "keyword": "modules.retrievers.keywordRetriever:KeywordRetriever",
+        "hybrid": "modules.retrievers.hybridRetriever:HybridRetriever",
+        "cascade": "modules.retrievers.cascadeRetriever:CascadeRetriever",
     }
 
+    @staticmethod
+    def branch_names(retriever_type: str) -> tuple:
+        """Names of the branch retrievers a composite type takes (empty for plain ones)."""
+        if retriever_type not in RetrieverFactory._registry:
+            raise ValueError(f"Unknown retriever type: {retriever_type}")
+        return getattr(import_from_path(RetrieverFactory._registry[retriever_type]), "BRANCHES", ())
+
+    @staticmethod
+    def takes_corpus(retriever_type: str) -> bool:
+        """Whether a retriever type keeps a per-corpus index and takes a `corpus` key."""
+        if retriever_type not in RetrieverFactory._registry:
+            raise ValueError(f"Unknown retriever type: {retriever_type}")
+        return getattr(import_from_path(RetrieverFactory._registry[retriever_type]), "PER_CORPUS", False)
+
     @staticmethod
     def create(config: dict):
         retriever_type = config.get("type")
         if retriever_type not in RetrieverFactory._registry:
             raise ValueError(f"Unknown retriever type: {retriever_type}")
-        cls = RetrieverFactory._registry[retriever_type]
-        return cls(**{k: v for k, v in config.items() if k != "type"})
\ No newline at end of file
+        cls = import_from_path(RetrieverFactory._registry[retriever_type])
+        return cls(**{k: v for k, v in config.items() if k != "type"})
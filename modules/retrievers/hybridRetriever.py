@@ -0,0 +1,114 @@
+from concurrent.futures import ThreadPoolExecutor
+from modules.retrievers.base import BaseRetriever
+from modules.retrievers.keywordRetriever import KeywordRetriever
+from modules.retrievers.semanticRetriever import SemanticRetriever
+import threading
+
+
+def build_branches(config: dict, branches: dict = None) -> dict:
+    """Keyword and semantic branch retrievers: the given instances, else new ones from config."""
+    branches = dict(branches or {})
+    retriever_cfg = config["modules"]["retriever"]
+    if "keyword" not in branches:
+        branches["keyword"] = KeywordRetriever(**retriever_cfg.get("keyword", {}))
+    if "semantic" not in branches:
+        branches["semantic"] = SemanticRetriever(**retriever_cfg.get("semantic", {}))
+    return {name: branches[name] for name in ("keyword", "semantic")}
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever that runs keyword (BM25) and semantic search concurrently and
+    merges their rankings with weighted reciprocal-rank fusion:
+
+        score(chunk) = sum_i weight_i / (rrf_k + rank_i(chunk))
+
+    Both branches run on a thread pool shared by all hybrid retrievers, so the
+    latency is roughly that of the slower branch rather than the sum.
+
+    Branch retrievers can be passed in (a pipeline passes its shared
+    `retriever:keyword` / `retriever:semantic` modules, so their indexes and
+    embedding caches are not loaded twice); missing ones are built from the
+    `modules.retriever` config.
+    """
+
+    BRANCHES = ("keyword", "semantic")
+
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    def __init__(self, top_k: int = 3, candidate_k: int = 20, rrf_k: int = 60,
+                 weights: dict = None, max_workers: int = 4, branches: dict = None):
+        """
+        Initialize HybridRetriever.
+
+        Args:
+            top_k (int): Number of fused results to return by default.
+            candidate_k (int): Number of candidates each branch contributes.
+            rrf_k (int): RRF damping constant; larger values flatten rank differences.
+            weights (dict, optional): Per-branch weights, e.g. {"keyword": 1.0, "semantic": 1.0}.
+            max_workers (int): Size of the shared thread pool (set by the first instance).
+            branches (dict, optional): Branch name -> retriever instance to use.
+        """
+        super().__init__(name="HybridRetriever", top_k=top_k)
+        self.candidate_k = candidate_k
+        self.rrf_k = rrf_k
+        self.weights = {"keyword": 1.0, "semantic": 1.0, **(weights or {})}
+
+        self.branches = build_branches(self.config, branches)
+        self.last_branch_results = {}
+
+        with HybridRetriever._executor_lock:
+            if HybridRetriever._executor is None:
+                HybridRetriever._executor = ThreadPoolExecutor(
+                    max_workers=max_workers, thread_name_prefix="hybrid")
+
+    def prepare(self, chunks: list) -> None:
+        futures = [self._executor.submit(branch.prepare, chunks) for branch in self.branches.values()]
+        for future in futures:
+            future.result()
+
+    def prepare_queries(self, queries: list) -> None:
+        for branch in self.branches.values():
+            branch.prepare_queries(queries)
+
+    def fuse(self, rankings: dict, top_k: int) -> list:
+        """
+        Reciprocal-rank fusion of several ranked (chunk, score) lists.
+
+        Args:
+            rankings (dict): Branch name -> ranked list of (chunk, score).
+            top_k (int): Number of fused results to keep.
+
+        Returns:
+            list[tuple[str, float]]: Top-k (chunk, fused score) pairs.
+        """
+        fused = {}
+        for name, ranked in rankings.items():
+            weight = self.weights.get(name, 1.0)
+            for rank, (chunk, _) in enumerate(ranked, start=1):
+                fused[chunk] = fused.get(chunk, 0.0) + weight / (self.rrf_k + rank)
+        return sorted(fused.items(), key=lambda x: x[1], reverse=True)[:top_k]
+
+    def retrieve(self, query: str, chunks: list, *args, **kwargs):
+        """
+        Retrieve top-k chunks by fusing keyword and semantic rankings.
+
+        Args:
+            query (str): The query string.
+            chunks (list): Candidate chunks of text.
+            top_k (int, optional): Override the default number of results.
+
+        Returns:
+            list[tuple[str, float]]: Top-k (chunk, fused score) pairs.
+        """
+        top_k = kwargs.get("top_k", self.top_k)
+        candidate_k = max(self.candidate_k, top_k)
+        futures = {
+            name: self._executor.submit(branch.retrieve, query, chunks, top_k=candidate_k)
+            for name, branch in self.branches.items()
+            if self.weights.get(name, 1.0) > 0
+        }
+        rankings = {name: future.result() for name, future in futures.items()}
+        self.last_branch_results = rankings
+        return self.fuse(rankings, top_k)
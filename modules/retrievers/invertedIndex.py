@@ -0,0 +1,134 @@
+from collections import Counter
+from pathlib import Path
+from utils.fileio import atomic_write
+import heapq
+import math
+import pickle
+import re
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class InvertedIndex:
+    """
+    In-memory inverted index with BM25 scoring.
+
+    Each token maps to its postings {doc_id: term frequency}; document lengths
+    are kept for length normalization. A query only touches the postings of
+    its own terms, and the top-k is selected with a heap.
+    Documents are keyed by their text, so re-syncing with a chunk list adds
+    only new chunks and removes only vanished ones. Repeated texts are one
+    document: they are scored, counted in document frequencies and returned once.
+    """
+
+    VERSION = 1
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: dict = {}    # token -> {doc_id: tf}
+        self.doc_len: dict = {}     # doc_id -> number of tokens
+        self.docs: dict = {}        # doc_id -> text
+        self.doc_ids: dict = {}     # text -> doc_id
+        self.total_len = 0
+        self._next_id = 0
+
+    @staticmethod
+    def tokenize(text: str) -> list:
+        return _TOKEN_RE.findall(text.lower())
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add(self, text: str) -> int:
+        """Index a document (no-op if the same text is already indexed)."""
+        if text in self.doc_ids:
+            return self.doc_ids[text]
+        doc_id = self._next_id
+        self._next_id += 1
+        tokens = self.tokenize(text)
+        for token, tf in Counter(tokens).items():
+            self.postings.setdefault(token, {})[doc_id] = tf
+        self.doc_len[doc_id] = len(tokens)
+        self.total_len += len(tokens)
+        self.docs[doc_id] = text
+        self.doc_ids[text] = doc_id
+        return doc_id
+
+    def remove(self, text: str) -> None:
+        doc_id = self.doc_ids.pop(text, None)
+        if doc_id is None:
+            return
+        for token in set(self.tokenize(text)):
+            postings = self.postings.get(token)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[token]
+        self.total_len -= self.doc_len.pop(doc_id)
+        del self.docs[doc_id]
+
+    def sync(self, chunks) -> bool:
+        """
+        Make the indexed documents equal to the given chunks.
+
+        Returns:
+            bool: True if anything was added or removed.
+        """
+        wanted = set(chunks)
+        stale = [text for text in self.doc_ids if text not in wanted]
+        fresh = [text for text in dict.fromkeys(chunks) if text not in self.doc_ids]
+        for text in stale:
+            self.remove(text)
+        for text in fresh:
+            self.add(text)
+        return bool(stale or fresh)
+
+    def search(self, query: str, k: int) -> list:
+        """
+        Score documents containing at least one query term with BM25.
+
+        Returns:
+            list[tuple[str, float]]: Up to k (text, score) pairs, best first.
+        """
+        n_docs = len(self.docs)
+        if n_docs == 0 or k <= 0:
+            return []
+        avg_len = self.total_len / n_docs or 1.0
+        scores: dict = {}
+        for token in set(self.tokenize(query)):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1.0 - self.b + self.b * self.doc_len[doc_id] / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(self.docs[doc_id], score) for doc_id, score in best]
+
+    def save(self, path) -> None:
+        state = {key: getattr(self, key) for key in
+                 ("k1", "b", "postings", "doc_len", "docs", "total_len", "_next_id")}
+        state["version"] = self.VERSION
+        atomic_write(path, pickle.dumps(state))
+
+    @classmethod
+    def load(cls, path, k1: float = 1.5, b: float = 0.75):
+        """Load a saved index, or return an empty one if missing or incompatible."""
+        index = cls(k1=k1, b=b)
+        path = Path(path)
+        if not path.exists():
+            return index
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return index
+        if state.get("version") != cls.VERSION:
+            return index
+        for key in ("postings", "doc_len", "docs", "total_len", "_next_id"):
+            setattr(index, key, state[key])
+        index.doc_ids = {text: doc_id for doc_id, text in index.docs.items()}
+        return index
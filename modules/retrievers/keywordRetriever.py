@@ -1,41 +1,97 @@
 from modules.retrievers.base import BaseRetriever
+from modules.retrievers.invertedIndex import InvertedIndex
+from pathlib import Path
+import hashlib
+import threading
 
 class KeywordRetriever(BaseRetriever):
     """
-    Retriever that uses simple keyword overlap between query and chunks.
+    Retriever that ranks chunks by BM25 over an inverted index.
+
+    The corpus index is built from the chunks given to `prepare`, persisted
+    next to `data.keyword_index_path` and updated incrementally when the
+    ingested chunk set changes. Pipelines pass a `corpus` key (their ingestor
+    settings and docs folder), so each corpus gets its own index file and
+    pipelines over different corpora do not rebuild and overwrite each other's index.
+
+    Any other chunk list given to `retrieve` (e.g. inline chunks of one
+    request) is scored with a throwaway index; the corpus index and its file
+    are left untouched.
+
+    Chunks are indexed by their text: identical chunks collapse into one
+    document, which is returned (and counted in the BM25 statistics) once.
     """
 
-    def __init__(self, top_k: int = 3):
+    PER_CORPUS = True
+
+    def __init__(self, top_k: int = 3, k1: float = 1.5, b: float = 0.75, use_cache: bool = True,
+                 corpus: str = None):
         """
         Initialize KeywordRetriever.
 
         Args:
             top_k (int): Number of top results to return by default.
+            k1 (float): BM25 term-frequency saturation.
+            b (float): BM25 document-length normalization.
+            use_cache (bool): Whether to load/save the index on disk.
+            corpus (str, optional): Identity of the chunk lists this retriever
+                indexes; selects the index file. None uses `data.keyword_index_path` itself.
         """
         super().__init__(name="KeywordRetriever", top_k=top_k)
+        self.use_cache = use_cache
+        self.k1 = k1
+        self.b = b
+        self.index_file = self.index_path(Path(self.config["data"]["keyword_index_path"]), corpus)
+        if self.use_cache:
+            self.index = InvertedIndex.load(self.index_file, k1=k1, b=b)
+        else:
+            self.index = InvertedIndex(k1=k1, b=b)
+        self._synced_chunks = None
+        self._adhoc = (None, None)  # (chunk list, throwaway index) of the last ad-hoc retrieve
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def index_path(path: Path, corpus: str = None) -> Path:
+        """Index file for a corpus: `<stem>.<hash of corpus><suffix>` beside `path`."""
+        if corpus is None:
+            return path
+        digest = hashlib.sha1(corpus.encode("utf-8")).hexdigest()[:12]
+        return path.with_name(f"{path.stem}.{digest}{path.suffix}")
+
+    def prepare(self, chunks: list) -> None:
+        """Bring the corpus index in line with the ingested chunks, saving it if it changed."""
+        with self._lock:
+            if chunks is self._synced_chunks:
+                return
+            if self.index.sync(chunks) and self.use_cache:
+                self.index.save(self.index_file)
+            self._synced_chunks = chunks
 
-    def _keyword_score(self, query: str, chunk: str) -> int:
-        """Score = number of query words that appear in chunk."""
-        query_split = query.lower().split()
-        chunk_split = set(chunk.lower().split())
-        return sum(1 for q in query_split if q in chunk_split)
+    def _index_for(self, chunks: list) -> InvertedIndex:
+        """The corpus index if `chunks` is the prepared list, else an in-memory index of `chunks`."""
+        with self._lock:
+            if chunks is self._synced_chunks:
+                return self.index
+            if chunks is self._adhoc[0]:
+                return self._adhoc[1]
+        index = InvertedIndex(k1=self.k1, b=self.b)
+        index.sync(chunks)
+        with self._lock:
+            self._adhoc = (chunks, index)
+        return index
 
     def retrieve(self, query: str, chunks: list, *args, **kwargs):
         """
-        Retrieve top-k chunks with highest keyword overlap score.
+        Retrieve top-k chunks with the highest BM25 score.
 
         Args:
             query (str): The query string.
             chunks (list): Candidate chunks of text.
+            top_k (int, optional): Override the default number of results.
 
         Returns:
-            list[tuple[str, int]]: Top-k (chunk, score) pairs.
+            list[tuple[str, float]]: Top-k (chunk, score) pairs.
         """
-        scored = []
-        for chunk in chunks:
-            score = self._keyword_score(query, chunk)
-            if score > 0:
-                scored.append((chunk, score))
-
-        scored.sort(key=lambda x: x[1], reverse=True)
-        return scored[: self.top_k]
+        index = self._index_for(chunks)
+        with self._lock:
+            return index.search(query, kwargs.get("top_k", self.top_k))
@@ -1,16 +1,69 @@
+import hashlib
+import heapq
 import numpy as np
 import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
+from modules.retrievers.annIndex import IVFIndex
 from modules.retrievers.base import BaseRetriever
-from utils.vectorizer import vectorize_string
+from utils.chunkstore import StoredChunks
+from utils.fileio import atomic_write
+from utils.quantization import QuantizedMatrix
+from utils.vectorizer import embedding_key, vectorize_string, vectorize_all
+from utils.vectors import normalize, top_k_indices
 
 
 class SemanticRetriever(BaseRetriever):
     """
     Retriever that uses embeddings + cosine similarity with optional caching.
+
+    Chunk embeddings are kept in a contiguous, L2-normalized float32 matrix
+    (one row per chunk) so a query is scored with a single matrix-vector product.
+    The matrix is rebuilt only when the chunk list changes.
+
+    Cache misses are collected up front, encoded in batches and written back
+    to the embedding cache with a single atomic flush. Every cached or saved
+    vector (pickle, chunk-store vectors, IVF and quantized files) is keyed by
+    `embedding_key`: the model name plus its inference backend if not torch.
+
+    With `index: "ivf"` the matrix also feeds an approximate IVF index
+    (see annIndex.IVFIndex) that is saved next to the embedding cache and
+    updated incrementally as chunks come and go. Its cells hold ids only and
+    candidates are scored against the matrix rows. A saved index built for
+    another model or dimension is retrained.
+
+    With `storage: "float16"` or `"int8"` (exact index only) the scoring matrix
+    is kept quantized and saved as a compact array file next to the embedding
+    cache; when it matches the chunk set, startup loads that file instead of
+    the embedding pickle. The top `top_k * rescore_factor` candidates can be
+    re-scored at full precision, read from a memory-mapped float32 .npy saved
+    with it (see QuantizedMatrix), so only the candidate rows are paged in.
+
+    When handed a StoredChunks view (ingestor `chunk_store: true`), rows are
+    chunk ids: embeddings come from the store's memory-mapped id-aligned
+    vector file instead of the text-keyed pickle, and only the returned
+    results are decoded to text (`retrieve_ids` skips even that).
+
+    Exact float32 search scores the matrix in blocks of SCORE_BLOCK_ROWS rows.
+    With `shards > 1`, the blocks are split into contiguous shards scored on
+    this retriever's pool of `shards` threads (NumPy releases the GIL; `close`
+    stops it); each shard returns its local top-k and a heap merges them.
+    Both paths run the same per-block products and break ties by row, so
+    sharded results are identical to unsharded ones.
     """
 
-    def __init__(self, model_name: str = None, top_k: int = 3, use_cache: bool = True):
+    ANN_DEFAULTS = {"nlist": 64, "nprobe": 8, "kmeans_iters": 20,
+                    "min_vectors": 1000, "retrain_factor": 4.0}
+    MAX_QUERY_VECTORS = 8192
+    # rows per matrix-vector product; fixed so every path computes identical scores
+    SCORE_BLOCK_ROWS = 16384
+
+    def __init__(self, model_name: str = None, top_k: int = 3, use_cache: bool = True,
+                 batch_size: int = 64, index: str = "exact", ann: dict = None,
+                 storage: str = "float32", rescore: bool = True, rescore_factor: int = 4,
+                 shards: int = 1):
         """
         Initialize SemanticRetriever.
 
@@ -18,42 +71,342 @@ class SemanticRetriever(BaseRetriever):
             model_name (str, optional): Name of the embedding model.
             top_k (int): Number of top results to return by default.
             use_cache (bool): Whether to enable embedding caching.
+            batch_size (int): Number of texts encoded per model call on cache misses.
+            index (str): "exact" (full matrix scan) or "ivf" (approximate).
+            ann (dict, optional): IVF knobs: nlist, nprobe, kmeans_iters,
+                min_vectors (below this, exact search is used) and
+                retrain_factor (retrain once the index grows this much).
+            storage (str): "float32", "float16" or "int8" scoring matrix.
+            rescore (bool): Re-score quantized candidates at full precision.
+            rescore_factor (int): Candidates re-scored per requested result.
+            shards (int): Row shards scored in parallel by exact float32 search
+                (each at least SCORE_BLOCK_ROWS rows).
         """
         super().__init__(name="SemanticRetriever", top_k=top_k)
         self.model_name = model_name or self.config["embedding"]["model_name"]
+        # cached vectors are only valid for the model run on the same inference backend
+        self.embedding_key = embedding_key(self.model_name)
         self.use_cache = use_cache
+        self.batch_size = batch_size
+        if index not in ("exact", "ivf"):
+            raise ValueError(f"Unknown semantic index type: {index}")
+        self.index_type = index
+        self.ann_params = {**self.ANN_DEFAULTS, **(ann or {})}
+        if storage not in ("float32", "float16", "int8"):
+            raise ValueError(f"Unknown semantic storage type: {storage}")
+        self.storage = storage
+        self.rescore = rescore
+        self.rescore_factor = rescore_factor
+        self.shards = max(1, int(shards))
+        self._executor = None  # shard pool, started on the first sharded search
 
-        # Embedding cache
+        # Cache statistics (cumulative over the lifetime of the retriever)
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # Embedding cache (the pickle is loaded on first use)
         self.cache_file = Path(self.config["data"]["embeddings_cache_path"])
-        if self.use_cache and self.cache_file.exists():
-            with open(self.cache_file, "rb") as f:
-                self._embedding_cache = pickle.load(f)
-        else:
+        self._embedding_cache = None
+
+        # Scoring matrix: row i holds the normalized embedding of self._row_chunks[i];
+        # a QuantizedMatrix when storage is float16/int8
+        self.quantized_file = self.cache_file.with_suffix(f".{storage}.npz")
+        self._matrix = None
+        self._row_chunks: list = []
+        # ANN index over the same rows: ids are stable across rebuilds via text digests
+        self.ann_file = self.cache_file.with_suffix(".ivf.npz")
+        self._ann = None
+        self._ann_keys: list = []     # id -> text digest
+        self._ann_row = None          # ann id -> matrix row (int64 array, -1 if gone)
+        self._ann_loaded = False
+        self._id_vectors: dict = {}   # ChunkStore -> IdVectors for this model
+        self._query_vectors: dict = {}  # query text -> embedding, from prepare_queries
+        # Guards the embedding cache and the matrix when queries run concurrently
+        self._lock = threading.RLock()
+
+    def _load_embedding_cache(self) -> dict:
+        if self._embedding_cache is None:
             self._embedding_cache = {}
+            if self.use_cache and self.cache_file.exists():
+                with open(self.cache_file, "rb") as f:
+                    self._embedding_cache = pickle.load(f)
+        return self._embedding_cache
 
     def _save_embedding_cache(self):
+        """Write the embedding cache atomically (temp file + rename)."""
         if not self.use_cache:
             return
-        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.cache_file, "wb") as f:
-            pickle.dump(self._embedding_cache, f)
-
-    def _cosine_similarity(self, vec_a, vec_b) -> float:
-        """Compute cosine similarity between two vectors."""
-        return float(np.dot(vec_a, vec_b) / (np.linalg.norm(vec_a) * np.linalg.norm(vec_b)))
+        atomic_write(self.cache_file, pickle.dumps(self._embedding_cache))
 
     def _get_embedding(self, text: str):
-        """Get embedding from cache if enabled, else compute directly."""
-        key = (text, self.model_name)
-        if self.use_cache and key in self._embedding_cache:
-            return self._embedding_cache[key]
+        """
+        Get embedding from cache if enabled, else compute directly.
+        Used for queries, so the cache is only consulted once already loaded:
+        encoding one string is cheaper than unpickling the whole cache.
+        """
+        key = (text, self.embedding_key)
+        with self._lock:
+            if text in self._query_vectors:
+                return self._query_vectors[text]
+            cache = self._embedding_cache if self.use_cache else None
+            if cache is not None and key in cache:
+                self.cache_hits += 1
+                return cache[key]
+            self.cache_misses += 1
 
         emb = vectorize_string(text, model_name=self.model_name)
-        if self.use_cache:
-            self._embedding_cache[key] = emb
-            self._save_embedding_cache()
+        if cache is not None:
+            with self._lock:
+                cache[key] = emb
         return emb
 
+    def prepare_queries(self, queries: list) -> None:
+        """
+        Encode a batch of upcoming queries in `batch_size` model calls.
+        The oldest precomputed queries are dropped beyond MAX_QUERY_VECTORS.
+        """
+        unique = list(dict.fromkeys(queries))
+        vectors = vectorize_all(unique, model_name=self.model_name, batch_size=self.batch_size) if unique else []
+        with self._lock:
+            self.cache_misses += len(unique)
+            self._query_vectors.update(zip(unique, vectors))
+            for text in list(islice(self._query_vectors, max(0, len(self._query_vectors) - self.MAX_QUERY_VECTORS))):
+                del self._query_vectors[text]
+
+    def _get_embeddings(self, texts: list) -> list:
+        """
+        Get embeddings for many texts at once.
+
+        All cache misses are gathered first, encoded in batches of `batch_size`
+        through `vectorize_all`, and the cache file is written once at the end.
+        Without caching, duplicates are still encoded only once.
+        """
+        with self._lock:
+            return self._get_embeddings_locked(texts)
+
+    def _get_embeddings_locked(self, texts: list) -> list:
+        store = self._load_embedding_cache() if self.use_cache else {}
+        missing = []
+        seen = set()
+        for text in texts:
+            key = (text, self.embedding_key)
+            if key in store or text in seen:
+                continue
+            seen.add(text)
+            missing.append(text)
+
+        self.cache_hits += len(texts) - len(missing)
+        self.cache_misses += len(missing)
+
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            vectors = vectorize_all(batch, model_name=self.model_name, batch_size=self.batch_size)
+            for text, vec in zip(batch, vectors):
+                store[(text, self.embedding_key)] = vec
+
+        if missing:
+            self._save_embedding_cache()
+        return [store[(text, self.embedding_key)] for text in texts]
+
+    def _stream_embeddings(self, texts: list) -> np.ndarray:
+        """
+        Embeddings for one streamed batch. Hits are taken from the embedding
+        cache only if it is already loaded; misses are encoded and dropped
+        with the batch, so streaming neither loads nor grows the cache.
+        """
+        with self._lock:
+            cache = self._embedding_cache if self.use_cache else None
+            found = [cache.get((text, self.embedding_key)) if cache is not None else None for text in texts]
+        missing = list(dict.fromkeys(text for text, vec in zip(texts, found) if vec is None))
+        encoded = dict(zip(missing, vectorize_all(missing, model_name=self.model_name,
+                                                  batch_size=self.batch_size))) if missing else {}
+        with self._lock:
+            self.cache_hits += len(texts) - len(missing)
+            self.cache_misses += len(missing)
+        return np.vstack([vec if vec is not None else encoded[text] for text, vec in zip(texts, found)])
+
+    def _get_id_embeddings(self, rows: StoredChunks) -> np.ndarray:
+        """
+        Embeddings for stored chunks, looked up by id in the store's vector file.
+        Missing ids are decoded and encoded in batches, then stored with one
+        `put` and written back in one flush. Hits and misses count distinct ids.
+        """
+        with self._lock:
+            vectors = self._id_vectors.get(rows.store)
+            if vectors is None:
+                vectors = self._id_vectors[rows.store] = rows.store.vectors(self.embedding_key)
+            unique = np.unique(rows.ids)
+            missing = vectors.missing(unique)
+            self.cache_hits += len(unique) - len(missing)
+            self.cache_misses += len(missing)
+            encoded = [vectorize_all(rows.store.get_many(missing[start:start + self.batch_size]),
+                                     model_name=self.model_name, batch_size=self.batch_size)
+                       for start in range(0, len(missing), self.batch_size)]
+            if encoded:
+                vectors.put(missing, np.vstack(encoded))
+            if len(missing) and self.use_cache:
+                vectors.flush()
+            return vectors.get(rows.ids)
+
+    def _row_vectors(self, rows) -> np.ndarray:
+        """Raw embeddings for a list of chunk texts or a StoredChunks view."""
+        if isinstance(rows, StoredChunks):
+            return self._get_id_embeddings(rows)
+        return np.vstack(self._get_embeddings(rows))
+
+    def _row_keys(self, rows) -> list:
+        """Text digests of the rows (read from the store when rows are ids)."""
+        if isinstance(rows, StoredChunks):
+            return rows.keys()
+        return [self._text_key(text) for text in rows]
+
+    def close(self) -> None:
+        """Stop the shard thread pool; a later sharded search starts a new one."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def cache_stats(self) -> dict:
+        """Return cumulative embedding cache hit/miss counters."""
+        return {"hits": self.cache_hits, "misses": self.cache_misses}
+
+    def metric_counters(self) -> dict:
+        return {"embeddings_computed": self.cache_misses, "embeddings_cached": self.cache_hits}
+
+    def _build_matrix(self, chunks: list) -> None:
+        """(Re)build the normalized embedding matrix and the row -> chunk index."""
+        self._row_chunks = chunks if isinstance(chunks, StoredChunks) else list(chunks)
+        if not len(self._row_chunks):
+            self._matrix = None
+            return
+
+        quantize = self.storage != "float32" and self.index_type == "exact"
+        if quantize and self.use_cache:
+            keys = self._row_keys(self._row_chunks)
+            stored = QuantizedMatrix.load(self.quantized_file, keys, self.embedding_key,
+                                          full=self.rescore and not isinstance(self._row_chunks, StoredChunks))
+            if stored is not None:
+                self._matrix = stored
+                return
+
+        self._matrix = np.ascontiguousarray(normalize(self._row_vectors(self._row_chunks)))
+        if self.index_type == "ivf":
+            self._sync_ann()
+        elif quantize:
+            full = self._matrix
+            self._matrix = QuantizedMatrix.from_float(full, self.storage)
+            if self.use_cache:
+                # stored chunks re-score from the store's own memory-mapped vectors
+                if self.rescore and not isinstance(self._row_chunks, StoredChunks):
+                    self._matrix.full = full
+                keys = self._row_keys(self._row_chunks)
+                self._matrix.save(self.quantized_file, keys, self.embedding_key)
+
+    def storage_stats(self) -> dict:
+        """Memory used by the scoring matrix, per vector and in total."""
+        with self._lock:
+            matrix = self._matrix
+        if matrix is None:
+            return {"storage": self.storage, "vectors": 0}
+        if isinstance(matrix, QuantizedMatrix):
+            per_vector, dim = matrix.bytes_per_vector, matrix.data.shape[1]
+        else:
+            per_vector, dim = matrix.shape[1] * matrix.itemsize, matrix.shape[1]
+        return {
+            "storage": self.storage,
+            "vectors": len(matrix),
+            "dim": dim,
+            "bytes_per_vector": per_vector,
+            "float32_bytes_per_vector": dim * 4,
+            "total_bytes": per_vector * len(matrix),
+        }
+
+    @staticmethod
+    def _text_key(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def _sync_ann(self) -> None:
+        """
+        Bring the IVF index in line with the current rows: add new chunks,
+        tombstone vanished ones, retrain when it has grown or decayed too much.
+        """
+        rows, matrix = self._row_chunks, self._matrix
+        if len(rows) < self.ann_params["min_vectors"]:
+            self._ann, self._ann_row = None, None
+            return
+
+        if not self._ann_loaded and self.use_cache:
+            self._ann, extra = IVFIndex.load(self.ann_file)
+            if self._ann is not None and (str(extra.get("model_name", "")) != self.embedding_key
+                                          or self._ann.dim != matrix.shape[1]):
+                self._ann = None  # built for another model: retrain below
+            self._ann_keys = extra.get("keys", np.empty(0, dtype=str)).tolist() if self._ann else []
+            self._ann_loaded = True
+
+        keys = self._row_keys(rows)
+        ann = self._ann
+        needs_training = (
+            ann is None
+            or len(ann) + len(ann.deleted) > self.ann_params["retrain_factor"] * ann.trained_size
+            or len(ann.deleted) > len(ann)
+        )
+        if needs_training:
+            ann = IVFIndex(nlist=self.ann_params["nlist"], nprobe=self.ann_params["nprobe"],
+                           kmeans_iters=self.ann_params["kmeans_iters"])
+            unique_rows = list({key: i for i, key in enumerate(keys)}.values())
+            ann.train(matrix[unique_rows])
+            ann.add(matrix[unique_rows], np.arange(len(unique_rows)))
+            self._ann_keys = [keys[i] for i in unique_rows]
+            changed = True
+        else:
+            id_of = {key: i for i, key in enumerate(self._ann_keys)}
+            new_rows = []
+            for row, key in enumerate(keys):
+                if key not in id_of:
+                    id_of[key] = len(self._ann_keys)
+                    self._ann_keys.append(key)
+                    new_rows.append(row)
+            present = {id_of[key] for key in keys}
+            revived = present & ann.deleted
+            ann.deleted -= revived
+            stale = set(range(len(self._ann_keys))) - ann.deleted - present
+            ann.add(matrix[new_rows], [id_of[keys[row]] for row in new_rows])
+            ann.remove(stale)
+            changed = bool(new_rows or stale or revived)
+
+        id_of = {key: i for i, key in enumerate(self._ann_keys)}
+        # ann id -> matrix row; ids of chunks no longer present stay tombstoned at -1
+        self._ann_row = np.full(len(self._ann_keys), -1, dtype=np.int64)
+        for row, key in enumerate(keys):
+            self._ann_row[id_of[key]] = row
+        self._ann = ann
+        if changed and self.use_cache:
+            ann.save(self.ann_file, extra={"keys": np.array(self._ann_keys),
+                                           "model_name": np.array(self.embedding_key)})
+
+    def _ensure_matrix(self, chunks: list):
+        """
+        Rebuild the scoring matrix only if the chunk list changed.
+
+        Returns:
+            tuple: (matrix, row_chunks) snapshot to score against.
+        """
+        with self._lock:
+            if self._matrix is None or not self._same_rows(chunks):
+                self._build_matrix(chunks)
+            return self._matrix, self._row_chunks
+
+    def _same_rows(self, chunks) -> bool:
+        rows = self._row_chunks
+        if isinstance(rows, StoredChunks) or isinstance(chunks, StoredChunks):
+            return isinstance(rows, StoredChunks) and rows.same_as(chunks)
+        return rows == list(chunks)
+
+    def prepare(self, chunks: list) -> None:
+        """Embed all chunks and build the scoring matrix ahead of the first query."""
+        self._ensure_matrix(chunks)
+
     def retrieve(self, query: str, chunks: list, *args, **kwargs):
         """
         Retrieve top-k most relevant chunks based on semantic similarity.
@@ -61,16 +414,145 @@ class SemanticRetriever(BaseRetriever):
         Args:
             query (str): The query string.
             chunks (list): Candidate chunks of text.
+            top_k (int, optional): Override the default number of results.
 
         Returns:
             list[tuple[str, float]]: Top-k (chunk, score) pairs.
         """
-        query_vec = self._get_embedding(query)
-        scored = []
-        for chunk in chunks:
-            vec = self._get_embedding(chunk)
-            scored.append((chunk, self._cosine_similarity(query_vec, vec)))
+        rows, hits = self._search(query, chunks, kwargs.get("top_k", self.top_k))
+        return [(rows[i], score) for i, score in hits]
+
+    def rerank(self, query: str, candidates: list, top_k: int = None):
+        """
+        Rank only `candidates` (e.g. the output of a cheaper first stage).
+        Their embeddings come from the cache or are encoded in one batch;
+        the full-corpus scoring matrix is neither built nor touched.
 
-        scored.sort(key=lambda x: x[1], reverse=True)
-        return scored[: self.top_k]
-    
+        Returns:
+            list[tuple[str, float]]: Top-k (chunk, score) pairs.
+        """
+        if not len(candidates):
+            return []
+        query_vec = normalize(self._get_embedding(query))
+        scores = normalize(self._row_vectors(candidates)) @ query_vec
+        return [(candidates[i], float(scores[i])) for i in top_k_indices(scores, top_k or self.top_k)]
+
+    def retrieve_ids(self, query: str, chunks: StoredChunks, top_k: int = None):
+        """
+        Like `retrieve`, but over a StoredChunks view and returning chunk ids,
+        so no text is decoded. Use `chunks.store.get(id)` to fetch the text.
+
+        Returns:
+            list[tuple[int, float]]: Top-k (chunk id, score) pairs.
+        """
+        rows, hits = self._search(query, chunks, top_k or self.top_k)
+        return [(int(rows.ids[i]), score) for i, score in hits]
+
+    def _search(self, query: str, chunks, top_k: int):
+        """
+        Score the query against the rows for `chunks`.
+
+        Returns:
+            tuple: (rows, [(row index, score), ...] best first).
+        """
+        with self._lock:
+            matrix, rows = self._ensure_matrix(chunks)
+            ann, ann_row = self._ann, self._ann_row
+        if matrix is None:
+            return rows, []
+
+        query_vec = normalize(self._get_embedding(query))
+        if ann is not None:
+            hits = ann.search(query_vec, top_k, lambda ids: matrix[ann_row[ids]])
+            return rows, [(int(ann_row[i]), score) for i, score in hits]
+        if isinstance(matrix, QuantizedMatrix):
+            return rows, self._search_quantized(query_vec, matrix, rows, top_k)
+        n_blocks = -(-len(matrix) // self.SCORE_BLOCK_ROWS)
+        if min(self.shards, n_blocks) > 1:
+            return rows, self._search_sharded(query_vec, matrix, top_k, min(self.shards, n_blocks))
+        scores = self._block_scores(query_vec, matrix, 0, len(matrix))
+        return rows, [(int(i), float(scores[i])) for i in top_k_indices(scores, top_k)]
+
+    def _block_scores(self, query_vec, matrix: np.ndarray, start: int, end: int) -> np.ndarray:
+        """Scores of rows [start, end), one product per SCORE_BLOCK_ROWS-aligned block."""
+        scores = np.empty(end - start, dtype=np.float32)
+        for block in range(start, end, self.SCORE_BLOCK_ROWS):
+            stop = min(block + self.SCORE_BLOCK_ROWS, end)
+            np.matmul(matrix[block:stop], query_vec, out=scores[block - start:stop - start])
+        return scores
+
+    def _score_shard(self, query_vec, matrix: np.ndarray, start: int, end: int, top_k: int) -> list:
+        scores = self._block_scores(query_vec, matrix, start, end)
+        return [(start + int(i), float(scores[i])) for i in top_k_indices(scores, top_k)]
+
+    def _search_sharded(self, query_vec, matrix: np.ndarray, top_k: int, n_shards: int) -> list:
+        """
+        Score runs of whole blocks on the shard pool and heap-merge their local top-k lists.
+
+        Returns:
+            list[tuple[int, float]]: (row index, score) pairs, best first.
+        """
+        n_blocks = -(-len(matrix) // self.SCORE_BLOCK_ROWS)
+        bounds = [min(int(b) * self.SCORE_BLOCK_ROWS, len(matrix))
+                  for b in np.linspace(0, n_blocks, n_shards + 1).round()]
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.shards, thread_name_prefix="semantic-shard")
+            executor = self._executor
+        futures = [executor.submit(self._score_shard, query_vec, matrix, start, end, top_k)
+                   for start, end in zip(bounds[:-1], bounds[1:])]
+        # each local list is sorted by (-score, row), so a k-way heap merge keeps that order
+        merged = heapq.merge(*(future.result() for future in futures), key=lambda hit: (-hit[1], hit[0]))
+        return list(islice(merged, top_k))
+
+    def retrieve_stream(self, query: str, chunk_iter, batch_size: int = 256, top_k: int = None):
+        """
+        Retrieve top-k chunks from a stream, embedding and scoring one batch at
+        a time while keeping a running top-k heap. Peak memory for scoring is
+        bounded by `batch_size`; no full-corpus matrix is built, and streamed
+        embeddings are not kept (see `_stream_embeddings`).
+
+        Args:
+            query (str): The query string.
+            chunk_iter (iterable): Chunks of text, e.g. from BaseIngestor.iter_chunks.
+            batch_size (int): Chunks embedded and scored per batch.
+            top_k (int, optional): Override the default number of results.
+
+        Returns:
+            list[tuple[str, float]]: Top-k (chunk, score) pairs.
+        """
+        top_k = top_k or self.top_k
+        query_vec = normalize(self._get_embedding(query))
+        heap = []  # min-heap of (score, -position, chunk); earlier chunks win ties
+        position = 0
+        for batch in self.iter_batches(chunk_iter, batch_size):
+            scores = normalize(self._stream_embeddings(batch)) @ query_vec
+            for i in top_k_indices(scores, top_k):
+                item = (float(scores[i]), -(position + int(i)), batch[i])
+                if len(heap) < top_k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+            position += len(batch)
+        return [(chunk, score) for score, _, chunk in sorted(heap, reverse=True)]
+
+    def _search_quantized(self, query_vec, matrix: QuantizedMatrix, rows, top_k: int):
+        """
+        First pass on the quantized matrix, then optional full-precision re-scoring.
+
+        Returns:
+            list[tuple[int, float]]: (row index, score) pairs, best first.
+        """
+        scores = matrix.scores(query_vec)
+        if not self.rescore:
+            return [(int(i), float(scores[i])) for i in top_k_indices(scores, top_k)]
+        candidates = top_k_indices(scores, top_k * self.rescore_factor)
+        if matrix.full is not None:
+            exact = matrix.full[candidates] @ query_vec
+        else:
+            if isinstance(rows, StoredChunks):
+                vectors = self._row_vectors(rows[candidates])
+            else:
+                vectors = self._row_vectors([rows[i] for i in candidates])
+            exact = normalize(vectors) @ query_vec
+        return [(int(candidates[j]), float(exact[j])) for j in top_k_indices(exact, top_k)]
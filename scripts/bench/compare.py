@@ -0,0 +1,74 @@
+"""
+Compare benchmark results with a stored baseline.
+
+Metrics ending in "_per_s" are throughputs (higher is better) and metrics
+ending in "_ms" are latencies (lower is better); anything else is ignored.
+
+Run:
+    python -m scripts.bench.compare RESULTS.json BASELINE.json [--tolerance 0.2]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def flatten(data: dict, prefix: str = "") -> dict:
+    """{"a": {"b": 1}} -> {"a.b": 1}, numeric leaves only."""
+    out = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            out.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            out[name] = value
+    return out
+
+def compare(results: dict, baseline: dict, tolerance: float = 0.2) -> list:
+    """
+    Find metrics that regressed by more than `tolerance` (a fraction).
+
+    Returns:
+        list[dict]: {"metric", "baseline", "current", "change"} per regression,
+        where "change" is the relative change in the "worse" direction.
+    """
+    current = flatten(results.get("results", results))
+    base = flatten(baseline.get("results", baseline))
+    regressions = []
+    for metric, old in sorted(base.items()):
+        new = current.get(metric)
+        if new is None or old <= 0:
+            continue
+        if metric.endswith("_per_s"):
+            change = (old - new) / old
+        elif metric.endswith("_ms"):
+            change = (new - old) / old
+        else:
+            continue
+        if change > tolerance:
+            regressions.append({"metric": metric, "baseline": old, "current": new, "change": round(change, 4)})
+    return regressions
+
+def report(regressions: list) -> None:
+    if not regressions:
+        print("No regressions against baseline.")
+        return
+    print(f"{len(regressions)} regression(s) against baseline:")
+    for r in regressions:
+        print(f"  {r['metric']}: {r['baseline']:.4g} -> {r['current']:.4g} ({r['change']:+.0%} worse)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare benchmark results with a baseline")
+    parser.add_argument("results", type=Path)
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown (default: 0.2)")
+    args = parser.parse_args()
+
+    regressions = compare(json.loads(args.results.read_text()), json.loads(args.baseline.read_text()),
+                          args.tolerance)
+    report(regressions)
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Synthetic markdown corpora for benchmarks.
+
+Documents are built from a fixed vocabulary with a seeded RNG, so the same
+(size, seed) always produces byte-identical files. A share of the paragraphs
+is copied boilerplate, like the repeated sections in real notes.
+"""
+
+from pathlib import Path
+import random
+
+_WORDS = (
+    "retrieval embedding vector index query answer context model chunk token "
+    "document corpus latency cache batch score rank semantic keyword hybrid "
+    "pipeline generator ingestor memory throughput shard cluster neighbour "
+    "python numpy config prompt sentence paragraph section summary detail "
+    "data system service request response result method value example"
+).split()
+
+_BOILERPLATE = (
+    "This note is part of the personal knowledge base. Sections may be "
+    "incomplete and are updated as the projects evolve."
+)
+
+
+def _sentence(rng: random.Random) -> str:
+    words = rng.choices(_WORDS, k=rng.randint(6, 18))
+    return " ".join(words).capitalize() + "."
+
+def make_document(rng: random.Random, sections: int = 4) -> str:
+    parts = [f"# {' '.join(rng.choices(_WORDS, k=3)).title()}\n"]
+    for _ in range(sections):
+        parts.append(f"## {' '.join(rng.choices(_WORDS, k=2)).title()}\n")
+        for _ in range(rng.randint(1, 3)):
+            if rng.random() < 0.15:
+                parts.append(_BOILERPLATE + "\n")
+            else:
+                parts.append(" ".join(_sentence(rng) for _ in range(rng.randint(2, 6))) + "\n")
+    return "\n".join(parts)
+
+def make_corpus(folder, n_docs: int, seed: int = 0) -> Path:
+    """Write `n_docs` markdown files into `folder` and return it."""
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    for i in range(n_docs):
+        (folder / f"doc_{i:05d}.md").write_text(make_document(rng), encoding="utf-8")
+    return folder
+
+def make_queries(n: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(_WORDS, k=rng.randint(2, 6))) + "?" for _ in range(n)]
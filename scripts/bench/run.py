@@ -0,0 +1,182 @@
+"""
+Benchmark suite on synthetic corpora.
+
+For each corpus size it measures:
+    - ingestion throughput of SimpleIngestor and AdvancedIngestor (cold, no cache)
+    - embedding throughput (utils.vectorizer.vectorize_all)
+    - retrieval latency percentiles of the keyword and semantic retrievers
+    - end-to-end latency of an ingest -> semantic -> generator pipeline
+
+By default the embedding and generation models are replaced by deterministic
+stubs (scripts/bench/stubs.py), so the suite runs offline and measures our
+code rather than the models; --real-models uses the configured models.
+All caches are written to a temporary directory.
+
+Run:
+    python -m scripts.bench.run [--sizes 100 1000] [--out results.json] [--baseline baseline.json]
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+import yaml
+from pathlib import Path
+from modules.baseModule import BaseModule
+from scripts.bench import compare, stubs
+from scripts.bench.corpus import make_corpus, make_queries
+
+ROOT = Path(__file__).parent.parent.parent
+
+
+def percentiles(seconds: list) -> dict:
+    ms = np.asarray(seconds) * 1000
+    return {"p50_ms": float(np.percentile(ms, 50)), "p95_ms": float(np.percentile(ms, 95)),
+            "p99_ms": float(np.percentile(ms, 99)), "mean_ms": float(ms.mean()), "n": len(ms)}
+
+def bench_config(workdir: Path) -> dict:
+    """config.yaml with every cache path moved into `workdir`."""
+    with open(ROOT / "config.yaml", "r") as f:
+        config = yaml.safe_load(f)
+    config["data"].update({
+        "chunks_cache_path": str(workdir / "chunks.json"),
+        "embeddings_cache_path": str(workdir / "embeddings.pkl"),
+        "keyword_index_path": str(workdir / "keyword_index.pkl"),
+        "chunk_store_path": str(workdir / "chunk_store"),
+    })
+    return config
+
+def bench_ingestion(config: dict, docs: Path, workers: int) -> dict:
+    from modules.ingestors.simpleIngestor import SimpleIngestor
+    from modules.ingestors.advancedIngestor import AdvancedIngestor
+
+    total_bytes = sum(p.stat().st_size for p in docs.glob("*.md"))
+    n_docs = len(list(docs.glob("*.md")))
+    out, chunks_by_name = {}, {}
+    for name, cls in (("simple", SimpleIngestor), ("advanced", AdvancedIngestor)):
+        params = config["modules"]["ingestor"][name]
+        ingestor = cls(**{**params, "use_cache": False, "workers": workers, "chunk_store": False})
+        t0 = time.perf_counter()
+        try:
+            chunks = ingestor.run(str(docs))
+        except LookupError as exc:  # e.g. nltk tokenizer data not downloaded
+            reason = next((line.strip() for line in str(exc).splitlines() if line.strip(" *")), repr(exc))
+            out[cls.__name__] = {"skipped": reason}
+            continue
+        seconds = time.perf_counter() - t0
+        chunks_by_name[name] = chunks
+        out[cls.__name__] = {
+            "seconds": seconds, "chunks": len(chunks),
+            "docs_per_s": n_docs / seconds, "chunks_per_s": len(chunks) / seconds,
+            "mb_per_s": total_bytes / (1 << 20) / seconds,
+        }
+    if not chunks_by_name:
+        raise RuntimeError(f"no ingestor could run on {docs}: {out}")
+    # later stages run on the simple ingestor's chunks, or the first one that ran
+    return out, chunks_by_name.get("simple", next(iter(chunks_by_name.values())))
+
+def bench_embedding(chunks: list, batch_size: int) -> dict:
+    from utils.vectorizer import vectorize_all
+    t0 = time.perf_counter()
+    vectorize_all(chunks, batch_size=batch_size)
+    seconds = time.perf_counter() - t0
+    return {"seconds": seconds, "chunks": len(chunks), "chunks_per_s": len(chunks) / seconds}
+
+def bench_retrieval(retriever, chunks: list, queries: list) -> dict:
+    t0 = time.perf_counter()
+    retriever.prepare(chunks)
+    prepare_seconds = time.perf_counter() - t0
+    retriever.retrieve(queries[0], chunks)  # warm-up
+    samples = []
+    for query in queries:
+        t0 = time.perf_counter()
+        retriever.retrieve(query, chunks)
+        samples.append(time.perf_counter() - t0)
+    return {"prepare_seconds": prepare_seconds, **percentiles(samples),
+            "queries_per_s": len(samples) / sum(samples)}
+
+def bench_end_to_end(config: dict, docs: Path, queries: list, use_stubs: bool) -> dict:
+    from modules.pipelines.generic import GenericPipeline
+    pipeline = GenericPipeline(config, {"sequence": ["ingestor:simple", "retriever:semantic",
+                                                     "generator:flan_alpaca_base"]},
+                               pipeline_name="bench")
+    if use_stubs:
+        stubs.install_stub_generator(pipeline)
+    t0 = time.perf_counter()
+    pipeline.execute(queries[0], folder=str(docs))
+    first_seconds = time.perf_counter() - t0
+    samples = []
+    for query in queries:
+        t0 = time.perf_counter()
+        pipeline.execute(query, folder=str(docs))
+        samples.append(time.perf_counter() - t0)
+    return {"first_query_seconds": first_seconds, **percentiles(samples)}
+
+def run_size(n_docs: int, args, workdir: Path) -> dict:
+    from modules.retrievers.keywordRetriever import KeywordRetriever
+    from modules.retrievers.semanticRetriever import SemanticRetriever
+
+    size_dir = workdir / f"n{n_docs}"
+    docs = make_corpus(size_dir / "docs", n_docs, seed=args.seed)
+    config = bench_config(size_dir)
+    BaseModule._config = config  # modules read cache paths from here
+
+    queries = make_queries(args.queries, seed=args.seed + 1)
+    ingestion, chunks = bench_ingestion(config, docs, args.workers)
+    semantic_cfg = config["modules"]["retriever"]["semantic"]
+    result = {
+        "docs": n_docs,
+        "ingest": ingestion,
+        "embedding": bench_embedding(chunks, semantic_cfg.get("batch_size", 64)),
+        "retrieval": {
+            "keyword": bench_retrieval(KeywordRetriever(**config["modules"]["retriever"]["keyword"]),
+                                       chunks, queries),
+            "semantic": bench_retrieval(SemanticRetriever(**semantic_cfg), chunks, queries),
+        },
+        "end_to_end": bench_end_to_end(config, docs, queries, not args.real_models),
+    }
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion, embedding, retrieval and pipelines")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000], help="Corpus sizes in documents")
+    parser.add_argument("--queries", type=int, default=50, help="Queries per latency measurement")
+    parser.add_argument("--workers", type=int, default=1, help="Ingestion worker processes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--real-models", action="store_true", help="Use the configured models instead of stubs")
+    parser.add_argument("--out", type=Path, help="Write results JSON here")
+    parser.add_argument("--baseline", type=Path, help="Baseline results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown (default: 0.2)")
+    args = parser.parse_args()
+
+    if not args.real_models:
+        stubs.install_stub_embedder()
+
+    results = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                 "stub_models": not args.real_models, "queries": args.queries,
+                 "workers": args.workers, "seed": args.seed,
+                 "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="aiplayground-bench-") as tmp:
+        for n_docs in args.sizes:
+            print(f"Benchmarking {n_docs} documents...", file=sys.stderr)
+            results["results"][str(n_docs)] = run_size(n_docs, args, Path(tmp))
+
+    dump = json.dumps(results, indent=2)
+    if args.out:
+        args.out.write_text(dump, encoding="utf-8")
+    else:
+        print(dump)
+
+    if args.baseline:
+        regressions = compare.compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        compare.report(regressions)
+        sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
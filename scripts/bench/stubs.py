@@ -0,0 +1,56 @@
+"""
+Deterministic stand-ins for the embedding and generation models, so
+benchmarks run offline and measure the code around the models.
+"""
+
+import hashlib
+import numpy as np
+import utils.vectorizer
+
+
+class StubEmbedder:
+    """Hashed bag-of-words encoder with the SentenceTransformer `encode` signature."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _encode_one(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for word in text.lower().split():
+            h = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+            vec[h % self.dim] += 1.0 if (h >> 32) & 1 else -1.0
+        return vec
+
+    def encode(self, texts, batch_size: int = 32, **kwargs):
+        if isinstance(texts, str):
+            return self._encode_one(texts)
+        return np.stack([self._encode_one(t) for t in texts]) if texts else np.zeros((0, self.dim), np.float32)
+
+
+class StubTextPipeline:
+    """
+    Replaces the HF text2text pipeline of FlanT5Generator: answers with the
+    first sentence of the prompt's context, keeping prompt building in the loop.
+    """
+
+    tokenizer = None
+
+    def __call__(self, prompts, **kwargs):
+        outs = []
+        for prompt in prompts:
+            context = prompt.split("Context:\n", 1)[-1]
+            # same shape as the HF pipeline for a list of prompts: one dict per prompt
+            outs.append({"generated_text": context.split(".", 1)[0].strip() + "."})
+        return outs
+
+
+def install_stub_embedder(dim: int = 384) -> None:
+    """Route utils.vectorizer (and everything using it) to the stub encoder."""
+    embedder = StubEmbedder(dim)
+    utils.vectorizer.get_model = lambda model_name: embedder
+
+def install_stub_generator(pipeline) -> None:
+    """Swap the HF pipeline of every FlanT5 generator in a GenericPipeline."""
+    for module in pipeline.modules:
+        if hasattr(module, "_pipe"):
+            module._pipe = StubTextPipeline()
@@ -0,0 +1,216 @@
+"""
+Build the semantic index offline, so the first query after a docs update
+does not pay for embedding the whole corpus on one core.
+
+    1. ingest `data.docs_path` with the pipeline's ingestor
+    2. find the chunks the embedding store does not hold yet
+    3. encode them in a process pool; each worker loads its own model through
+       utils.vectorizer.get_model and writes every finished shard to disk
+    4. merge the shards into the store SemanticRetriever reads (the embeddings
+       pickle, or the chunk store's id-aligned vectors with `chunk_store: true`)
+       and build its scoring matrix / IVF / quantized files
+
+Shards are the checkpoints: they live under `<embeddings cache>.build/<model>/`
+and are keyed by chunk text digest, so an interrupted build skips every chunk
+already encoded when it is run again, even if some documents changed meanwhile.
+The build directory is removed after a successful merge.
+
+Run:
+    python -m scripts.build_index [--pipeline qa] [--workers 4] [--shard-size 1024]
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import time
+import numpy as np
+import yaml
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from modules.pipelines.factory import PipelineFactory
+from modules.retrievers.semanticRetriever import SemanticRetriever
+from utils.chunkstore import StoredChunks
+from utils.fileio import atomic_write
+
+with open(Path(__file__).parent.parent / "config.yaml", "r") as f:
+    config = yaml.safe_load(f)
+
+
+def _init_worker(model_name: str, threads: int) -> None:
+    """Pool initializer: cap intra-op threads and load this worker's model once."""
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    from utils.vectorizer import get_model
+    get_model(model_name)
+
+def encode_shard(path: str, keys: list, texts: list, model_name: str, batch_size: int):
+    """
+    Encode one shard and write it to `path` (keys + vectors, atomically).
+
+    Returns:
+        tuple: (worker pid, chunks encoded, seconds spent encoding).
+    """
+    from utils.vectorizer import vectorize_all
+    t0 = time.perf_counter()
+    vectors = np.asarray(vectorize_all(texts, model_name=model_name, batch_size=batch_size), dtype=np.float32)
+    seconds = time.perf_counter() - t0
+    buffer = io.BytesIO()
+    np.savez(buffer, keys=np.array(keys), vectors=vectors)
+    atomic_write(path, buffer.getvalue())
+    return os.getpid(), len(texts), seconds
+
+def load_shards(build_dir: Path) -> dict:
+    """Vectors of every finished shard in `build_dir`, by text digest."""
+    done = {}
+    for path in sorted(build_dir.glob("shard-*.npz")):
+        with np.load(path) as shard:
+            done.update(zip(shard["keys"].tolist(), shard["vectors"]))
+    return done
+
+def semantic_retrievers(pipeline) -> list:
+    """SemanticRetriever steps of a pipeline, including hybrid branches, each once."""
+    found = []
+    for module in pipeline.modules:
+        for candidate in [module, *getattr(module, "branches", {}).values()]:
+            if isinstance(candidate, SemanticRetriever) and all(candidate is not f for f in found):
+                found.append(candidate)
+    return found
+
+def pending_chunks(retriever: SemanticRetriever, chunks) -> dict:
+    """Chunks without a stored embedding: text digest -> text, in corpus order."""
+    if isinstance(chunks, StoredChunks):
+        missing = np.unique(chunks.store.vectors(retriever.embedding_key).missing(chunks.ids))
+        return dict(zip(chunks.store.digest_hex(missing), chunks.store.get_many(missing)))
+    cache = retriever._load_embedding_cache()
+    return {SemanticRetriever._text_key(text): text for text in chunks
+            if (text, retriever.embedding_key) not in cache}
+
+def merge(retriever: SemanticRetriever, chunks, vectors: dict) -> int:
+    """Write encoded vectors into the store the retriever reads; returns rows written."""
+    if isinstance(chunks, StoredChunks):
+        store_vectors = chunks.store.vectors(retriever.embedding_key)
+        ids = np.unique(chunks.ids)
+        rows = [(i, key) for i, key in zip(ids, chunks.store.digest_hex(ids)) if key in vectors]
+        store_vectors.put([i for i, _ in rows], np.array([vectors[key] for _, key in rows]))
+        store_vectors.flush()
+        return len(rows)
+    cache = retriever._load_embedding_cache()
+    written = 0
+    for text in chunks:
+        vec = vectors.get(SemanticRetriever._text_key(text))
+        if vec is not None and (text, retriever.embedding_key) not in cache:
+            cache[(text, retriever.embedding_key)] = vec
+            written += 1
+    if written:
+        retriever._save_embedding_cache()
+    return written
+
+def checkpoint_dir(retriever: SemanticRetriever) -> Path:
+    """Where shards for this retriever's embedding cache and model (+ backend) are written."""
+    model_slug = hashlib.sha1(retriever.embedding_key.encode("utf-8")).hexdigest()[:12]
+    return retriever.cache_file.with_suffix(".build") / model_slug
+
+def build(retriever: SemanticRetriever, chunks, args) -> dict:
+    """Encode and merge everything `retriever` is missing for `chunks`; returns throughput stats."""
+    build_dir = checkpoint_dir(retriever)
+    build_dir.mkdir(parents=True, exist_ok=True)
+
+    pending = pending_chunks(retriever, chunks)
+    done = load_shards(build_dir)
+    todo = [key for key in pending if key not in done]
+    print(f"{retriever.model_name}: {len(chunks)} chunks, {len(pending)} without embeddings, "
+          f"{len(pending) - len(todo)} already in checkpoints", file=sys.stderr)
+
+    workers = max(1, args.workers)
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    next_shard = 1 + max((int(p.stem.split("-")[1]) for p in build_dir.glob("shard-*.npz")), default=-1)
+    per_worker = defaultdict(lambda: {"chunks": 0, "seconds": 0.0})
+    t0 = time.perf_counter()
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(retriever.model_name, threads)) as pool:
+            futures = []
+            for start in range(0, len(todo), args.shard_size):
+                keys = todo[start:start + args.shard_size]
+                path = build_dir / f"shard-{next_shard:05d}.npz"
+                next_shard += 1
+                futures.append(pool.submit(encode_shard, str(path), keys, [pending[k] for k in keys],
+                                           retriever.model_name, retriever.batch_size))
+            try:
+                encoded = 0
+                for future in as_completed(futures):
+                    pid, n, seconds = future.result()
+                    per_worker[pid]["chunks"] += n
+                    per_worker[pid]["seconds"] += seconds
+                    encoded += n
+                    print(f"  checkpoint: {encoded}/{len(todo)} chunks encoded", file=sys.stderr)
+            except KeyboardInterrupt:
+                pool.shutdown(wait=False, cancel_futures=True)
+                print(f"Interrupted; finished shards are kept in {build_dir}, rerun to resume",
+                      file=sys.stderr)
+                raise
+    encode_seconds = time.perf_counter() - t0
+
+    written = merge(retriever, chunks, load_shards(build_dir))
+    t1 = time.perf_counter()
+    retriever.prepare(chunks)  # scoring matrix and its saved IVF / quantized files
+    shutil.rmtree(build_dir, ignore_errors=True)
+    if not any(build_dir.parent.iterdir()):
+        build_dir.parent.rmdir()
+
+    encoded = sum(w["chunks"] for w in per_worker.values())
+    return {
+        "model": retriever.model_name,
+        "chunks": len(chunks),
+        "encoded": encoded,
+        "merged": written,
+        "workers": {str(pid): {**w, "chunks_per_s": w["chunks"] / max(w["seconds"], 1e-9)}
+                    for pid, w in per_worker.items()},
+        "encode_seconds": encode_seconds,
+        "chunks_per_s": encoded / max(encode_seconds, 1e-9),
+        "prepare_seconds": time.perf_counter() - t1,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed the docs ahead of time with several worker processes")
+    parser.add_argument("--pipeline", type=str, default="qa", help="Pipeline whose ingestor/retriever to build for")
+    parser.add_argument("--docs", type=str, default=config["data"]["docs_path"], help="Documents folder")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Encoding processes")
+    parser.add_argument("--threads-per-worker", type=int, help="Torch threads per worker (default: cores / workers)")
+    parser.add_argument("--shard-size", type=int, default=1024, help="Chunks per shard (checkpoint granularity)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    pipeline = PipelineFactory.create(config, args.pipeline)
+    retrievers = semantic_retrievers(pipeline)
+    if not retrievers:
+        parser.error(f"pipeline '{args.pipeline}' has no semantic retriever")
+
+    t0 = time.perf_counter()
+    chunks = pipeline.ingest(args.docs)
+    report = {"pipeline": args.pipeline, "ingest_seconds": time.perf_counter() - t0,
+              "indexes": [build(retriever, chunks, args) for retriever in retrievers]}
+    report["total_seconds"] = time.perf_counter() - t0
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"Ingested {len(chunks)} chunks in {report['ingest_seconds']:.2f}s")
+    for index in report["indexes"]:
+        for pid, w in sorted(index["workers"].items()):
+            print(f"  worker {pid}: {w['chunks']} chunks in {w['seconds']:.2f}s ({w['chunks_per_s']:.1f} chunks/s)")
+        print(f"{index['model']}: encoded {index['encoded']} chunks in {index['encode_seconds']:.2f}s "
+              f"({index['chunks_per_s']:.1f} chunks/s overall), merged {index['merged']}, "
+              f"prepared in {index['prepare_seconds']:.2f}s")
+    print(f"Total time: {report['total_seconds']:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Compare inference backends (utils/inference.py) against the full-precision models.
+
+For the embedding model and a configured generator, every requested backend
+is loaded next to the "torch" baseline and measured on the same inputs:
+    - latency (per batch / per prompt) and throughput
+    - memory: model size and resident-memory growth while loading
+    - output agreement with the baseline: cosine similarity of embeddings and
+      overlap of their top-k neighbours; exact-match rate and text similarity
+      of greedy generations
+
+Inputs are chunks of the configured docs (SimpleIngestor, no cache) and
+synthetic queries, or queries from a JSONL file.
+
+Run:
+    python -m scripts.compare_backends [--backends int8 onnx] [--generator flan_alpaca_base] [--out report.json]
+"""
+
+import argparse
+import difflib
+import gc
+import io
+import json
+import sys
+import time
+import numpy as np
+import yaml
+from pathlib import Path
+from scripts.bench.corpus import make_queries
+from scripts.bench.run import percentiles
+from utils.metrics import rss_mb
+from utils.vectors import normalize
+
+ROOT = Path(__file__).parent.parent
+
+with open(ROOT / "config.yaml", "r") as f:
+    config = yaml.safe_load(f)
+
+
+def model_size_mb(model, onnx_path: str = None) -> float | None:
+    """Size of the ONNX graph files if given, else of the torch module's serialized state dict."""
+    if onnx_path and Path(onnx_path).is_dir():
+        return sum(p.stat().st_size for p in Path(onnx_path).rglob("*.onnx*")) / (1 << 20)
+    import torch
+    if not isinstance(model, torch.nn.Module):
+        return None
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / (1 << 20)
+
+def load_measured(load):
+    """Call `load()` and return (model, seconds, RSS growth in MiB)."""
+    gc.collect()
+    before = rss_mb()
+    t0 = time.perf_counter()
+    model = load()
+    seconds = time.perf_counter() - t0
+    after = rss_mb()
+    return model, seconds, (after - before) if before is not None and after is not None else None
+
+def top_k(doc_vectors: np.ndarray, query_vectors: np.ndarray, k: int) -> np.ndarray:
+    scores = query_vectors @ doc_vectors.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+def encode_timed(model, texts: list, batch_size: int):
+    model.encode(texts[:batch_size], batch_size=batch_size)  # warm-up
+    samples, vectors = [], []
+    for i in range(0, len(texts), batch_size):
+        t0 = time.perf_counter()
+        vectors.append(np.asarray(model.encode(texts[i:i + batch_size], batch_size=batch_size)))
+        samples.append(time.perf_counter() - t0)
+    return normalize(np.vstack(vectors).astype(np.float32)), samples
+
+def compare_embedder(backends: list, texts: list, queries: list, args) -> dict:
+    from utils.inference import load_sentence_transformer
+    from utils.vectorizer import backend_settings
+
+    model_name = config["embedding"]["model_name"]
+    device = config["embedding"]["device"]
+    onnx_path = backend_settings(model_name).get("onnx_path")
+    report = {"model": model_name, "texts": len(texts), "backends": {}}
+    baseline = None
+    for backend in ["torch", *backends]:
+        model, load_seconds, load_mb = load_measured(
+            lambda: load_sentence_transformer(model_name, device, backend, onnx_path))
+        doc_vectors, samples = encode_timed(model, texts, args.batch_size)
+        query_vectors = normalize(np.asarray(model.encode(queries), dtype=np.float32))
+        result = {
+            "load_seconds": load_seconds, "load_rss_mb": load_mb,
+            "model_mb": model_size_mb(model, onnx_path if backend == "onnx" else None),
+            "batch_latency": percentiles(samples),
+            "texts_per_s": len(texts) / sum(samples),
+        }
+        neighbours = top_k(doc_vectors, query_vectors, args.k)
+        if baseline is None:
+            baseline = (doc_vectors, neighbours)
+        else:
+            cosine = np.sum(doc_vectors * baseline[0], axis=1)
+            overlap = [len(set(a) & set(b)) / args.k for a, b in zip(neighbours, baseline[1])]
+            result["agreement"] = {"cosine_mean": float(cosine.mean()), "cosine_min": float(cosine.min()),
+                                   f"top{args.k}_overlap": float(np.mean(overlap))}
+        report["backends"][backend] = result
+        del model
+    return report
+
+def compare_generator(backends: list, texts: list, queries: list, args) -> dict:
+    from modules.generators.factory import GeneratorFactory
+
+    gen_config = config["modules"]["generator"][args.generator]
+    # contexts for each query: its top chunks by keyword overlap, the same for every backend
+    words = [set(t.lower().split()) for t in texts]
+    requests = []
+    for query in queries:
+        q = set(query.lower().rstrip("?").split())
+        ranked = sorted(range(len(texts)), key=lambda i: -len(q & words[i]))
+        requests.append((query, [texts[i] for i in ranked[:args.contexts]]))
+
+    report = {"generator": args.generator, "prompts": len(requests), "backends": {}}
+    baseline = None
+    for backend in ["torch", *backends]:
+        generator = GeneratorFactory.create({**gen_config, "backend": backend})
+        _, load_seconds, load_mb = load_measured(generator.load)
+        prompts = [generator._build_prompt(q, ctx) for q, ctx in requests]
+        pipe = generator.pipe
+        pipe(prompts[0], max_new_tokens=8, do_sample=False)  # warm-up
+        answers, samples = [], []
+        for prompt in prompts:
+            t0 = time.perf_counter()
+            # greedy decoding so differences come from the backend, not sampling
+            out = pipe(prompt, max_new_tokens=generator.max_new_tokens, do_sample=False)
+            samples.append(time.perf_counter() - t0)
+            answers.append(out[0]["generated_text"].strip())
+        n_tokens = sum(len(ids) for ids in pipe.tokenizer(answers)["input_ids"])
+        result = {
+            "load_seconds": load_seconds, "load_rss_mb": load_mb,
+            "model_mb": model_size_mb(pipe.model, generator.onnx_path if backend == "onnx" else None),
+            "latency": percentiles(samples),
+            "tokens_per_s": n_tokens / sum(samples),
+        }
+        if baseline is None:
+            baseline = answers
+        else:
+            result["agreement"] = {
+                "exact_match": float(np.mean([a == b for a, b in zip(answers, baseline)])),
+                "similarity": float(np.mean([difflib.SequenceMatcher(None, a, b).ratio()
+                                             for a, b in zip(answers, baseline)])),
+            }
+        report["backends"][backend] = result
+        del generator, pipe
+    return report
+
+def load_texts(docs: str, limit: int) -> list:
+    from modules.ingestors.simpleIngestor import SimpleIngestor
+    chunks = SimpleIngestor(**{**config["modules"]["ingestor"]["simple"], "use_cache": False}).ingest(docs)
+    return list(chunks)[:limit]
+
+def load_queries(args) -> list:
+    if not args.queries_file:
+        return make_queries(args.queries, seed=args.seed)
+    from scripts.query import read_queries
+    with open(args.queries_file, "r", encoding="utf-8") as f:
+        return [query for _, query in read_queries(f) if isinstance(query, str) and query.strip()][:args.queries]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare quantized/ONNX inference backends with the torch models")
+    parser.add_argument("--backends", nargs="+", default=["int8"], choices=["int8", "onnx"],
+                        help="Backends to compare against torch (default: int8)")
+    parser.add_argument("--generator", type=str, default="flan_alpaca_base",
+                        help="Generator entry under modules.generator in config.yaml")
+    parser.add_argument("--skip-embedder", action="store_true")
+    parser.add_argument("--skip-generator", action="store_true")
+    parser.add_argument("--docs", type=str, default=config["data"]["docs_path"], help="Documents to embed")
+    parser.add_argument("--texts", type=int, default=512, help="Chunks to embed")
+    parser.add_argument("--queries", type=int, default=20, help="Queries (and generation prompts)")
+    parser.add_argument("--queries-file", type=str, help="JSONL queries instead of synthetic ones")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--k", type=int, default=10, help="Neighbours compared for embedding agreement")
+    parser.add_argument("--contexts", type=int, default=3, help="Contexts per generation prompt")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", type=Path, help="Write the report JSON here")
+    args = parser.parse_args()
+
+    texts = load_texts(args.docs, args.texts)
+    if not texts:
+        parser.error(f"no chunks found in {args.docs}")
+    queries = load_queries(args)
+    report = {"meta": {"backends": args.backends, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}}
+    if not args.skip_embedder:
+        print("Comparing embedding backends...", file=sys.stderr)
+        report["embedder"] = compare_embedder(args.backends, texts, queries, args)
+    if not args.skip_generator:
+        print("Comparing generator backends...", file=sys.stderr)
+        report["generator"] = compare_generator(args.backends, texts, queries, args)
+
+    dump = json.dumps(report, indent=2)
+    if args.out:
+        args.out.write_text(dump, encoding="utf-8")
+    else:
+        print(dump)
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,23 @@
 CLI entrypoint for querying docs using pipelines
 """
 
+import time
+_PROCESS_START = time.perf_counter()
+
 import argparse
+import sys
 import yaml
 import json
-import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from modules.pipelines.factory import PipelineFactory
+from modules.retrievers.base import BaseRetriever
+from utils.metrics import metrics
+
+# Heavy libraries (transformers, sentence-transformers, nltk) are imported lazily,
+# so this should stay small; --timing reports it to catch regressions.
+_IMPORT_TIME = time.perf_counter() - _PROCESS_START
 
 # Load config
 with open(Path(__file__).parent.parent / "config.yaml", "r") as f:
@@ -15,13 +26,26 @@ with open(Path(__file__).parent.parent / "config.yaml", "r") as f:
 
 def main():
     parser = argparse.ArgumentParser(description="Query the AIPlayground knowledge base")
-    parser.add_argument("query", type=str, help="Your query/question")
+    parser.add_argument("query", type=str, nargs="?", help="Your query/question")
     parser.add_argument("--pipeline", type=str, default="rag", help="Pipeline to run (default: qa)")
     parser.add_argument("--rebuild-cache", action="store_true", help="Force rebuild chunk and embedding cache")
     parser.add_argument("--json", action="store_true", help="Return results as JSON")
     parser.add_argument("--timing", action="store_true", help="Print timing for each step and total time")
     parser.add_argument("--summary", action="store_true", help="Print ingestor summary")
+    parser.add_argument("--stream", action="store_true", help="Print the answer token by token as it is generated")
+    parser.add_argument("--batch", type=str, metavar="FILE",
+                        help="Answer JSONL queries from FILE ('-' for stdin), one JSON result per line")
+    parser.add_argument("--output", type=str, metavar="FILE", help="Batch mode: write results here instead of stdout")
+    parser.add_argument("--batch-size", type=int, default=64, help="Batch mode: queries embedded/generated together")
+    parser.add_argument("--workers", type=int, default=1, help="Batch mode: batches processed in parallel")
+    parser.add_argument("--metrics-json", type=str, metavar="PATH",
+                        help="Write per-stage metrics as JSON to PATH ('-' for stdout)")
     args = parser.parse_args()
+    if (args.query is None) == (args.batch is None):
+        parser.error("give either a query or --batch FILE")
+    if args.stream and args.summary:
+        # streamed answers do not keep the ingested chunks to summarize
+        parser.error("--summary cannot be combined with --stream")
 
     total_start = time.time()
 
@@ -29,17 +53,28 @@ def main():
     if args.rebuild_cache:
         Path(config["data"]["chunks_cache_path"]).unlink(missing_ok=True)
         Path(config["data"]["embeddings_cache_path"]).unlink(missing_ok=True)
-        print("Cache cleared: chunks + embeddings")
+        print("Cache cleared: chunks + embeddings", file=sys.stderr if args.batch else sys.stdout)
 
     # Build pipeline
     pipeline = PipelineFactory.create(config, args.pipeline)
 
     # ... top stays the same
 
+    if args.batch:
+        run_batch(pipeline, args)
+        dump_metrics(args)
+        return
+
+    if args.stream:
+        run_stream(pipeline, args, total_start)
+        dump_metrics(args)
+        return
+
     # Run pipeline
     t0 = time.time()
     results = pipeline.run(args.query, folder=config["data"]["docs_path"])
     t1 = time.time()
+    time_to_first_result = time.perf_counter() - _PROCESS_START
 
     print("Query:", args.query)
     print("Results:")
@@ -64,11 +99,136 @@ def main():
     # Ingest summary on exactly the chunks used
     if args.summary and getattr(pipeline, "last_chunks", None):
         from modules.ingestors.base import BaseIngestor
-        BaseIngestor.print_ingest_summary(pipeline.last_chunks)
+        ingestor = next((m for m in pipeline.modules if isinstance(m, BaseIngestor)), None)
+        BaseIngestor.print_ingest_summary(pipeline.last_chunks, getattr(ingestor, "last_ingest_stats", None))
+    elif args.summary and getattr(pipeline, "last_cached", False):
+        print(f"No ingest summary: the result came from the {pipeline.last_cached} cache, nothing was ingested.")
 
     if args.timing:
+        print(f"Import time: {_IMPORT_TIME:.3f}s")
+        print(f"Time to first result: {time_to_first_result:.2f}s")
         print(f"Pipeline time: {t1 - t0:.2f}s")
         print(f"Total time: {time.time() - total_start:.2f}s")
 
+    dump_metrics(args)
+
+def run_stream(pipeline, args, total_start: float) -> None:
+    """Print retrieved contexts, then the answer as its tokens arrive."""
+    print("Query:", args.query)
+    t0 = time.time()
+    first_token_at = None
+    for event in pipeline.stream(args.query, folder=config["data"]["docs_path"]):
+        if event["event"] == "retrieval":
+            pipeline.last_retrieval = event["results"]
+        elif event["event"] == "token":
+            if first_token_at is None:
+                first_token_at = time.time() - t0
+                print("Ans: ", end="")
+            print(event["text"], end="", flush=True)
+        elif event["event"] == "done":
+            if event["answer"] is None:
+                # retrieval-only pipeline
+                print(f"{pipeline.last_retrieval}")
+            else:
+                print()
+    t1 = time.time()
+
+    if args.timing:
+        print(f"Import time: {_IMPORT_TIME:.3f}s")
+        if first_token_at is not None:
+            print(f"Time to first token: {first_token_at:.2f}s")
+        print(f"Pipeline time: {t1 - t0:.2f}s")
+        print(f"Total time: {time.time() - total_start:.2f}s")
+
+def dump_metrics(args) -> None:
+    if args.metrics_json:
+        dump = json.dumps(metrics.snapshot(), indent=2)
+        if args.metrics_json == "-":
+            print(dump)
+        else:
+            Path(args.metrics_json).write_text(dump, encoding="utf-8")
+
+def read_queries(lines):
+    """
+    Yield (id, query) from JSONL lines: {"query": ..., "id": ...} objects or
+    bare JSON strings. Lines that are not JSON are taken as the query text.
+    """
+    for n, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            item = line
+        if isinstance(item, dict):
+            yield item.get("id", n), item.get("query")
+        else:
+            yield n, item
+
+def answer_batch(pipeline, chunks, batch: list) -> list:
+    """Run one batch of (id, query) pairs and return their JSON result lines."""
+    valid = [pos for pos, (_, query) in enumerate(batch) if isinstance(query, str) and query.strip()]
+    states = pipeline.execute_batch([batch[pos][1] for pos in valid], chunks) if valid else []
+    by_pos = dict(zip(valid, states))
+    lines = []
+    for pos, (qid, query) in enumerate(batch):
+        state = by_pos.get(pos)
+        if state is None:
+            lines.append(json.dumps({"id": qid, "query": query, "error": "'query' must be a non-empty string"}))
+            continue
+        result = {
+            "id": qid,
+            "query": query,
+            "results": [{"text": text, "score": float(score)} for text, score in state["retrieval"] or []],
+            "cached": state["cached"],
+            "timings": {k: round(v, 3) for k, v in state["timings"].items()},
+        }
+        if state["answer"] is not None:
+            result["answer"] = state["answer"]
+        lines.append(json.dumps(result, ensure_ascii=False))
+    return lines
+
+def run_batch(pipeline, args) -> None:
+    """
+    Batch mode: ingest and warm once, then answer queries batch by batch.
+    With --workers > 1, batches run on a thread pool (model and NumPy calls
+    release the GIL); results are still written in input order.
+    """
+    t0 = time.perf_counter()
+    chunks = pipeline.ingest(config["data"]["docs_path"])
+    pipeline.prepare(chunks)
+    print(f"Loaded {len(chunks)} chunks in {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+
+    source = sys.stdin if args.batch == "-" else open(args.batch, "r", encoding="utf-8")
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    batches = BaseRetriever.iter_batches(read_queries(source), args.batch_size)
+    n_queries = 0
+    t0 = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            window = deque()
+            for batch in batches:
+                window.append(pool.submit(answer_batch, pipeline, chunks, batch))
+                # keep a bounded number of batches in flight so stdin can stream
+                while len(window) > max(1, args.workers) * 2 or (window and window[0].done()):
+                    n_queries += write_lines(out, window.popleft().result())
+            while window:
+                n_queries += write_lines(out, window.popleft().result())
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - t0
+    print(f"Answered {n_queries} queries in {elapsed:.2f}s ({n_queries / max(elapsed, 1e-9):.1f} queries/s)",
+          file=sys.stderr)
+
+def write_lines(out, lines: list) -> int:
+    for line in lines:
+        out.write(line + "\n")
+    out.flush()
+    return len(lines)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
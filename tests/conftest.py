@@ -0,0 +1,119 @@
+"""
+Shared fixtures: the parsed config (optionally with cache paths under
+tmp_path), a deterministic stand-in for the embedding model, the vector
+helpers and the module and pipeline factories several test files use.
+"""
+
+import copy
+import numpy as np
+import pytest
+import yaml
+from pathlib import Path
+from modules.baseModule import BaseModule
+from modules.generators.flanT5 import FlanT5Generator
+from modules.ingestors.simpleIngestor import SimpleIngestor
+from modules.pipelines.generic import GenericPipeline
+from modules.retrievers.cascadeRetriever import CascadeRetriever
+from modules.retrievers import semanticRetriever
+
+with open(Path(__file__).parent.parent / "config.yaml", "r") as f:
+    _CONFIG = yaml.safe_load(f)
+
+
+def _fake_vectorize_string(text, model_name=None):
+    seed = int.from_bytes(text.encode("utf-8")[-8:].rjust(8, b"\0"), "little")
+    return np.random.default_rng(seed).normal(size=16).astype(np.float32)
+
+def _fake_vectorize_all(texts, model_name=None, batch_size=32):
+    return np.stack([_fake_vectorize_string(t) for t in texts])
+
+def _clustered_vectors(n, dim=32, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return (centers[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, dim))).astype(np.float32)
+
+def _assert_same_ranking(a, b):
+    assert [chunk for chunk, _ in a] == [chunk for chunk, _ in b]
+    assert np.allclose([score for _, score in a], [score for _, score in b], atol=1e-5)
+
+class WordTokenizer:
+    """One token per whitespace-separated word; counts its calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text, add_special_tokens=True):
+        self.calls += 1
+        return {"input_ids": text.split()}
+
+class WordTokenizerPipe:
+    def __init__(self):
+        self.tokenizer = WordTokenizer()
+
+
+@pytest.fixture
+def fake_embedder(monkeypatch):
+    """SemanticRetriever embeds with a seeded random vector per text instead of a model."""
+    monkeypatch.setattr(semanticRetriever, "vectorize_all", _fake_vectorize_all)
+    monkeypatch.setattr(semanticRetriever, "vectorize_string", _fake_vectorize_string)
+    return _fake_vectorize_string
+
+@pytest.fixture
+def config():
+    """A fresh copy of config.yaml, free to modify."""
+    return copy.deepcopy(_CONFIG)
+
+@pytest.fixture
+def bench_config(config, tmp_path, monkeypatch):
+    """`config` with every cache path under tmp_path, installed as the module config."""
+    config["data"].update({
+        "chunks_cache_path": str(tmp_path / "chunks.json"),
+        "embeddings_cache_path": str(tmp_path / "embeddings.pkl"),
+        "keyword_index_path": str(tmp_path / "keyword_index.pkl"),
+        "chunk_store_path": str(tmp_path / "chunk_store"),
+    })
+    config["cache"]["result"]["path"] = str(tmp_path / "results")
+    monkeypatch.setattr(BaseModule, "_config", config)
+    return config
+
+@pytest.fixture
+def make_pipeline(config):
+    """Factory: a GenericPipeline over `config` (redirected when bench_config is also used)."""
+    def make(sequence, shared_modules=None, **pipeline_config):
+        return GenericPipeline(config, {"sequence": sequence, **pipeline_config}, shared_modules=shared_modules)
+    return make
+
+@pytest.fixture
+def clustered_vectors():
+    """Factory: (n, dim) float32 vectors drawn around a few random centers."""
+    return _clustered_vectors
+
+@pytest.fixture
+def assert_same_ranking():
+    """Check that two (chunk, score) rankings agree up to float rounding."""
+    return _assert_same_ranking
+
+@pytest.fixture
+def make_ingestor(tmp_path):
+    """Factory: a SimpleIngestor (3-word chunks) whose chunk cache lives under tmp_path/cache."""
+    def make(**kwargs):
+        ingestor = SimpleIngestor(chunk_size=3, **kwargs)
+        ingestor.cache_file = tmp_path / "cache" / "chunks.json"
+        return ingestor
+    return make
+
+@pytest.fixture
+def make_generator():
+    """Factory: a FlanT5Generator that never loads a model; `pipe` defaults to a word tokenizer."""
+    def make(pipe=None, **kwargs):
+        generator = FlanT5Generator(**kwargs)
+        generator._pipe = pipe if pipe is not None else WordTokenizerPipe()
+        return generator
+    return make
+
+@pytest.fixture
+def make_cascade(fake_embedder, bench_config):
+    """Factory: a CascadeRetriever with the fake embedder and its caches under tmp_path."""
+    def make(**kwargs):
+        return CascadeRetriever(**kwargs)
+    return make
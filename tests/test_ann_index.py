@@ -0,0 +1,62 @@
+"""
+Tests for the IVF approximate nearest-neighbour backend
+"""
+
+import numpy as np
+from modules.retrievers import semanticRetriever
+from modules.retrievers.annIndex import IVFIndex, recall_against_exact
+from utils.vectors import normalize
+
+def test_ivf_recall_against_exact(clustered_vectors):
+    vectors = clustered_vectors(3000)
+    queries = clustered_vectors(50, seed=1)
+    index = IVFIndex(nlist=32, nprobe=8)
+    index.train(vectors)
+    index.add(vectors, np.arange(len(vectors)))
+
+    assert recall_against_exact(index, vectors, np.arange(len(vectors)), queries, k=10) >= 0.9
+    assert recall_against_exact(index, vectors, np.arange(len(vectors)), queries, k=10, nprobe=32) == 1.0
+
+def test_ivf_incremental_add_remove_and_save(tmp_path, clustered_vectors):
+    vectors = clustered_vectors(500)
+    index = IVFIndex(nlist=8, nprobe=8)
+    index.train(vectors[:400])
+    index.add(vectors[:400], np.arange(400))
+    index.add(vectors[400:], np.arange(400, 500))
+    index.remove([450])
+    assert len(index) == 499
+
+    path = tmp_path / "index.ivf.npz"
+    index.save(path, extra={"keys": np.array(["a", "b"])})
+    loaded, extra = IVFIndex.load(path)
+    assert extra["keys"].tolist() == ["a", "b"]
+    lookup = lambda ids: normalize(vectors[ids])
+    top = loaded.search(vectors[450], 5, lookup)
+    assert 450 not in [i for i, _ in top]
+    assert loaded.search(vectors[420], 1, lookup)[0][0] == 420
+
+def test_semantic_ivf_matches_exact_with_full_probe(fake_embedder, assert_same_ranking):
+    chunks = [f"chunk number {i}" for i in range(300)]
+    ann = {"nlist": 8, "nprobe": 8, "min_vectors": 10}
+    exact = semanticRetriever.SemanticRetriever(top_k=5, use_cache=False)
+    ivf = semanticRetriever.SemanticRetriever(top_k=5, use_cache=False, index="ivf", ann=ann)
+
+    assert_same_ranking(ivf.retrieve("chunk number 7", chunks), exact.retrieve("chunk number 7", chunks))
+    # chunk set changes are applied incrementally
+    chunks = chunks[10:] + ["a brand new chunk"]
+    assert ivf.retrieve("a brand new chunk", chunks)[0][0] == "a brand new chunk"
+    assert_same_ranking(ivf.retrieve("chunk number 3", chunks), exact.retrieve("chunk number 3", chunks))
+
+def test_saved_ivf_is_keyed_by_model(fake_embedder, bench_config, assert_same_ranking):
+    chunks = [f"chunk number {i}" for i in range(300)]
+    ann = {"nlist": 8, "nprobe": 8, "min_vectors": 10}
+    first = semanticRetriever.SemanticRetriever(model_name="model-a", index="ivf", ann=ann)
+    first.prepare(chunks)
+    assert not hasattr(first._ann, "_list_vecs")  # ids only; vectors are read from the matrix
+
+    other = semanticRetriever.SemanticRetriever(model_name="model-b", index="ivf", ann=ann)
+    other.prepare(chunks)
+    _, extra = IVFIndex.load(other.ann_file)
+    assert str(extra["model_name"]) == "model-b"
+    exact = semanticRetriever.SemanticRetriever(model_name="model-b", use_cache=False)
+    assert_same_ranking(other.retrieve("chunk number 7", chunks), exact.retrieve("chunk number 7", chunks))
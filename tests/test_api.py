@@ -0,0 +1,155 @@
+"""
+Tests for the HTTP query service
+"""
+
+import asyncio
+import json
+from api import main as api
+
+
+class StubPipeline:
+    def __init__(self):
+        self.loads = 0
+
+    def ingest(self, folder):
+        self.loads += 1
+        return ["dogs are great pets", "i love pizza"]
+
+    def prepare(self, chunks):
+        pass
+
+    def execute(self, query, chunks=None):
+        return {"retrieval": [(chunks[0], 0.9)], "answer": "dogs"}
+
+    def stream(self, query, chunks=None):
+        self.stream_closed = False
+        try:
+            yield {"event": "retrieval", "results": [(chunks[0], 0.9)]}
+            for word in ("dogs ", "are "):
+                yield {"event": "token", "text": word}
+            yield {"event": "done", "answer": "dogs are"}
+        finally:
+            self.stream_closed = True
+
+
+class StubWriter:
+    def __init__(self, fail_after: int = None):
+        self.data = b""
+        self.closed = False
+        self.fail_after = fail_after  # drains before the client "disconnects"
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        if self.fail_after is not None:
+            if self.fail_after == 0:
+                raise ConnectionResetError("client went away")
+            self.fail_after -= 1
+
+    def close(self):
+        self.closed = True
+
+
+def make_service(monkeypatch, max_pending=4):
+    monkeypatch.setattr(api.PipelineFactory, "create", lambda config, name, shared_modules=None: StubPipeline())
+    service = api.QueryService(api.config, ["rag", "qa"], workers=1, max_pending=max_pending)
+    service.load()
+    return service
+
+def request(service, raw: bytes, writer: StubWriter = None):
+    """Send raw request bytes through serve_connection; returns (status, headers, body)."""
+    writer = writer or StubWriter()
+
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        await service.serve_connection(reader, writer)
+        assert writer.closed
+        return writer.data
+    head, _, body = asyncio.run(run()).partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    headers = dict(line.lower().split(": ", 1) for line in lines[1:])
+    return int(lines[0].split()[1]), headers, body
+
+def post(service, path, payload, writer: StubWriter = None):
+    body = json.dumps(payload).encode("utf-8")
+    return request(service, f"POST {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body,
+                   writer)
+
+def dechunk(body: bytes) -> bytes:
+    data = b""
+    while True:
+        size, _, body = body.partition(b"\r\n")
+        size = int(size, 16)
+        if size == 0:
+            return data
+        data, body = data + body[:size], body[size + 2:]
+
+def test_handle_routes(monkeypatch):
+    service = make_service(monkeypatch)
+    handle = lambda *args: asyncio.run(service.handle(*args))
+
+    status, payload = handle("GET", "/health", b"")
+    assert status == 200 and payload["pipelines"] == {"rag": {"chunks": 2}, "qa": {"chunks": 2}}
+    status, payload = handle("POST", "/query", b'{"query": "pets?", "pipeline": "qa"}')
+    assert status == 200 and payload["answer"] == "dogs" and payload["results"][0]["text"] == "dogs are great pets"
+    assert handle("POST", "/health", b"")[0] == 405
+    assert handle("GET", "/query", b"")[0] == 405
+    assert handle("GET", "/nope", b"")[0] == 404
+    assert handle("POST", "/query", b"not json")[0] == 400
+    assert handle("POST", "/query", b"[1]")[0] == 400
+    assert handle("POST", "/query", b'{"query": "  "}')[0] == 400
+    assert handle("POST", "/query", b'{"query": "x", "pipeline": "other"}')[0] == 400
+
+    status, payload = handle("POST", "/reload", b"")
+    assert status == 200 and set(payload["reloaded"]) == {"rag", "qa"}
+    assert service.pipelines["rag"].loads == 2
+    assert service.pending == 0
+
+def test_handle_rejects_when_saturated(monkeypatch):
+    service = make_service(monkeypatch, max_pending=0)
+    status, payload = asyncio.run(service.handle("POST", "/query", b'{"query": "pets?"}'))
+    assert status == 503
+
+def test_serve_connection_json(monkeypatch):
+    service = make_service(monkeypatch)
+    status, headers, body = post(service, "/query", {"query": "pets?"})
+    assert status == 200
+    assert headers["content-type"] == "application/json"
+    assert int(headers["content-length"]) == len(body)
+    assert json.loads(body)["pipeline"] == "rag"
+
+    status, headers, body = request(service, b"GET /health?verbose=1 HTTP/1.1\r\nHost: x\r\n\r\n")
+    assert status == 200 and json.loads(body)["status"] == "ok"
+
+def test_serve_connection_rejects_bad_requests(monkeypatch):
+    service = make_service(monkeypatch)
+    assert request(service, b"\r\n")[0] == 400
+    for length in (b"-5", b"abc", b"1e3"):
+        status, _, body = request(service, b"POST /query HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n{}")
+        assert status == 400, length
+        assert json.loads(body)["error"] == "invalid Content-Length"
+    assert request(service, b"POST /query HTTP/1.1\r\nContent-Length: 10\r\n\r\n{}")[0] == 400
+    too_large = f"POST /query HTTP/1.1\r\nContent-Length: {api._MAX_BODY + 1}\r\n\r\n".encode()
+    assert request(service, too_large)[0] == 413
+
+def test_serve_connection_ndjson_stream(monkeypatch):
+    service = make_service(monkeypatch)
+    status, headers, body = post(service, "/query", {"query": "pets?", "stream": True})
+    assert status == 200
+    assert headers["content-type"] == "application/x-ndjson"
+    assert headers["transfer-encoding"] == "chunked"
+    events = [json.loads(line) for line in dechunk(body).decode("utf-8").splitlines()]
+    assert [e["event"] for e in events] == ["retrieval", "token", "token", "done"]
+    assert events[0] == {"event": "retrieval", "pipeline": "rag",
+                         "results": [{"text": "dogs are great pets", "score": 0.9}]}
+    assert service.pending == 0
+
+def test_stream_disconnect_closes_pipeline_stream(monkeypatch):
+    service = make_service(monkeypatch)
+    # the headers and the retrieval event are sent, then the client disconnects
+    post(service, "/query", {"query": "pets?", "stream": True}, StubWriter(fail_after=1))
+    assert service.pipelines["rag"].stream_closed
+    assert service.pending == 0
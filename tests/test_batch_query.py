@@ -0,0 +1,32 @@
+"""
+Tests for batched query execution in GenericPipeline
+"""
+
+from modules.generators.base import BaseGenerator
+from modules.retrievers.keywordRetriever import KeywordRetriever
+
+
+class EchoGenerator(BaseGenerator):
+    def __init__(self):
+        super().__init__(name="EchoGenerator")
+        self.batch_calls = 0
+
+    def generate(self, query, contexts):
+        return f"{query} -> {contexts[0] if contexts else ''}"
+
+    def generate_batch(self, requests):
+        self.batch_calls += 1
+        return super().generate_batch(requests)
+
+def test_execute_batch_matches_serial(make_pipeline):
+    generator = EchoGenerator()
+    shared = {"retriever:keyword": KeywordRetriever(top_k=1, use_cache=False),
+              "generator:flan_t5_small": generator}
+    pipeline = make_pipeline(["retriever:keyword", "generator:flan_t5_small"], shared)
+    chunks = ["i love pizza", "dogs are great pets", "i work on ai"]
+    queries = ["pets?", "pizza", "ai work"]
+
+    states = pipeline.execute_batch(queries, chunks)
+    assert generator.batch_calls == 1
+    assert [s["answer"] for s in states] == [pipeline.execute(q, chunks=chunks)["answer"] for q in queries]
+    assert all(s["timings"]["total_ms"] >= s["timings"]["retrieval_ms"] for s in states)
@@ -0,0 +1,65 @@
+"""
+Tests for the generator micro-batching scheduler
+"""
+
+import pytest
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from modules.generators.scheduler import BatchScheduler
+
+def test_concurrent_requests_are_batched_in_order():
+    calls = []
+
+    def batch_fn(requests):
+        calls.append(len(requests))
+        return [r.upper() for r in requests]
+
+    scheduler = BatchScheduler(batch_fn, max_batch_size=4, max_wait_ms=200)
+    words = [f"word{i}" for i in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(scheduler.submit, words))
+    scheduler.close()
+
+    assert results == [w.upper() for w in words]
+    assert max(calls) <= 4 and len(calls) < len(words)
+    assert scheduler.stats()["batch_size"]["count"] == len(calls)
+
+def test_batch_errors_reach_every_caller():
+    def batch_fn(requests):
+        raise RuntimeError("boom")
+
+    scheduler = BatchScheduler(batch_fn, max_batch_size=2, max_wait_ms=1)
+    try:
+        scheduler.submit("x")
+        assert False, "expected RuntimeError"
+    except RuntimeError as exc:
+        assert "boom" in str(exc)
+    scheduler.close()
+
+def test_short_batch_result_fails_every_caller():
+    scheduler = BatchScheduler(lambda requests: requests[:-1], max_batch_size=3, max_wait_ms=200)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(scheduler.submit, word, 5) for word in ("a", "b", "c")]
+        errors = [future.exception(timeout=10) for future in futures]
+    scheduler.close()
+    assert all(isinstance(exc, RuntimeError) and "results for" in str(exc) for exc in errors)
+
+def test_submit_timeout():
+    release = threading.Event()
+    scheduler = BatchScheduler(lambda requests: release.wait() and requests, max_batch_size=1, max_wait_ms=0)
+    with pytest.raises(FutureTimeout):
+        scheduler.submit("x", timeout=0.05)
+    release.set()
+    scheduler.close()
+
+def test_flan_generator_handles_pipeline_output_shapes(make_generator):
+    from scripts.bench.stubs import StubTextPipeline
+
+    generator = make_generator(StubTextPipeline())  # flattened: one dict per prompt
+    answers = generator.generate_batch([("q1", ["First one. More."]), ("q2", ["Second. Rest."])])
+    assert answers == ["First one.", "Second."]
+    assert generator.generate("q3", ["Third. Rest."]) == "Third."
+
+    # nested: a list of sequences per prompt (num_return_sequences > 1)
+    generator._pipe = lambda prompts, **kw: [[{"generated_text": f" {p[-3:]} "}] for p in prompts]
+    assert generator._generate_prompts(["abc", "xyz"]) == ["abc", "xyz"]
@@ -0,0 +1,38 @@
+"""
+Tests for the benchmark corpus generator and baseline comparison
+"""
+
+from scripts.bench.compare import compare
+from scripts.bench.corpus import make_corpus
+
+
+def test_corpus_is_deterministic(tmp_path):
+    a = make_corpus(tmp_path / "a", 5, seed=3)
+    b = make_corpus(tmp_path / "b", 5, seed=3)
+    assert [p.read_text() for p in sorted(a.glob("*.md"))] == [p.read_text() for p in sorted(b.glob("*.md"))]
+    assert len(list(a.glob("*.md"))) == 5
+
+def test_compare_flags_regressions_by_direction():
+    baseline = {"results": {"100": {"embedding": {"chunks_per_s": 1000.0},
+                                    "retrieval": {"semantic": {"p95_ms": 10.0, "n": 50}}}}}
+    faster = {"results": {"100": {"embedding": {"chunks_per_s": 1500.0},
+                                  "retrieval": {"semantic": {"p95_ms": 5.0, "n": 50}}}}}
+    slower = {"results": {"100": {"embedding": {"chunks_per_s": 700.0},
+                                  "retrieval": {"semantic": {"p95_ms": 11.0, "n": 50}}}}}
+    assert compare(faster, baseline) == []
+    assert [r["metric"] for r in compare(slower, baseline, tolerance=0.2)] == ["100.embedding.chunks_per_s"]
+
+def test_ingestion_falls_back_when_simple_ingestor_is_skipped(tmp_path, monkeypatch):
+    from modules.ingestors.advancedIngestor import AdvancedIngestor
+    from modules.ingestors.simpleIngestor import SimpleIngestor
+    from scripts.bench.run import bench_config, bench_ingestion
+
+    def missing_data(self, folder):
+        raise LookupError("Resource punkt not found.")
+    monkeypatch.setattr(SimpleIngestor, "run", missing_data)
+    monkeypatch.setattr(AdvancedIngestor, "run", lambda self, folder: ["chunk one", "chunk two"])
+    docs = make_corpus(tmp_path / "docs", 3, seed=1)
+
+    out, chunks = bench_ingestion(bench_config(tmp_path), docs, workers=1)
+    assert out["SimpleIngestor"] == {"skipped": "Resource punkt not found."}
+    assert chunks == ["chunk one", "chunk two"]
@@ -0,0 +1,37 @@
+"""
+Tests for the offline index build
+"""
+
+import argparse
+from modules.ingestors.simpleIngestor import SimpleIngestor
+from modules.retrievers.semanticRetriever import SemanticRetriever
+from scripts import build_index
+from scripts.bench import stubs
+from scripts.bench.corpus import make_corpus
+from utils import vectorizer
+
+
+def test_build_resumes_from_checkpoints_and_fills_cache(tmp_path, monkeypatch, bench_config):
+    # pool workers are forked, so they inherit the stub model
+    embedder = stubs.StubEmbedder()
+    monkeypatch.setattr(vectorizer, "get_model", lambda model_name: embedder)
+    docs = make_corpus(tmp_path / "docs", 30, seed=2)
+    chunks = SimpleIngestor(chunk_size=50, use_cache=False).ingest(str(docs))
+    retriever = SemanticRetriever(batch_size=16)
+
+    # an interrupted earlier build left one finished shard behind
+    pending = build_index.pending_chunks(retriever, chunks)
+    first = list(pending)[:40]
+    build_dir = build_index.checkpoint_dir(retriever)
+    build_index.encode_shard(str(build_dir / "shard-00000.npz"), first, [pending[k] for k in first],
+                             retriever.model_name, 16)
+
+    args = argparse.Namespace(workers=2, threads_per_worker=1, shard_size=25)
+    report = build_index.build(retriever, chunks, args)
+    assert report["encoded"] == len(pending) - 40
+    assert report["merged"] == len(pending)
+    assert not build_dir.exists()
+
+    fresh = SemanticRetriever(batch_size=16)
+    fresh.prepare(chunks)
+    assert fresh.cache_stats() == {"hits": len(chunks), "misses": 0}
@@ -0,0 +1,43 @@
+"""
+Tests for the keyword -> semantic cascade retriever
+"""
+
+from modules.retrievers.cascadeRetriever import CascadeRetriever
+from modules.retrievers.keywordRetriever import KeywordRetriever
+from utils.metrics import metrics
+
+def test_semantic_stage_only_embeds_candidates(make_cascade, assert_same_ranking):
+    cascade = make_cascade(top_k=2, candidate_k=5)
+    chunks = [f"notes about topic {i} and filler {i * 7}" for i in range(50)]
+    chunks += [f"apples item {i}" for i in range(8)]
+    metrics.reset()
+
+    results = cascade.retrieve("apples", chunks)
+    semantic = cascade.branches["semantic"]
+    assert cascade.last_stats["lexical_candidates"] == 5 and not cascade.last_stats["fallback"]
+    assert semantic.cache_stats()["misses"] == 5 + 1  # candidates + query
+    assert all(chunk.startswith("apples") for chunk, _ in results)
+    candidates = [chunk for chunk, _ in cascade.branches["keyword"].retrieve("apples", chunks, top_k=5)]
+    assert_same_ranking(results, semantic.retrieve("apples", candidates, top_k=2))
+    stages = metrics.snapshot()["stages"]
+    assert stages["CascadeRetriever+lexical"]["items"] == {"candidates": 5}
+    assert stages["CascadeRetriever+semantic"]["items"] == {"candidates": 5}
+
+def test_falls_back_to_full_semantic_search(make_cascade, assert_same_ranking):
+    cascade = make_cascade(top_k=3, candidate_k=10, min_candidates=2)
+    chunks = [f"chunk number {i}" for i in range(40)]
+
+    results = cascade.retrieve("completely unrelated wording", chunks)
+    assert cascade.last_stats["fallback"] and cascade.fallbacks == 1
+    assert_same_ranking(results, cascade.branches["semantic"].retrieve("completely unrelated wording", chunks))
+
+def test_uses_injected_branches(make_cascade):
+    semantic = make_cascade().branches["semantic"]
+    keyword = KeywordRetriever(use_cache=False)
+    cascade = CascadeRetriever(top_k=1, candidate_k=3, branches={"keyword": keyword, "semantic": semantic})
+    assert cascade.branches == {"keyword": keyword, "semantic": semantic}
+
+    chunks = [f"apples item {i}" for i in range(5)] + ["pears"]
+    cascade.prepare(chunks)
+    cascade.retrieve("apples", chunks)
+    assert semantic.cache_stats()["misses"] == 3 + 1  # the shared retriever did the scoring
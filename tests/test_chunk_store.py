@@ -0,0 +1,94 @@
+"""
+Tests for the memory-mapped chunk store
+"""
+
+import numpy as np
+import pytest
+from utils import chunkstore
+from modules.retrievers import semanticRetriever
+from utils.chunkstore import ChunkStore, StoredChunks
+
+def test_ids_are_stable_across_reopen(tmp_path):
+    store = ChunkStore(tmp_path / "store")
+    first = store.add("héllo world", "a.md", 0)
+    second = store.add("second chunk", "b.md", 3)
+    assert store.add("héllo world", "c.md", 9) == first
+    store.flush()
+
+    reopened = ChunkStore(tmp_path / "store")
+    assert reopened.get(first) == "héllo world"
+    assert reopened.location(second) == ("b.md", 3)
+    assert reopened.add("second chunk") == second
+    third = reopened.add("third")
+    reopened.flush()
+    assert ChunkStore(tmp_path / "store").get_many([third, first]) == ["third", "héllo world"]
+
+def test_flush_recovers_from_crash_before_offsets(tmp_path, monkeypatch):
+    store = ChunkStore(tmp_path / "store")
+    first = store.add("committed chunk", "a.md", 0)
+    store.flush()
+
+    real_write = chunkstore.atomic_write
+    def crash_on_offsets(path, data):
+        if path.name == "offsets.npy":
+            raise OSError("simulated crash")
+        real_write(path, data)
+
+    store.add("lost chunk", "b.md", 0)
+    monkeypatch.setattr(chunkstore, "atomic_write", crash_on_offsets)
+    with pytest.raises(OSError):
+        store.flush()
+    monkeypatch.setattr(chunkstore, "atomic_write", real_write)
+
+    # arena and index rows now run past offsets.npy; a new process must cope
+    assert (tmp_path / "store" / "arena.bin").stat().st_size > len("committed chunk")
+    reopened = ChunkStore(tmp_path / "store")
+    assert len(reopened) == 1 and reopened.get(first) == "committed chunk"
+    second = reopened.add("new chunk", "c.md", 2)
+    reopened.flush()
+
+    final = ChunkStore(tmp_path / "store")
+    assert final.get_many([first, second]) == ["committed chunk", "new chunk"]
+    assert final.location(second) == ("c.md", 2)
+    assert final.digest_hex([second]) == [ChunkStore.digest("new chunk").hex()]
+
+def test_ingest_into_store_and_retrieve_ids(tmp_path, fake_embedder, make_ingestor):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("one two three four", encoding="utf-8")
+    (docs / "b.md").write_text("five six", encoding="utf-8")
+
+    ingestor = make_ingestor()
+    ingestor.store = ChunkStore(tmp_path / "store")
+    chunks = ingestor.run(str(docs))
+    assert isinstance(chunks, StoredChunks)
+    assert list(chunks) == ["one two three", "four", "five six"]
+
+    # warm run: ids come straight from the manifest
+    ingestor.chunk_document = None
+    assert ingestor.run(str(docs)).same_as(chunks)
+
+    retriever = semanticRetriever.SemanticRetriever(top_k=1, use_cache=False)
+    [(chunk_id, _)] = retriever.retrieve_ids("five six", chunks)
+    assert ingestor.store.get(chunk_id) == "five six"
+    assert retriever.retrieve("five six", chunks)[0][0] == "five six"
+
+def test_id_vectors_grow_geometrically(tmp_path):
+    vectors = ChunkStore(tmp_path / "store").vectors("model")
+    rows = np.arange(3000, dtype=np.float32)[:, None] * np.ones(4, dtype=np.float32)
+    for start in range(0, 3000, 64):
+        vectors.put(np.arange(start, min(start + 64, 3000)), rows[start:start + 64])
+    assert vectors.reallocations <= 8  # doubling, not one full copy per batch
+    vectors.flush()
+    assert vectors.missing(np.arange(3001)).tolist() == [3000]
+    assert np.array_equal(vectors.get([0, 2999]), rows[[0, 2999]])
+
+def test_id_embeddings_count_distinct_ids(tmp_path, fake_embedder):
+    store = ChunkStore(tmp_path / "store")
+    ids = [store.add(text) for text in ("one", "two", "three")]
+    chunks = StoredChunks(store, ids + [ids[0], ids[0]])
+    retriever = semanticRetriever.SemanticRetriever(top_k=1, use_cache=False)
+    retriever._row_vectors(chunks)
+    assert retriever.cache_stats() == {"hits": 0, "misses": 3}
+    retriever._row_vectors(chunks)
+    assert retriever.cache_stats() == {"hits": 3, "misses": 3}
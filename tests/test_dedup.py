@@ -0,0 +1,44 @@
+"""
+Tests for near-duplicate chunk removal
+"""
+
+import random
+from modules.ingestors.simpleIngestor import SimpleIngestor
+from utils.dedup import NearDuplicateFilter, lsh_bands
+
+WORDS = ("alpha beta gamma delta epsilon zeta eta theta iota kappa lambda mu nu xi omicron pi rho sigma "
+         "tau upsilon phi chi psi omega").split()
+
+def text(seed: int, n: int = 60) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) + str(rng.randint(0, 9)) for _ in range(n))
+
+def test_filter_keeps_first_copy_with_all_locations():
+    base = text(0)
+    near = base.rsplit(" ", 1)[0] + " changed"  # last word edited
+    dedup = NearDuplicateFilter(threshold=0.8)
+    kept = [dedup.add(t, loc) for t, loc in [(base, "a"), (text(1), "b"), (near, "c"), (base, "d")]]
+    assert kept == [True, True, False, False]
+    assert dedup.removed == 2
+    assert dedup.sources == [["a", "c", "d"], ["b"]]
+    assert lsh_bands(128, 0.8) in [(b, 128 // b) for b in (8, 16, 32)]
+
+def test_ingestor_dedup_across_documents(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    boilerplate = text(7, 40)
+    (docs / "a.md").write_text(f"{boilerplate} {text(2, 40)}", encoding="utf-8")
+    (docs / "b.md").write_text(f"{boilerplate} {text(3, 40)}", encoding="utf-8")
+
+    ingestor = SimpleIngestor(chunk_size=40, dedup={"enabled": True, "threshold": 0.85})
+    ingestor.cache_file = tmp_path / "cache" / "chunks.json"
+    chunks = ingestor.run(str(docs))
+    assert len(chunks) == 3
+    assert ingestor.last_ingest_stats["duplicates"] == 1
+    a, b = (docs / "a.md").as_posix(), (docs / "b.md").as_posix()
+    assert ingestor.last_chunk_sources == [[(a, 0), (b, 0)], [(a, 1)], [(b, 1)]]
+
+    # the chunk cache keeps every chunk, so disabling dedup brings the copy back
+    plain = SimpleIngestor(chunk_size=40)
+    plain.cache_file = ingestor.cache_file
+    assert len(plain.run(str(docs))) == 4
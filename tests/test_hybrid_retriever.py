@@ -0,0 +1,59 @@
+"""
+Tests for reciprocal-rank fusion in the hybrid retriever
+"""
+
+import pytest
+from modules.retrievers.base import BaseRetriever
+from modules.retrievers.hybridRetriever import HybridRetriever
+
+
+class FixedRetriever(BaseRetriever):
+    """Branch returning a fixed ranking, cut to the requested top_k."""
+
+    def __init__(self, ranking):
+        super().__init__(name="FixedRetriever", top_k=len(ranking))
+        self.ranking = ranking
+        self.requested = []
+
+    def retrieve(self, query, chunks, *args, **kwargs):
+        top_k = kwargs.get("top_k", self.top_k)
+        self.requested.append(top_k)
+        return self.ranking[:top_k]
+
+
+def make_hybrid(**kwargs):
+    branches = {"keyword": FixedRetriever([("a", 9.0), ("b", 5.0), ("c", 1.0)]),
+                "semantic": FixedRetriever([("c", 0.9), ("a", 0.8), ("d", 0.7)])}
+    return HybridRetriever(branches=branches, **kwargs), branches
+
+def test_rrf_fusion():
+    hybrid, _ = make_hybrid(top_k=4, rrf_k=60)
+    results = hybrid.retrieve("q", [])
+    expected = {"a": 1 / 61 + 1 / 62, "c": 1 / 63 + 1 / 61, "b": 1 / 62, "d": 1 / 63}
+    assert [chunk for chunk, _ in results] == ["a", "c", "b", "d"]
+    assert {chunk: score for chunk, score in results} == pytest.approx(expected)
+    assert set(hybrid.last_branch_results) == {"keyword", "semantic"}
+
+def test_weights_and_disabled_branch():
+    hybrid, branches = make_hybrid(top_k=2, rrf_k=1, weights={"semantic": 3.0})
+    assert hybrid.retrieve("q", []) == [("c", pytest.approx(3 / 2 + 1 / 4)), ("a", pytest.approx(1 / 2 + 3 / 3))]
+
+    hybrid, branches = make_hybrid(top_k=2, weights={"semantic": 0})
+    assert [chunk for chunk, _ in hybrid.retrieve("q", [])] == ["a", "b"]
+    assert branches["semantic"].requested == []
+
+def test_candidate_k_limits_each_branch():
+    hybrid, branches = make_hybrid(top_k=1, candidate_k=1)
+    assert [chunk for chunk, _ in hybrid.retrieve("q", [])] == ["a"]  # c is cut from both lists
+    assert branches["keyword"].requested == branches["semantic"].requested == [1]
+    hybrid.retrieve("q", [], top_k=3)
+    assert branches["keyword"].requested[-1] == 3  # never fewer candidates than results
+
+def test_pipeline_shares_branch_modules(make_pipeline):
+    shared = {"retriever:keyword": FixedRetriever([("a", 1.0)]),
+              "retriever:semantic": FixedRetriever([("b", 1.0)])}
+    pipeline = make_pipeline(["retriever:hybrid"], shared)
+    hybrid = pipeline.modules[0]
+    assert hybrid.branches["keyword"] is shared["retriever:keyword"]
+    assert hybrid.branches["semantic"] is shared["retriever:semantic"]
+    assert shared["retriever:hybrid"] is hybrid
@@ -0,0 +1,40 @@
+"""
+Tests for inference backend selection
+"""
+
+import pytest
+from modules.retrievers import semanticRetriever
+from utils import inference, vectorizer
+
+def test_backend_settings_per_model_override(monkeypatch):
+    embedding = {**vectorizer.config["embedding"], "backend": "int8", "onnx_path": None,
+                 "models": {"other-model": {"backend": "onnx", "onnx_path": "models/other-onnx"}}}
+    monkeypatch.setitem(vectorizer.config, "embedding", embedding)
+    assert vectorizer.backend_settings("some-model") == {"backend": "int8", "onnx_path": None}
+    assert vectorizer.backend_settings("other-model") == {"backend": "onnx", "onnx_path": "models/other-onnx"}
+
+def test_unknown_backend_and_missing_onnx_export(tmp_path):
+    with pytest.raises(ValueError):
+        inference.load_sentence_transformer("some-model", backend="fp8")
+    with pytest.raises(ValueError):
+        inference.load_text2text_pipeline("some-model", backend="fp8")
+    # only a directory that actually holds a graph counts as an export
+    assert inference._onnx_dir(None) is None
+    assert inference._onnx_dir(tmp_path) is None
+    (tmp_path / "model.onnx").write_bytes(b"")
+    assert inference._onnx_dir(tmp_path) == tmp_path
+
+def test_embedding_caches_are_keyed_by_backend(monkeypatch, fake_embedder, bench_config):
+    chunks = [f"chunk number {i}" for i in range(20)]
+    semanticRetriever.SemanticRetriever(model_name="some-model").prepare(chunks)
+
+    embedding = {**vectorizer.config["embedding"], "backend": "torch", "models": {"some-model": {"backend": "int8"}}}
+    monkeypatch.setitem(vectorizer.config, "embedding", embedding)
+    int8 = semanticRetriever.SemanticRetriever(model_name="some-model")
+    assert int8.embedding_key == "some-model@int8"
+    int8.prepare(chunks)
+    assert int8.cache_stats() == {"hits": 0, "misses": 20}  # torch vectors are not reused
+
+    again = semanticRetriever.SemanticRetriever(model_name="some-model")
+    again.prepare(chunks)
+    assert again.cache_stats() == {"hits": 20, "misses": 0}
@@ -0,0 +1,69 @@
+"""
+Tests for incremental ingestion with the chunk cache manifest
+"""
+
+def test_warm_ingest_reuses_chunks(tmp_path, make_ingestor):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("one two three four", encoding="utf-8")
+    (docs / "b.md").write_text("five six", encoding="utf-8")
+
+    cold = make_ingestor().run(str(docs))
+    assert cold == ["one two three", "four", "five six"]
+
+    ingestor = make_ingestor()
+    ingestor.chunk_document = None  # warm run must not re-chunk anything
+    assert ingestor.run(str(docs)) == cold
+    assert ingestor.last_ingest_stats["reused"] == 2
+
+def test_changed_and_deleted_files(tmp_path, make_ingestor):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("one two three four", encoding="utf-8")
+    (docs / "b.md").write_text("five six", encoding="utf-8")
+    make_ingestor().run(str(docs))
+
+    (docs / "a.md").write_text("seven eight", encoding="utf-8")
+    (docs / "b.md").unlink()
+    ingestor = make_ingestor()
+    assert ingestor.run(str(docs)) == ["seven eight"]
+    assert ingestor.last_ingest_stats == {"files": 1, "reused": 0, "rechunked": 1, "removed": 1}
+
+def test_parallel_recursive_ingest_matches_serial(tmp_path, make_ingestor):
+    docs = tmp_path / "docs"
+    (docs / "sub").mkdir(parents=True)
+    for i in range(6):
+        folder = docs / "sub" if i % 2 else docs
+        (folder / f"doc{i}.md").write_text(" ".join(f"w{i}_{j}" for j in range(7)), encoding="utf-8")
+
+    serial = make_ingestor(use_cache=False, recursive=True)
+    parallel = make_ingestor(use_cache=False, recursive=True, workers=3)
+    expected = serial.ingest(str(docs))
+    assert len(expected) == 18
+    assert list(parallel.iter_chunks(str(docs))) == expected
+    assert parallel.last_ingest_stats["rechunked"] == 6
+
+def test_manifest_keeps_metadata_only(tmp_path, make_ingestor):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for i in range(5):
+        (docs / f"doc{i}.md").write_text(" ".join(f"w{i}_{j}" for j in range(7)), encoding="utf-8")
+    ingestor = make_ingestor()
+    expected = ingestor.ingest(str(docs))
+
+    # chunk texts live in per-file blobs; the manifest only has counts and blob names
+    manifest = ingestor.cache_file.read_text(encoding="utf-8")
+    assert not any(chunk in manifest for chunk in expected)
+    blob_dir = tmp_path / "cache" / "chunks.d"
+    assert len(list(blob_dir.glob("*.json"))) == 5
+
+    (docs / "doc0.md").unlink()
+    assert make_ingestor().ingest(str(docs)) == expected[3:]
+    blobs = list(blob_dir.glob("*.json"))
+    assert len(blobs) == 4
+
+    # a missing blob makes its file be chunked again
+    blobs[0].unlink()
+    ingestor = make_ingestor()
+    assert ingestor.ingest(str(docs)) == expected[3:]
+    assert ingestor.last_ingest_stats["rechunked"] == 1
@@ -0,0 +1,65 @@
+"""
+Tests for the BM25 inverted index behind KeywordRetriever
+"""
+
+from modules.retrievers.invertedIndex import InvertedIndex
+from modules.retrievers.keywordRetriever import KeywordRetriever
+
+def test_keyword_retrieve():
+    chunks = ["i love pizza", "dogs are great pets", "i work on ai"]
+    retriever = KeywordRetriever(top_k=1, use_cache=False)
+    results = retriever.run("Pets?", chunks)
+    assert results[0][0] == "dogs are great pets"
+    assert retriever.run("nothing matches", chunks) == []
+
+def test_rare_terms_outweigh_common_ones():
+    index = InvertedIndex()
+    index.sync(["the cat sat", "the dog sat", "the cat ran", "the bird flew"])
+    top = index.search("the bird", k=4)
+    assert top[0][0] == "the bird flew"
+    assert len(top) == 4  # every doc shares "the"
+
+def test_incremental_sync_and_persistence(tmp_path):
+    index = InvertedIndex()
+    index.sync(["alpha beta", "beta gamma"])
+    assert index.sync(["beta gamma", "gamma delta"]) is True
+    assert [text for text, _ in index.search("alpha", k=3)] == []
+    assert index.search("delta", k=3)[0][0] == "gamma delta"
+
+    path = tmp_path / "keyword_index.pkl"
+    index.save(path)
+    loaded = InvertedIndex.load(path)
+    assert loaded.sync(["beta gamma", "gamma delta"]) is False
+    assert loaded.search("beta", k=1) == index.search("beta", k=1)
+
+def test_duplicate_chunks_are_one_document():
+    index = InvertedIndex()
+    index.sync(["dogs are pets", "dogs are pets", "cats are pets"])
+    assert len(index) == 2
+    assert [text for text, _ in index.search("dogs", k=3)] == ["dogs are pets"]
+
+def test_pipelines_over_different_corpora_keep_separate_indexes(bench_config, make_pipeline):
+    shared = {}
+    simple = make_pipeline(["ingestor:simple", "retriever:keyword"], shared)
+    advanced = make_pipeline(["ingestor:advanced", "retriever:hybrid"], shared)
+    again = make_pipeline(["ingestor:advanced", "retriever:keyword"], shared)
+
+    keyword = simple.modules[1]
+    other = advanced.modules[1].branches["keyword"]
+    assert other is not keyword and again.modules[1] is other
+    assert keyword.index_file != other.index_file
+
+    keyword.prepare(["i love pizza", "dogs are great pets"])
+    other.prepare(["i work on ai"])
+    assert InvertedIndex.load(keyword.index_file).sync(["i love pizza", "dogs are great pets"]) is False
+    assert InvertedIndex.load(other.index_file).sync(["i work on ai"]) is False
+
+def test_ad_hoc_chunks_leave_the_corpus_index_alone(bench_config):
+    corpus = ["i love pizza", "dogs are great pets", "i work on ai"]
+    retriever = KeywordRetriever(top_k=1, corpus="docs")
+    retriever.prepare(corpus)
+    saved = retriever.index_file.stat().st_mtime_ns
+
+    assert retriever.retrieve("pizza", ["cats are pets", "pizza night"])[0][0] == "pizza night"
+    assert len(retriever.index) == 3 and retriever.index_file.stat().st_mtime_ns == saved
+    assert retriever.retrieve("pets", corpus)[0][0] == "dogs are great pets"
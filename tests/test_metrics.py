@@ -0,0 +1,51 @@
+"""
+Tests for per-stage metrics recorded around module run() calls
+"""
+
+import numpy as np
+import pytest
+from modules.ingestors.simpleIngestor import SimpleIngestor
+from utils.metrics import Metrics, metrics
+
+
+def test_ingestor_run_is_recorded_with_counts(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("one two three four", encoding="utf-8")
+    ingestor = SimpleIngestor(chunk_size=3, use_cache=False)
+    events = []
+    metrics.add_hook(events.append)
+    try:
+        ingestor.run(str(docs))
+    finally:
+        metrics.remove_hook(events.append)
+
+    assert len(events) == 1
+    assert events[0]["stage"] == "SimpleIngestor"
+    assert events[0]["items"] == {"docs_read": 1, "chunks_produced": 2, "items_out": 2}
+    stage = metrics.snapshot()["stages"]["SimpleIngestor"]
+    assert stage["seconds"]["count"] >= 1
+
+def test_prometheus_export():
+    registry = Metrics()
+    registry.record("retriever", 0.02, {"embeddings_computed": 3})
+    registry.record("retriever", 0.2, {"embeddings_computed": 1})
+    text = registry.to_prometheus()
+    assert 'aiplayground_stage_seconds_bucket{stage="retriever",le="0.05"} 1' in text
+    assert 'aiplayground_stage_seconds_bucket{stage="retriever",le="+Inf"} 2' in text
+    assert 'aiplayground_stage_seconds_count{stage="retriever"} 2' in text
+    assert 'aiplayground_stage_items_total{stage="retriever",item="embeddings_computed"} 4' in text
+
+def test_timer_records_rss_growth_per_stage():
+    registry = Metrics()
+    with registry.timer("alloc"):
+        block = np.ones(64 << 20, dtype=np.uint8)  # 64 MiB, touched
+    with registry.timer("idle"):
+        pass
+    stages = registry.snapshot()["stages"]
+    if stages["alloc"]["rss_delta_mb"] is None:
+        pytest.skip("RSS is not readable on this platform")
+    assert stages["alloc"]["rss_delta_mb"] >= 48
+    assert stages["idle"]["rss_delta_mb"] < 8
+    assert 'aiplayground_stage_rss_growth_bytes{stage="alloc"}' in registry.to_prometheus()
+    del block
@@ -0,0 +1,23 @@
+"""
+Tests for token-budgeted context packing in FlanT5Generator
+"""
+
+def test_packs_best_contexts_and_trims_at_sentences(make_generator):
+    generator = make_generator(max_input_tokens=10)
+    contexts = ["one two three four", "five six. seven eight nine. ten eleven", "twelve"]
+    packed, used = generator._pack_contexts(contexts, budget=10)
+    # 4 tokens + separator (1) + first sentence "five six." (2) + "seven eight nine." (3) = 10
+    assert packed == ["one two three four", "five six. seven eight nine."]
+    assert used == 10
+
+def test_prompt_respects_budget_and_caches_counts(make_generator):
+    generator = make_generator(max_input_tokens=120)
+    contexts = [f"chunk {i} " + "word " * 20 for i in range(5)]
+    prompt = generator._build_prompt("what is this?", contexts)
+    assert generator.last_prompt_tokens <= 120
+    assert len(prompt.split()) <= 120
+    assert "chunk 0" in prompt and "chunk 4" not in prompt
+
+    calls = generator._pipe.tokenizer.calls
+    generator._build_prompt("another question?", contexts[:1])
+    assert generator._pipe.tokenizer.calls == calls + 1  # only the instructions are re-tokenized
@@ -0,0 +1,51 @@
+"""
+Tests for quantized embedding storage
+"""
+
+import numpy as np
+from modules.retrievers import semanticRetriever
+from utils.quantization import QuantizedMatrix, recall_at_k
+from utils.vectors import normalize
+
+def test_quantized_recall_and_size(clustered_vectors):
+    matrix = normalize(clustered_vectors(2000, dim=64))
+    queries = clustered_vectors(50, dim=64, seed=1)
+    fp16 = QuantizedMatrix.from_float(matrix, "float16")
+    int8 = QuantizedMatrix.from_float(matrix, "int8")
+
+    assert fp16.bytes_per_vector == 64 * 2
+    assert int8.bytes_per_vector == 64 + 4
+    assert recall_at_k(fp16, matrix, queries, k=10) >= 0.98
+    assert recall_at_k(int8, matrix, queries, k=10) >= 0.9
+
+def test_quantized_save_checks_keys(tmp_path, clustered_vectors):
+    int8 = QuantizedMatrix.from_float(clustered_vectors(10), "int8")
+    path = tmp_path / "embeddings.int8.npz"
+    int8.save(path, ["a", "b"], "model")
+    assert QuantizedMatrix.load(path, ["a", "c"], "model") is None
+    loaded = QuantizedMatrix.load(path, ["a", "b"], "model")
+    assert np.array_equal(loaded.data, int8.data)
+
+def test_semantic_int8_rescored_matches_float32(fake_embedder):
+    chunks = [f"chunk number {i}" for i in range(200)]
+    exact = semanticRetriever.SemanticRetriever(top_k=5, use_cache=False)
+    int8 = semanticRetriever.SemanticRetriever(top_k=5, use_cache=False, storage="int8")
+
+    expected = exact.retrieve("chunk number 42", chunks)
+    got = int8.retrieve("chunk number 42", chunks)
+    assert [c for c, _ in got] == [c for c, _ in expected]
+    assert np.allclose([s for _, s in got], [s for _, s in expected], atol=1e-5)
+    assert int8.storage_stats()["bytes_per_vector"] < exact.storage_stats()["bytes_per_vector"] / 3
+
+def test_rescore_reads_memory_mapped_rows(fake_embedder, bench_config):
+    chunks = [f"chunk number {i}" for i in range(200)]
+    expected = semanticRetriever.SemanticRetriever(top_k=5, use_cache=False).retrieve("chunk number 42", chunks)
+    semanticRetriever.SemanticRetriever(top_k=5, storage="int8").prepare(chunks)
+
+    # a restart re-scores from the .npy map without unpickling the embedding cache
+    int8 = semanticRetriever.SemanticRetriever(top_k=5, storage="int8")
+    got = int8.retrieve("chunk number 42", chunks)
+    assert isinstance(int8._matrix.full, np.memmap)
+    assert int8._embedding_cache is None
+    assert [c for c, _ in got] == [c for c, _ in expected]
+    assert np.allclose([s for _, s in got], [s for _, s in expected], atol=1e-5)
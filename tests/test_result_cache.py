@@ -0,0 +1,68 @@
+"""
+Tests for the pipeline result cache
+"""
+
+import time
+from modules.caches.resultCache import ResultCache
+from modules.ingestors.simpleIngestor import SimpleIngestor
+
+
+def test_lru_and_ttl():
+    cache = ResultCache(max_entries=2, ttl_seconds=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1       # "a" is now most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 3
+
+def test_disk_backend_survives_restart(tmp_path):
+    ResultCache(backend="disk", path=tmp_path, max_entries=2).set("k", {"answer": "x"})
+    cache = ResultCache(backend="disk", path=tmp_path, max_entries=2)
+    assert cache.get("k") == {"answer": "x"}
+    cache.set("k2", 2)
+    cache.set("k3", 3)
+    assert len(cache) == 2
+
+def test_disk_backend_scans_directory_once(tmp_path, monkeypatch):
+    cache = ResultCache(backend="disk", path=tmp_path, max_entries=3)
+    cache.set("a", 1)
+    scans = []
+    real_glob = type(tmp_path).glob
+    monkeypatch.setattr(type(tmp_path), "glob", lambda self, pattern: scans.append(pattern) or real_glob(self, pattern))
+    for key in "bcde":
+        cache.set(key, key)
+    assert cache.get("c") == "c"
+    cache.set("f", "f")  # evicts "d", the least recently used
+    assert scans == []
+    assert sorted(p.stem for p in real_glob(tmp_path, "*.pkl")) == ["c", "e", "f"]
+
+def test_key_tracks_query_and_corpus(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("one two three", encoding="utf-8")
+    ingestor = SimpleIngestor(chunk_size=3)
+    before = ingestor.corpus_version(str(docs))
+
+    key = ResultCache.make_key("What is X?", "qa", {}, before)
+    assert key == ResultCache.make_key("  what is   x? ", "qa", {}, before)
+    assert key != ResultCache.make_key("What is X?", "rag", {}, before)
+
+    (docs / "b.md").write_text("four", encoding="utf-8")
+    assert ingestor.corpus_version(str(docs)) != before
+
+def test_run_reports_cache_hits(tmp_path, bench_config, make_pipeline):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("dogs are great pets", encoding="utf-8")
+    bench_config["cache"]["result"].update({"enabled": True, "backend": "memory"})
+    pipeline = make_pipeline(["ingestor:simple", "retriever:keyword"])
+
+    first = pipeline.run("pets?", str(docs))
+    assert pipeline.last_cached is False and pipeline.last_chunks == ["dogs are great pets"]
+    assert pipeline.run("pets?", str(docs)) == first
+    # nothing was ingested, so there are no chunks to summarize
+    assert pipeline.last_cached == "result" and pipeline.last_chunks is None
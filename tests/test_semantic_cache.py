@@ -0,0 +1,39 @@
+"""
+Tests for the semantic query cache
+"""
+
+import numpy as np
+from modules.caches import semanticCache
+from modules.caches.semanticCache import SemanticCache
+
+
+def bag_of_words(text, model_name=None):
+    vec = np.zeros(64, dtype=np.float32)
+    for word in text.replace("?", "").split():
+        vec[sum(word.encode("utf-8")) % 64] += 1
+    return vec
+
+def test_near_duplicate_hit_and_eviction(monkeypatch):
+    monkeypatch.setattr(semanticCache, "vectorize_string", bag_of_words)
+    cache = SemanticCache(threshold=0.8, max_entries=2)
+    cache.set("what is retrieval augmented generation", "RAG", namespace="rag")
+
+    assert cache.get("What is retrieval augmented generation?", namespace="rag") == "RAG"
+    assert cache.get("what is retrieval augmented generation", namespace="qa") is None
+    assert cache.get("how do I bake bread", namespace="rag") is None
+
+    cache.set("how do I bake bread", "flour", namespace="rag")
+    cache.set("who wrote hamlet", "shakespeare", namespace="rag")
+    assert len(cache) == 2
+    assert cache.get("what is retrieval augmented generation", namespace="rag") is None
+    assert cache.stats()["hits"] == 1
+
+def test_corpus_change_invalidates(monkeypatch):
+    monkeypatch.setattr(semanticCache, "vectorize_string", bag_of_words)
+    cache = SemanticCache(threshold=0.9)
+    cache.set("who wrote hamlet", "shakespeare", namespace="rag", corpus_version="v1")
+    cache.set("who wrote hamlet", "shakespeare", namespace="qa", corpus_version="v1")
+    assert cache.get("who wrote hamlet", namespace="rag", corpus_version="v1") == "shakespeare"
+    assert cache.get("who wrote hamlet", namespace="rag", corpus_version="v2") is None
+    assert cache.get("who wrote hamlet", namespace="qa", corpus_version="v1") == "shakespeare"
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,56 @@
+"""
+Tests for sharded exact semantic search
+"""
+
+import numpy as np
+from modules.retrievers import semanticRetriever
+from utils.vectors import normalize, top_k_indices
+
+def test_top_k_breaks_ties_by_index():
+    scores = np.array([0.5, 0.9, 0.5, 0.9, 0.1, 0.5], dtype=np.float32)
+    assert top_k_indices(scores, 3).tolist() == [1, 3, 0]
+    assert top_k_indices(scores, 4).tolist() == [1, 3, 0, 2]
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        scores = rng.integers(0, 5, size=30).astype(np.float32)
+        for k in (1, 7, 29):
+            assert top_k_indices(scores, k).tolist() == np.lexsort((np.arange(30), -scores))[:k].tolist()
+
+def test_sharded_search_matches_unsharded(monkeypatch, clustered_vectors):
+    monkeypatch.setattr(semanticRetriever.SemanticRetriever, "SCORE_BLOCK_ROWS", 64)
+    retriever = semanticRetriever.SemanticRetriever(top_k=10, use_cache=False, shards=4)
+    matrix = normalize(clustered_vectors(1003, dim=16))
+    matrix[500:520] = matrix[7]  # exact ties spread over shard boundaries
+    for seed in range(5):
+        query = normalize(clustered_vectors(1, dim=16, seed=seed + 10)[0])
+        for k in (1, 10, 40):
+            scores = retriever._block_scores(query, matrix, 0, len(matrix))
+            expected = [(int(i), float(scores[i])) for i in top_k_indices(scores, k)]
+            for n_shards in (2, 3, 7, 16):
+                assert retriever._search_sharded(query, matrix, k, n_shards) == expected
+    tied = matrix[7]
+    hits = retriever._search_sharded(tied, matrix, 21, 4)
+    assert [i for i, _ in hits] == [7] + list(range(500, 520))
+
+def test_sharded_retrieve(monkeypatch, fake_embedder):
+    monkeypatch.setattr(semanticRetriever.SemanticRetriever, "SCORE_BLOCK_ROWS", 50)
+    chunks = [f"chunk number {i}" for i in range(300)]
+    plain = semanticRetriever.SemanticRetriever(top_k=5, use_cache=False)
+    sharded = semanticRetriever.SemanticRetriever(top_k=5, use_cache=False, shards=4)
+    assert sharded.retrieve("chunk number 42", chunks) == plain.retrieve("chunk number 42", chunks)
+
+def test_shard_pool_per_retriever(monkeypatch, clustered_vectors):
+    monkeypatch.setattr(semanticRetriever.SemanticRetriever, "SCORE_BLOCK_ROWS", 64)
+    matrix = normalize(clustered_vectors(500, dim=16))
+    small = semanticRetriever.SemanticRetriever(use_cache=False, shards=2)
+    large = semanticRetriever.SemanticRetriever(use_cache=False, shards=6)
+    assert small._executor is None
+    for retriever in (small, large):
+        retriever._search_sharded(matrix[0], matrix, 5, retriever.shards)
+    assert (small._executor._max_workers, large._executor._max_workers) == (2, 6)
+
+    large.close()
+    assert large._executor is None
+    assert large._search_sharded(matrix[0], matrix, 5, 6) == small._search_sharded(matrix[0], matrix, 5, 6)
+    small.close()
+    large.close()
@@ -0,0 +1,32 @@
+"""
+Startup-cost guards: building pipelines must not import heavy ML stacks
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+HEAVY = ["torch", "transformers", "sentence_transformers", "nltk"]
+
+def run_snippet(code: str) -> str:
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return out.stdout.strip()
+
+def test_importing_pipelines_is_lightweight():
+    loaded = run_snippet(
+        "import sys\n"
+        "import modules.pipelines.factory\n"
+        f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    assert loaded == ""
+
+def test_building_pipeline_does_not_load_models():
+    loaded = run_snippet(
+        "import sys, yaml\n"
+        "from modules.pipelines.generic import GenericPipeline\n"
+        "config = yaml.safe_load(open('config.yaml'))\n"
+        "GenericPipeline(config, {'sequence': ['ingestor:simple', 'retriever:keyword', 'generator:flan_t5_small']})\n"
+        f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    assert loaded == ""
@@ -0,0 +1,78 @@
+"""
+Tests for streaming retrieval and token streaming through the generator and pipeline
+"""
+
+from modules.generators.base import BaseGenerator, repeated_ngram
+from modules.retrievers.keywordRetriever import KeywordRetriever
+from modules.retrievers.semanticRetriever import SemanticRetriever
+from scripts.bench import stubs
+from utils import vectorizer
+
+
+class WordStreamGenerator(BaseGenerator):
+    closed = False
+
+    def generate(self, query, contexts):
+        return "".join(self.generate_stream(query, contexts)).strip()
+
+    def generate_stream(self, query, contexts):
+        try:
+            for word in contexts[0].split():
+                yield word + " "
+        finally:
+            self.closed = True
+
+def test_repeated_ngram():
+    assert not repeated_ngram("a b c d a b c d".split(), ngram=4, limit=3)
+    assert repeated_ngram("a b c d a b c d a b c d".split(), ngram=4, limit=3)
+    assert repeated_ngram("so it is is is is is is".split(), ngram=2, limit=3)
+
+def test_pipeline_stream_events(make_pipeline):
+    shared = {"retriever:keyword": KeywordRetriever(top_k=1, use_cache=False),
+              "generator:flan_t5_small": WordStreamGenerator()}
+    pipeline = make_pipeline(["retriever:keyword", "generator:flan_t5_small"], shared)
+    events = list(pipeline.stream("pets?", chunks=["i love pizza", "dogs are great pets"]))
+
+    assert [e["event"] for e in events] == ["retrieval", "token", "token", "token", "token", "done"]
+    assert events[0]["results"][0][0] == "dogs are great pets"
+    assert events[-1]["answer"] == "dogs are great pets"
+    assert events[-1]["first_token_ms"] <= events[-1]["total_ms"]
+
+def test_closing_pipeline_stream_stops_generation(make_pipeline):
+    generator = WordStreamGenerator()
+    shared = {"retriever:keyword": KeywordRetriever(top_k=1, use_cache=False),
+              "generator:flan_t5_small": generator}
+    pipeline = make_pipeline(["retriever:keyword", "generator:flan_t5_small"], shared)
+    events = pipeline.stream("pets?", chunks=["i love pizza", "dogs are great pets"])
+    assert [next(events)["event"], next(events)["event"]] == ["retrieval", "token"]
+    events.close()  # what the API does when the client disconnects
+    assert generator.closed
+
+def test_retrieve_stream_keeps_no_embeddings(monkeypatch, bench_config):
+    monkeypatch.setattr(vectorizer, "get_model", lambda model_name: stubs.StubEmbedder())
+    chunks = [f"chunk {i} about topic {i % 7}" for i in range(300)]
+    retriever = SemanticRetriever(top_k=5, batch_size=16)
+
+    streamed = retriever.retrieve_stream("topic 3", iter(chunks), batch_size=32)
+    # nothing corpus-sized is retained: no embedding cache in memory or on disk
+    assert retriever._embedding_cache is None
+    assert not retriever.cache_file.exists()
+    assert retriever.cache_stats() == {"hits": 0, "misses": 301}
+
+    exact = SemanticRetriever(top_k=5, use_cache=False).retrieve("topic 3", chunks)
+    assert [chunk for chunk, _ in streamed] == [chunk for chunk, _ in exact]
+
+def test_run_stream_switches_on_event_names(capsys):
+    from types import SimpleNamespace
+    from scripts import query
+
+    class EventPipeline:
+        last_retrieval = None
+
+        def stream(self, query, folder=None):
+            yield {"event": "retrieval", "results": [("dogs are great pets", 1.0)]}
+            yield {"event": "progress", "stage": "rerank"}  # unknown events are ignored
+            yield {"event": "done", "answer": None, "cached": False, "first_token_ms": None, "total_ms": 1.0}
+
+    query.run_stream(EventPipeline(), SimpleNamespace(query="pets?", timing=False), total_start=0.0)
+    assert capsys.readouterr().out.splitlines() == ["Query: pets?", "[('dogs are great pets', 1.0)]"]
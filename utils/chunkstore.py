@@ -0,0 +1,293 @@
+from collections.abc import Sequence
+from pathlib import Path
+from utils.fileio import atomic_write
+import hashlib
+import io
+import json
+import mmap
+import numpy as np
+import threading
+
+
+def _npy_bytes(array: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    np.save(buf, array)
+    return buf.getvalue()
+
+def _load_npy(path: Path, empty: np.ndarray) -> np.ndarray:
+    """Memory-map an .npy file, or return `empty` if it does not exist yet."""
+    return np.load(path, mmap_mode="r") if path.exists() else empty
+
+
+class ChunkStore:
+    """
+    Append-only store of chunk texts with stable integer ids.
+
+    On disk (one directory):
+        arena.bin      UTF-8 text of every chunk, concatenated
+        offsets.npy    int64 (N+1,) byte offsets into the arena
+        digests.npy    uint8 (N, 20) SHA-1 of each text (dedup + cache keys)
+        sources.npy    int32 (N,) index into sources.json
+        positions.npy  int32 (N,) position of the chunk within its source file
+        sources.json   list of source paths
+
+    Opening a store memory-maps these files; text is only decoded when a
+    chunk is actually read. Adding a text that is already stored returns its
+    existing id, so ids stay stable across re-ingestion. New chunks are kept
+    in memory until `flush`.
+
+    Use `ChunkStore.open(path)` so that every user in a process shares one instance.
+    """
+
+    _instances: dict = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path) -> "ChunkStore":
+        key = str(Path(path).resolve())
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(path)
+            return cls._instances[key]
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._map_files()
+
+    def _close_maps(self) -> None:
+        """Release the mappings of the previous generation of files."""
+        for name in ("_offsets", "_digests", "_source_idx", "_positions"):
+            mapped = getattr(getattr(self, name, None), "_mmap", None)
+            if mapped is not None:
+                mapped.close()
+        if isinstance(getattr(self, "_arena", None), mmap.mmap):
+            self._arena.close()
+
+    def _map_files(self) -> None:
+        """
+        Map the store files. offsets.npy is written last by `flush`, so it
+        defines what is committed; anything past it (arena bytes or index rows
+        left by a flush that crashed midway) is ignored here and cut off by
+        the next flush.
+        """
+        self._close_maps()
+        self._offsets = _load_npy(self.path / "offsets.npy", np.zeros(1, dtype=np.int64))
+        committed = len(self._offsets) - 1
+        self._digests = _load_npy(self.path / "digests.npy", np.zeros((0, 20), dtype=np.uint8))[:committed]
+        self._source_idx = _load_npy(self.path / "sources.npy", np.zeros(0, dtype=np.int32))[:committed]
+        self._positions = _load_npy(self.path / "positions.npy", np.zeros(0, dtype=np.int32))[:committed]
+        sources_file = self.path / "sources.json"
+        self._sources = json.loads(sources_file.read_text(encoding="utf-8")) if sources_file.exists() else []
+        self._source_of = {source: i for i, source in enumerate(self._sources)}
+
+        arena_file = self.path / "arena.bin"
+        self._arena = b""
+        if arena_file.exists() and arena_file.stat().st_size > 0:
+            with open(arena_file, "rb") as f:
+                self._arena = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._committed = committed
+        self._id_of = {self._digests[i].tobytes(): i for i in range(self._committed)}
+        self._pending_texts: list = []
+        self._pending_digests: list = []
+        self._pending_meta: list = []   # (source index, position)
+
+    def __len__(self) -> int:
+        return self._committed + len(self._pending_texts)
+
+    @staticmethod
+    def digest(text: str) -> bytes:
+        return hashlib.sha1(text.encode("utf-8")).digest()
+
+    def add(self, text: str, source: str = "", position: int = 0) -> int:
+        """Store a chunk (or find it) and return its id."""
+        digest = self.digest(text)
+        with self._lock:
+            chunk_id = self._id_of.get(digest)
+            if chunk_id is not None:
+                return chunk_id
+            if source not in self._source_of:
+                self._source_of[source] = len(self._sources)
+                self._sources.append(source)
+            chunk_id = len(self)
+            self._id_of[digest] = chunk_id
+            self._pending_texts.append(text)
+            self._pending_digests.append(digest)
+            self._pending_meta.append((self._source_of[source], position))
+            return chunk_id
+
+    def get(self, chunk_id: int) -> str:
+        chunk_id = int(chunk_id)
+        # under the lock: flush closes the mappings it replaces
+        with self._lock:
+            if chunk_id >= self._committed:
+                return self._pending_texts[chunk_id - self._committed]
+            start, end = int(self._offsets[chunk_id]), int(self._offsets[chunk_id + 1])
+            return self._arena[start:end].decode("utf-8")
+
+    def get_many(self, ids) -> list:
+        return [self.get(i) for i in ids]
+
+    def location(self, chunk_id: int) -> tuple:
+        """(source path, position in source) of a chunk."""
+        chunk_id = int(chunk_id)
+        with self._lock:
+            if chunk_id >= self._committed:
+                source, position = self._pending_meta[chunk_id - self._committed]
+            else:
+                source, position = int(self._source_idx[chunk_id]), int(self._positions[chunk_id])
+            return self._sources[source], position
+
+    def digest_hex(self, ids) -> list:
+        """SHA-1 hex digest of each chunk's text, without decoding the text."""
+        out = []
+        with self._lock:
+            for chunk_id in ids:
+                chunk_id = int(chunk_id)
+                if chunk_id >= self._committed:
+                    out.append(self._pending_digests[chunk_id - self._committed].hex())
+                else:
+                    out.append(self._digests[chunk_id].tobytes().hex())
+        return out
+
+    def flush(self) -> None:
+        """
+        Append pending chunks to the arena and rewrite the index arrays,
+        offsets.npy last: until it is replaced, readers (and a reopen after a
+        crash) see the previous, consistent store.
+        """
+        with self._lock:
+            if not self._pending_texts:
+                return
+            self.path.mkdir(parents=True, exist_ok=True)
+            encoded = [text.encode("utf-8") for text in self._pending_texts]
+            # arena first: the offsets written below never point past written data
+            arena_file = self.path / "arena.bin"
+            end = int(self._offsets[-1])
+            with open(arena_file, "ab") as f:
+                size = f.seek(0, 2)
+                if size < end:
+                    raise RuntimeError(f"Chunk store arena at {self.path} is shorter than its offsets")
+                if size > end:
+                    # bytes from a flush that crashed before offsets.npy was written
+                    f.truncate(end)
+                for data in encoded:
+                    f.write(data)
+            lengths = np.fromiter((len(d) for d in encoded), dtype=np.int64, count=len(encoded))
+            offsets = np.concatenate([self._offsets, self._offsets[-1] + np.cumsum(lengths)])
+            digests = np.concatenate([self._digests, np.frombuffer(b"".join(self._pending_digests),
+                                                                   dtype=np.uint8).reshape(-1, 20)])
+            meta = np.array(self._pending_meta, dtype=np.int32).reshape(-1, 2)
+            sources = np.concatenate([self._source_idx, meta[:, 0]])
+            positions = np.concatenate([self._positions, meta[:, 1]])
+
+            atomic_write(self.path / "sources.json", json.dumps(self._sources, ensure_ascii=False))
+            atomic_write(self.path / "digests.npy", _npy_bytes(digests))
+            atomic_write(self.path / "sources.npy", _npy_bytes(sources))
+            atomic_write(self.path / "positions.npy", _npy_bytes(positions))
+            atomic_write(self.path / "offsets.npy", _npy_bytes(offsets))
+            self._map_files()
+
+    def vectors(self, model_name: str) -> "IdVectors":
+        """Embedding file for this store and model, aligned with chunk ids."""
+        slug = hashlib.sha1(model_name.encode("utf-8")).hexdigest()[:12]
+        return IdVectors(self.path / f"vectors.{slug}.npy", self.path / f"valid.{slug}.npy")
+
+
+class IdVectors:
+    """
+    Embeddings stored by chunk id: row i of a float32 .npy file holds the
+    vector of chunk i, and a parallel uint8 mask marks which rows are filled.
+    Both files are memory-mapped; they are only copied into memory to add rows.
+    The in-memory copy grows geometrically and is written in place, so adding
+    rows in many small batches does not copy the whole matrix every time.
+    """
+
+    def __init__(self, vectors_path: Path, valid_path: Path):
+        self.vectors_path = vectors_path
+        self.valid_path = valid_path
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.reallocations = 0
+        self._load()
+
+    def _load(self) -> None:
+        self._vectors = _load_npy(self.vectors_path, None)
+        self._valid = _load_npy(self.valid_path, np.zeros(0, dtype=np.uint8))
+
+    def missing(self, ids: np.ndarray) -> np.ndarray:
+        """The subset of ids that have no stored vector yet."""
+        ids = np.asarray(ids, dtype=np.int64)
+        known = np.zeros(len(ids), dtype=bool)
+        in_range = ids < len(self._valid)
+        known[in_range] = self._valid[ids[in_range]].astype(bool)
+        return ids[~known]
+
+    def get(self, ids: np.ndarray) -> np.ndarray:
+        return np.asarray(self._vectors[np.asarray(ids, dtype=np.int64)], dtype=np.float32)
+
+    def put(self, ids, vectors: np.ndarray) -> None:
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) == 0:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            needed = int(ids.max()) + 1
+            if needed > len(self._valid) or not self._dirty:
+                # first write since loading (the maps are read-only) or out of room
+                size = len(self._valid) if needed <= len(self._valid) else max(needed, 2 * len(self._valid))
+                grown = np.zeros((size, vectors.shape[1]), dtype=np.float32)
+                valid = np.zeros(size, dtype=np.uint8)
+                if self._vectors is not None:
+                    grown[:len(self._vectors)] = self._vectors
+                    valid[:len(self._valid)] = self._valid
+                self._vectors, self._valid = grown, valid
+                self.reallocations += 1
+            self._vectors[ids] = vectors
+            self._valid[ids] = 1
+            self._dirty = True
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            atomic_write(self.vectors_path, _npy_bytes(self._vectors))
+            atomic_write(self.valid_path, _npy_bytes(self._valid))
+            self._dirty = False
+            self._load()
+
+
+class StoredChunks(Sequence):
+    """
+    A list-like view of chunk ids in a ChunkStore.
+
+    Indexing or iterating decodes text on demand, so it can be passed anywhere
+    a list of chunk strings is expected, while id-aware code (e.g.
+    SemanticRetriever) works on `ids` and only decodes the final results.
+    """
+
+    def __init__(self, store: ChunkStore, ids):
+        self.store = store
+        self.ids = np.asarray(ids, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        """An int gives the chunk text; a slice or index array gives a sub-view."""
+        if isinstance(index, (slice, list, np.ndarray)):
+            return StoredChunks(self.store, self.ids[index])
+        return self.store.get(self.ids[index])
+
+    def __iter__(self):
+        for chunk_id in self.ids:
+            yield self.store.get(chunk_id)
+
+    def same_as(self, other) -> bool:
+        return (isinstance(other, StoredChunks) and other.store is self.store
+                and np.array_equal(other.ids, self.ids))
+
+    def keys(self) -> list:
+        """SHA-1 hex digests of the chunk texts (same as hashing the text)."""
+        return self.store.digest_hex(self.ids)
@@ -0,0 +1,106 @@
+"""
+Near-duplicate detection for chunks with MinHash signatures and LSH banding.
+"""
+
+import hashlib
+import numpy as np
+import zlib
+
+
+def lsh_bands(num_perm: int, threshold: float) -> tuple:
+    """
+    (bands, rows) with bands * rows == num_perm whose collision curve
+    crosses 50% closest to `threshold` similarity: (1 / bands) ** (1 / rows).
+    """
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(options, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles. The estimated Jaccard similarity
+    of two texts' shingle sets is the fraction of equal signature entries.
+    Seeded, so signatures are identical across runs and processes.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # multiply-shift hashing: (a * h + b) mod 2**64, top 32 bits; a is odd
+        self._a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)[:, None] * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)[:, None]
+
+    def shingles(self, text: str) -> list:
+        words = text.lower().split()
+        k = self.shingle_size
+        if len(words) <= k:
+            return [" ".join(words)]
+        return [" ".join(words[i:i + k]) for i in range(len(words) - k + 1)]
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in set(self.shingles(text))), dtype=np.uint64)
+        return ((self._a * hashes + self._b) >> np.uint64(32)).min(axis=1).astype(np.uint32)
+
+
+class NearDuplicateFilter:
+    """
+    Streaming near-duplicate filter.
+
+    Each added text is MinHashed and its signature split into LSH bands;
+    texts sharing a band bucket with a kept representative are candidates,
+    and a candidate whose estimated similarity reaches `threshold` makes the
+    text a duplicate of that representative. Otherwise the text becomes a
+    new representative. Work per text is independent of how many were seen
+    before (apart from bucket collisions), so a corpus is deduplicated in
+    roughly linear time, and the first occurrence of every group is kept.
+
+    Every representative accumulates the locations of all its copies in
+    `sources` (index = representative number, in the order they were kept).
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, shingle_size, seed)
+        self.bands, self.rows = lsh_bands(num_perm, threshold)
+        self._buckets = [dict() for _ in range(self.bands)]
+        self._signatures: list = []
+        self._exact: dict = {}  # text digest -> representative, skips verbatim copies
+        self.sources: list = []
+        self.removed = 0
+
+    def add(self, text: str, location=None) -> bool:
+        """
+        Register `text` found at `location`.
+
+        Returns:
+            bool: True if it is kept (a new representative), False if it duplicates one.
+        """
+        digest = hashlib.sha1(text.encode("utf-8")).digest()
+        rep = self._exact.get(digest)
+        if rep is not None:
+            self.sources[rep].append(location)
+            self.removed += 1
+            return False
+        sig = self.hasher.signature(text)
+        keys = [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+        checked = set()
+        for band, key in zip(self._buckets, keys):
+            for rep in band.get(key, ()):
+                if rep in checked:
+                    continue
+                checked.add(rep)
+                if np.mean(self._signatures[rep] == sig) >= self.threshold:
+                    self.sources[rep].append(location)
+                    self.removed += 1
+                    return False
+        rep = self._exact[digest] = len(self._signatures)
+        self._signatures.append(sig)
+        self.sources.append([location])
+        for band, key in zip(self._buckets, keys):
+            band.setdefault(key, []).append(rep)
+        return True
+
+    def duplicate_groups(self) -> dict:
+        """Representative number -> locations, for representatives that absorbed copies."""
+        return {rep: locations for rep, locations in enumerate(self.sources) if len(locations) > 1}
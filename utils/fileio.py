@@ -0,0 +1,23 @@
+from pathlib import Path
+import os
+import tempfile
+
+
+def atomic_write(path, data) -> None:
+    """
+    Write bytes or text to `path` atomically: the data goes to a temp file in
+    the same directory which then replaces the target, so readers never see a
+    partially written cache file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
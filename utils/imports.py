@@ -0,0 +1,15 @@
+from functools import lru_cache
+import importlib
+
+
+@lru_cache(maxsize=None)
+def import_from_path(path: str):
+    """
+    Import an object from a "package.module:Attribute" path.
+    Used by the factories so heavy modules (transformers, sentence-transformers)
+    are only imported when a pipeline actually uses them.
+    """
+    module_name, _, attr = path.partition(":")
+    if not attr:
+        raise ValueError(f"Import path must look like 'package.module:Name', got '{path}'")
+    return getattr(importlib.import_module(module_name), attr)
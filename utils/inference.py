@@ -0,0 +1,84 @@
+"""
+Inference backends for the embedding and generation models.
+
+    "torch"  full-precision PyTorch model (the default, and the fallback)
+    "int8"   PyTorch model with dynamic int8 quantization of its Linear layers (CPU)
+    "onnx"   an exported ONNX graph in a local directory, run with onnxruntime
+
+The backend is chosen per model in config.yaml. When the requested backend
+cannot be used (missing package, no exported graph), the model is loaded
+with "torch" and a warning is logged.
+"""
+
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "int8", "onnx")
+
+
+def _check(backend: str) -> None:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend} (expected one of {', '.join(BACKENDS)})")
+
+def _onnx_dir(onnx_path) -> Path | None:
+    """The ONNX export directory if it exists locally and holds a graph."""
+    if not onnx_path:
+        return None
+    path = Path(onnx_path)
+    return path if path.is_dir() and any(path.glob("*.onnx")) else None
+
+def quantize_dynamic_int8(model):
+    """Copy of `model` with its Linear layers dynamically quantized to int8."""
+    import torch
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def load_sentence_transformer(model_name: str, device: str = "cpu", backend: str = "torch",
+                              onnx_path: str = None):
+    """Load an embedding model with the requested backend (see module docstring)."""
+    _check(backend)
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "onnx":
+        path = _onnx_dir(onnx_path)
+        if path is None:
+            logger.warning("No ONNX export at %s for %s; using torch", onnx_path, model_name)
+        else:
+            try:
+                return SentenceTransformer(str(path), device=device, backend="onnx")
+            except (ImportError, TypeError, ValueError, OSError) as exc:
+                # TypeError: sentence-transformers too old for backend="onnx"
+                logger.warning("ONNX backend unavailable for %s (%s); using torch", model_name, exc)
+
+    if backend == "int8":
+        if device != "cpu":
+            logger.warning("int8 quantization runs on CPU only; loading %s on cpu", model_name)
+        return quantize_dynamic_int8(SentenceTransformer(model_name, device="cpu"))
+    return SentenceTransformer(model_name, device=device)
+
+def load_text2text_pipeline(model_name: str, backend: str = "torch", onnx_path: str = None):
+    """Load a text2text-generation pipeline with the requested backend (see module docstring)."""
+    _check(backend)
+    from transformers import pipeline
+
+    if backend == "onnx":
+        path = _onnx_dir(onnx_path)
+        if path is None:
+            logger.warning("No ONNX export at %s for %s; using torch", onnx_path, model_name)
+        else:
+            try:
+                from optimum.onnxruntime import ORTModelForSeq2SeqLM
+                from transformers import AutoTokenizer
+                model = ORTModelForSeq2SeqLM.from_pretrained(str(path))
+                tokenizer = AutoTokenizer.from_pretrained(str(path))
+                return pipeline("text2text-generation", model=model, tokenizer=tokenizer)
+            except (ImportError, ValueError, OSError) as exc:
+                logger.warning("ONNX backend unavailable for %s (%s); using torch", model_name, exc)
+
+    if backend == "int8":
+        pipe = pipeline("text2text-generation", model=model_name, device="cpu")
+        pipe.model = quantize_dynamic_int8(pipe.model)
+        return pipe
+    # HF pipeline handles device mapping automatically; keep it simple
+    return pipeline("text2text-generation", model=model_name, device_map="auto")
@@ -0,0 +1,174 @@
+from contextlib import contextmanager
+from typing import Callable, Dict
+from utils.stats import Histogram
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Upper bounds (seconds) of the stage duration histograms
+STAGE_SECONDS_BOUNDS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def peak_rss_mb() -> float | None:
+    """
+    Peak resident set size of this process in MiB over its whole lifetime
+    (a high-water mark, never lower than any earlier value), or None if unknown.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+def rss_mb() -> float | None:
+    """Current resident set size of this process in MiB (Linux /proc), or None if unknown."""
+    if resource is None:
+        return None
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * resource.getpagesize() / (1 << 20)
+
+def rss_growth_mb(before: float | None) -> float | None:
+    """RSS now minus `before` (an earlier `rss_mb()`), or None if either is unknown."""
+    after = rss_mb() if before is not None else None
+    return after - before if after is not None else None
+
+
+class Metrics:
+    """
+    Process-wide registry of per-stage measurements.
+
+    Every `record` call adds one stage execution: its wall time (into a
+    Histogram), item counts (summed per stage, e.g. chunks produced or
+    embeddings computed) and the change in resident memory across it (the
+    largest growth is kept per stage). Hooks registered with `add_hook`
+    receive each event dict as it is recorded, e.g. to log slow stages or
+    forward them elsewhere.
+
+    RSS is per process, so a stage's delta also includes memory taken or
+    freed by other threads while it ran (e.g. concurrent API requests); read
+    it as exact only for stages that run alone. `peak_rss_mb` in the
+    snapshot is the process-lifetime high-water mark, not a per-stage value.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, dict] = {}
+        self._hooks: list = []
+
+    def add_hook(self, hook: Callable[[dict], None]) -> None:
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: Callable[[dict], None]) -> None:
+        self._hooks.remove(hook)
+
+    def record(self, stage: str, seconds: float, items: dict = None, rss_delta_mb: float = None) -> dict:
+        """
+        Record one execution of `stage`.
+
+        Args:
+            rss_delta_mb (float, optional): Change in resident memory across the
+                execution, as measured by `timer`.
+
+        Returns:
+            dict: The event passed to hooks: {"stage", "seconds", "items", "rss_delta_mb"}.
+        """
+        event = {"stage": stage, "seconds": seconds, "items": dict(items or {}),
+                 "rss_delta_mb": rss_delta_mb}
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = {"seconds": Histogram(STAGE_SECONDS_BOUNDS),
+                                               "items": {}, "rss_delta_mb": None}
+            for key, value in event["items"].items():
+                entry["items"][key] = entry["items"].get(key, 0) + value
+            if rss_delta_mb is not None:
+                entry["rss_delta_mb"] = max(entry["rss_delta_mb"] or 0.0, rss_delta_mb)
+        entry["seconds"].observe(seconds)
+        for hook in list(self._hooks):
+            hook(event)
+        return event
+
+    @contextmanager
+    def timer(self, stage: str, items: dict = None):
+        """
+        Time a block as one execution of `stage`, with the change in RSS
+        across it. The yielded dict can be filled with item counts inside the block.
+        """
+        counts = dict(items or {})
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        try:
+            yield counts
+        finally:
+            self.record(stage, time.perf_counter() - start, counts, rss_growth_mb(rss_before))
+
+    def snapshot(self) -> dict:
+        """JSON-serializable view of every stage."""
+        with self._lock:
+            stages = list(self._stages.items())
+        return {
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": {
+                stage: {"seconds": entry["seconds"].to_dict(), "items": dict(entry["items"]),
+                        "rss_delta_mb": entry["rss_delta_mb"]}
+                for stage, entry in stages
+            },
+        }
+
+    def to_prometheus(self, prefix: str = "aiplayground") -> str:
+        """Render the snapshot in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_stage_seconds Wall time per stage execution.",
+            f"# TYPE {prefix}_stage_seconds histogram",
+        ]
+        for stage, data in snap["stages"].items():
+            label = _label(stage)
+            cumulative = 0
+            for bound, count in data["seconds"]["buckets"].items():
+                cumulative += count
+                le = bound[2:] if bound.startswith("<=") else bound
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{label}",le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{label}"}} {data["seconds"]["sum"]}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{label}"}} {data["seconds"]["count"]}')
+
+        lines += [f"# HELP {prefix}_stage_items_total Items processed per stage.",
+                  f"# TYPE {prefix}_stage_items_total counter"]
+        for stage, data in snap["stages"].items():
+            for item, value in sorted(data["items"].items()):
+                lines.append(f'{prefix}_stage_items_total{{stage="{_label(stage)}",item="{_label(item)}"}} {value}')
+
+        growth = {stage: data["rss_delta_mb"] for stage, data in snap["stages"].items()
+                  if data["rss_delta_mb"] is not None}
+        if growth:
+            lines += [f"# HELP {prefix}_stage_rss_growth_bytes Largest resident memory growth over one stage execution.",
+                      f"# TYPE {prefix}_stage_rss_growth_bytes gauge"]
+            for stage, delta in growth.items():
+                lines.append(f'{prefix}_stage_rss_growth_bytes{{stage="{_label(stage)}"}} {int(delta * (1 << 20))}')
+
+        if snap["peak_rss_mb"] is not None:
+            lines += [f"# HELP {prefix}_peak_rss_bytes Peak resident set size of the process.",
+                      f"# TYPE {prefix}_peak_rss_bytes gauge",
+                      f"{prefix}_peak_rss_bytes {int(snap['peak_rss_mb'] * (1 << 20))}"]
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+# Default registry used by module instrumentation
+metrics = Metrics()
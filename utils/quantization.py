@@ -0,0 +1,136 @@
+from pathlib import Path
+from utils.fileio import atomic_write
+from utils.vectors import normalize, top_k_indices
+import hashlib
+import io
+import numpy as np
+
+SUPPORTED = ("float16", "int8")
+
+
+class QuantizedMatrix:
+    """
+    Compact row-major embedding matrix for first-pass similarity scoring.
+
+    - float16: half-precision copy of the (normalized) rows.
+    - int8:    symmetric per-row quantization, row ~= data[row] * scales[row]
+               with scale = max(|row|) / 127.
+
+    Scoring dequantizes in blocks so temporary float32 memory stays bounded.
+
+    `full` optionally holds the float32 rows for re-scoring candidates. Once
+    saved it is a read-only memory map of a .npy file next to the matrix, so
+    re-scoring only pages in the candidate rows.
+    """
+
+    BLOCK_ROWS = 8192
+
+    def __init__(self, data: np.ndarray, scales: np.ndarray = None, full: np.ndarray = None):
+        self.data = data
+        self.scales = scales
+        self.full = full
+        self.dtype = data.dtype.name
+
+    @classmethod
+    def from_float(cls, matrix: np.ndarray, dtype: str = "int8"):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if dtype == "float16":
+            return cls(matrix.astype(np.float16))
+        if dtype == "int8":
+            scales = np.abs(matrix).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            data = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+            return cls(data, scales.astype(np.float32))
+        raise ValueError(f"Unsupported quantized dtype: {dtype} (expected one of {SUPPORTED})")
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    @property
+    def bytes_per_vector(self) -> float:
+        per_row = self.data.shape[1] * self.data.itemsize
+        if self.scales is not None:
+            per_row += self.scales.itemsize
+        return per_row
+
+    def scores(self, query_vec: np.ndarray) -> np.ndarray:
+        """Approximate dot products of every row with a float32 query."""
+        query_vec = np.asarray(query_vec, dtype=np.float32)
+        out = np.empty(len(self.data), dtype=np.float32)
+        for start in range(0, len(self.data), self.BLOCK_ROWS):
+            block = self.data[start:start + self.BLOCK_ROWS].astype(np.float32)
+            out[start:start + self.BLOCK_ROWS] = block @ query_vec
+        if self.scales is not None:
+            out *= self.scales
+        return out
+
+    @staticmethod
+    def _full_path(path: Path, keys: list, model_name: str) -> Path:
+        """
+        Float32 rows file for a saved matrix. Named after its keys and model,
+        so a crash between the two writes never pairs rows with stale keys.
+        """
+        digest = hashlib.sha1("\n".join([model_name, *keys]).encode("utf-8")).hexdigest()[:12]
+        return path.with_name(f"{path.stem}.{digest}.npy")
+
+    def save(self, path, keys: list, model_name: str) -> None:
+        """
+        Save to an .npz file together with the row keys it was built for.
+        `full` rows, if set, go to a .npy file beside it (written first) and
+        are replaced by a memory map of that file.
+        """
+        path = Path(path)
+        arrays = {"data": self.data, "keys": np.array(keys), "model_name": np.array(model_name)}
+        if self.scales is not None:
+            arrays["scales"] = self.scales
+        full_path = None
+        if self.full is not None:
+            full_path = self._full_path(path, keys, model_name)
+            buf = io.BytesIO()
+            np.save(buf, np.ascontiguousarray(self.full, dtype=np.float32))
+            atomic_write(full_path, buf.getvalue())
+            arrays["full"] = np.array(full_path.name)
+        buf = io.BytesIO()
+        np.savez(buf, **arrays)
+        atomic_write(path, buf.getvalue())
+        for stale in path.parent.glob(f"{path.stem}.*.npy"):
+            if stale != full_path:
+                stale.unlink(missing_ok=True)
+        if full_path is not None:
+            self.full = np.load(full_path, mmap_mode="r")
+
+    @classmethod
+    def load(cls, path, keys: list, model_name: str, full: bool = False):
+        """
+        Load a saved matrix if it was built for exactly these keys and model, else None.
+        With `full`, the float32 rows must have been saved too; they are memory-mapped.
+        """
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data["model_name"]) != model_name or data["keys"].tolist() != keys:
+                    return None
+                matrix = cls(data["data"], data["scales"] if "scales" in data.files else None)
+                full_name = str(data["full"]) if "full" in data.files else None
+            if full:
+                if full_name is None:
+                    return None
+                matrix.full = np.load(path.with_name(full_name), mmap_mode="r")
+                if matrix.full.shape != matrix.data.shape:
+                    return None
+            return matrix
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def recall_at_k(quantized: QuantizedMatrix, matrix: np.ndarray, queries: np.ndarray, k: int = 10) -> float:
+    """Mean overlap of quantized top-k with float32 top-k over the given queries."""
+    matrix = normalize(matrix)
+    hits = 0
+    for query in normalize(queries):
+        exact = set(top_k_indices(matrix @ query, k).tolist())
+        approx = set(top_k_indices(quantized.scores(query), k).tolist())
+        hits += len(exact & approx)
+    return hits / (len(queries) * min(k, len(matrix)))
@@ -0,0 +1,37 @@
+from bisect import bisect_left
+from typing import Iterable, List
+import threading
+
+
+class Histogram:
+    """
+    Thread-safe fixed-bucket histogram.
+
+    Each observation is counted in the first bucket whose upper bound is >= the
+    value; values above the last bound fall into the "+Inf" bucket.
+    """
+
+    def __init__(self, bounds: Iterable[float]):
+        self.bounds: List[float] = sorted(bounds)
+        self.counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect_left(self.bounds, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def to_dict(self) -> dict:
+        """Snapshot with per-bucket (non-cumulative) counts keyed by upper bound."""
+        with self._lock:
+            buckets = {f"<={b:g}": c for b, c in zip(self.bounds, self.counts)}
+            buckets["+Inf"] = self.counts[-1]
+            return {
+                "count": self.count,
+                "sum": self.sum,
+                "mean": self.sum / self.count if self.count else 0.0,
+                "buckets": buckets,
+            }
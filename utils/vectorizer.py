@@ -1,5 +1,4 @@
 from typing import List
-from sentence_transformers import SentenceTransformer
 import yaml
 from pathlib import Path
 from functools import lru_cache
@@ -9,20 +8,38 @@ from functools import lru_cache
 with open(Path(__file__).parent.parent / "config.yaml", "r") as f:
     config = yaml.safe_load(f)
 
-# Initialize default model once
-_default_model = SentenceTransformer(config["embedding"]["model_name"], device=config["embedding"]["device"])
+def backend_settings(model_name: str) -> dict:
+    """
+    Inference backend for an embedding model: embedding.backend / onnx_path,
+    overridden per model under embedding.models.<model_name>.
+    """
+    embedding = config["embedding"]
+    settings = {"backend": embedding.get("backend", "torch"), "onnx_path": embedding.get("onnx_path")}
+    settings.update((embedding.get("models") or {}).get(model_name, {}))
+    return settings
+
+def embedding_key(model_name: str) -> str:
+    """
+    Name that cached embeddings of `model_name` are stored under. Quantized
+    and ONNX backends produce slightly different vectors, so they get their
+    own key (e.g. "all-MiniLM-L6-v2@int8") and never reuse torch vectors.
+    """
+    backend = backend_settings(model_name)["backend"]
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
 
 @lru_cache(maxsize=3)
 def get_model(model_name: str):
-    """Load and cache models by name."""
-    return SentenceTransformer(model_name, device=config["embedding"]["device"])
+    """Load and cache models by name. sentence-transformers is imported on first use."""
+    from utils.inference import load_sentence_transformer
+    return load_sentence_transformer(model_name, device=config["embedding"]["device"],
+                                     **backend_settings(model_name))
 
 def vectorize_string(txt: str, model_name: str = None):
     """Return embedding for a single string. Uses default model unless model_name is provided."""
-    model = _default_model if model_name is None else get_model(model_name)
+    model = get_model(model_name or config["embedding"]["model_name"])
     return model.encode(txt)
 
-def vectorize_all(texts: List[str], model_name: str = None):
+def vectorize_all(texts: List[str], model_name: str = None, batch_size: int = 32):
     """Return embeddings for a list of strings. Uses default model unless model_name is provided."""
-    model = _default_model if model_name is None else get_model(model_name)
-    return model.encode(texts)
\ No newline at end of file
+    model = get_model(model_name or config["embedding"]["model_name"])
+    return model.encode(texts, batch_size=batch_size)
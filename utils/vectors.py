@@ -0,0 +1,33 @@
+import numpy as np
+
+
+def normalize(vectors) -> np.ndarray:
+    """L2-normalize a vector or the rows of a matrix as float32."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores in descending order.
+    Uses a partial selection (argpartition) and only sorts the k winners.
+    Ties go to the lower index, so the result does not depend on how the
+    selection happened (e.g. one pass or several shards merged).
+    """
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        # place both the k-th and (k+1)-th best, to see whether a tie straddles the cut
+        part = np.argpartition(scores, (n - k - 1, n - k))
+        idx = part[n - k:]
+        kth = scores[part[n - k]]
+        if scores[part[n - k - 1]] == kth:
+            # rare: pick the lowest indices among the tied scores
+            above = np.flatnonzero(scores > kth)
+            idx = np.concatenate([above, np.flatnonzero(scores == kth)[:k - len(above)]])
+    else:
+        idx = np.arange(n)
+    return idx[np.lexsort((idx, -scores[idx]))]